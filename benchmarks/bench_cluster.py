@@ -0,0 +1,212 @@
+"""
+End-to-end benchmark of a namespace migration against a synthetic cluster.
+
+For each namespace size, reports the wall time of the whole run and the time
+spent in each stage:
+
+- extraction: time inside Kubernetes API calls (summed over threads),
+- transform: time building the ACA configurations, API calls excluded,
+- emission: time writing the output files,
+
+plus the number of API calls and the peak memory.
+
+Usage:
+    python -m benchmarks.bench_cluster [--deployments 10 100 1000] [--latency-ms 5]
+        [--workers 8] [--engine threads|async] [--no-prefetch] [--page-size 500]
+        [--output yaml]
+        [--trace-memory]
+"""
+
+import argparse
+import contextlib
+import io
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from benchmarks.fake_kube import FakeKubeApis
+from benchmarks.synthetic import synthetic_namespace
+from src.async_yaml_transformer import AsyncYamlTransformer
+from src.kubernetes_utils import DEFAULT_PAGE_SIZE, iter_deployments
+from src.main import write_aca_config
+from src.pipeline import transform_deployments, transform_deployments_async
+from src.snapshot import NamespaceSnapshot
+from src.yaml_transformer import YamlTransformer
+
+NAMESPACE = "synthetic"
+
+
+class Stopwatch:
+    """
+    Thread-safe accumulated durations.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = 0.0
+
+    def add(self, seconds):
+        with self.lock:
+            self.seconds += seconds
+
+
+def timed_transformer(transformer_class, stopwatch):
+    """
+    Build a transformer that accumulates the time spent in ``transform``.
+    """
+
+    class TimedTransformer(transformer_class):
+        if transformer_class is AsyncYamlTransformer:
+
+            async def transform(self, kube_apis, deployment):
+                start = time.perf_counter()
+                try:
+                    return await super().transform(kube_apis, deployment)
+                finally:
+                    stopwatch.add(time.perf_counter() - start)
+
+        else:
+
+            def transform(self, kube_apis, deployment):
+                start = time.perf_counter()
+                try:
+                    return super().transform(kube_apis, deployment)
+                finally:
+                    stopwatch.add(time.perf_counter() - start)
+
+    return TimedTransformer(credential_providers=[], interactive=False)
+
+
+def run(size, args):
+    """
+    Migrate a synthetic namespace and measure it.
+
+    Returns:
+        dict: The measurements.
+    """
+    index = synthetic_namespace(size, namespace=NAMESPACE)
+    kube_apis = FakeKubeApis(index, latency=args.latency_ms / 1000)
+    transform_stopwatch = Stopwatch()
+    transformer_class = (
+        AsyncYamlTransformer if args.engine == "async" else YamlTransformer
+    )
+    yaml_transformer = timed_transformer(transformer_class, transform_stopwatch)
+
+    with tempfile.TemporaryDirectory() as output_path:
+        emit_args = argparse.Namespace(
+            output=args.output,
+            outputpath=output_path,
+            yaml_backend="auto",
+            json_backend="json",
+        )
+        if args.trace_memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            deployments = iter_deployments(kube_apis, NAMESPACE, args.page_size)
+            source_apis = kube_apis
+            if not args.no_prefetch:
+                source_apis = NamespaceSnapshot(kube_apis, NAMESPACE)
+            listing_api_seconds = kube_apis.stats.seconds
+
+            if args.engine == "async":
+                results = transform_deployments_async(
+                    source_apis,
+                    yaml_transformer,
+                    deployments,
+                    args.workers,
+                    batch_size=args.page_size,
+                )
+            else:
+                results = transform_deployments(
+                    source_apis,
+                    yaml_transformer,
+                    deployments,
+                    args.workers,
+                    batch_size=args.page_size,
+                )
+
+            emission = 0.0
+            failures = 0
+            for result in results:
+                if result.error is not None:
+                    failures += 1
+                    continue
+                emit_start = time.perf_counter()
+                write_aca_config(emit_args, result.name, result.aca_config)
+                emission += time.perf_counter() - emit_start
+        wall = time.perf_counter() - start
+
+        peak_memory_mb = None
+        if args.trace_memory:
+            peak_memory_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+
+    transform_api_seconds = kube_apis.stats.seconds - listing_api_seconds
+    return {
+        "deployments": size,
+        "wall": wall,
+        "extraction": kube_apis.stats.seconds,
+        "transform": max(transform_stopwatch.seconds - transform_api_seconds, 0.0),
+        "emission": emission,
+        "calls": kube_apis.stats.total_calls,
+        "failures": failures,
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--deployments",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="Namespace sizes (10 to 10000)",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Latency of every API call"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads")
+    parser.add_argument("--no-prefetch", action="store_true")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument(
+        "--output", choices=["yaml", "json", "terraform"], default="yaml"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Measure the peak Python memory with tracemalloc (slows the run down)",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"engine={args.engine} workers={args.workers} latency={args.latency_ms}ms "
+        f"prefetch={not args.no_prefetch} page_size={args.page_size} output={args.output}\n"
+    )
+    print(
+        f"{'deploys':>8} {'wall s':>8} {'extract s':>10} {'transform s':>12} "
+        f"{'emit s':>8} {'calls':>7} {'fail':>5} {'peak MB':>8}"
+    )
+    for size in args.deployments:
+        measures = run(size, args)
+        peak = measures["peak_memory_mb"]
+        print(
+            f"{measures['deployments']:>8} {measures['wall']:>8.2f} "
+            f"{measures['extraction']:>10.2f} {measures['transform']:>12.2f} "
+            f"{measures['emission']:>8.2f} {measures['calls']:>7} "
+            f"{measures['failures']:>5} {peak if peak is not None else float('nan'):>8.1f}"
+        )
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024
+    print(f"\nprocess max RSS: {max_rss * scale / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
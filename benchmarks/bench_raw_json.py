@@ -0,0 +1,181 @@
+"""
+Compare listing a namespace into kubernetes client models with the raw JSON
+fast path (``--raw-json``), through the real kubernetes client against a local
+HTTP server that serves a synthetic namespace.
+
+For each path, reports the time and peak memory of listing the deployments
+and prefetching the namespace, and the time of transforming the deployments.
+The ACA configurations of both paths are checked to be identical.
+
+Usage:
+    python -m benchmarks.bench_raw_json [--deployments 2000] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from kubernetes import client
+
+from benchmarks.synthetic import synthetic_namespace
+from src.kubernetes_utils import iter_deployments
+from src.serializers import get_json_serializer
+from src.snapshot import (
+    CONFIG_MAP,
+    DEPLOYMENT,
+    HORIZONTAL_POD_AUTOSCALER,
+    INGRESS,
+    SECRET,
+    SERVICE,
+    NamespaceSnapshot,
+)
+from src.yaml_transformer import YamlTransformer
+
+NAMESPACE = "synthetic"
+
+PATHS = {
+    DEPLOYMENT: ("/apis/apps/v1", "deployments", "apps/v1"),
+    SERVICE: ("/api/v1", "services", "v1"),
+    SECRET: ("/api/v1", "secrets", "v1"),
+    CONFIG_MAP: ("/api/v1", "configmaps", "v1"),
+    INGRESS: ("/apis/networking.k8s.io/v1", "ingresses", "networking.k8s.io/v1"),
+    HORIZONTAL_POD_AUTOSCALER: (
+        "/apis/autoscaling/v1",
+        "horizontalpodautoscalers",
+        "autoscaling/v1",
+    ),
+}
+
+
+def serve(index):
+    """
+    Serve the list endpoints of a synthetic namespace.
+
+    Args:
+        index (ResourceIndex): The objects of the namespace.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    sanitize = client.ApiClient().sanitize_for_serialization
+    bodies = {}
+    for kind, (prefix, resource, api_version) in PATHS.items():
+        document = {
+            "apiVersion": api_version,
+            "kind": f"{kind}List",
+            "metadata": {"resourceVersion": "1"},
+            "items": [
+                dict(sanitize(obj), apiVersion=api_version, kind=kind)
+                for obj in index.list(kind, NAMESPACE)
+            ],
+        }
+        path = f"{prefix}/namespaces/{NAMESPACE}/{resource}"
+        bodies[path] = json.dumps(document).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = bodies.get(self.path.split("?")[0])
+            self.send_response(200 if body else 404)
+            body = body or b'{"kind":"Status","code":404}'
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class LocalApis:
+    """
+    Kubernetes API instances connected to the local server.
+    """
+
+    def __init__(self, port):
+        configuration = client.Configuration()
+        configuration.host = f"http://127.0.0.1:{port}"
+        api_client = client.ApiClient(configuration)
+        self.api_v1 = client.CoreV1Api(api_client)
+        self.api_instance = client.AppsV1Api(api_client)
+        self.api_network = client.NetworkingV1Api(api_client)
+        self.hpa_api_instance = client.AutoscalingV1Api(api_client)
+
+
+def list_namespace(kube_apis, raw):
+    deployments = list(iter_deployments(kube_apis, NAMESPACE, page_size=None, raw=raw))
+    return deployments, NamespaceSnapshot(kube_apis, NAMESPACE, raw=raw)
+
+
+def measure(kube_apis, raw, repeat):
+    """
+    List and transform the namespace.
+
+    Returns:
+        tuple: The best listing time, the peak listing memory in MB, the best
+            transform time, and the serialized ACA configurations.
+    """
+    list_seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        deployments, snapshot = list_namespace(kube_apis, raw)
+        list_seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    list_namespace(kube_apis, raw)
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    yaml_transformer = YamlTransformer(credential_providers=[], interactive=False)
+    transform_seconds = []
+    # The extractors print the custom domains they find; keep the report readable.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            configs = [
+                yaml_transformer.transform(snapshot, deployment)
+                for deployment in deployments
+            ]
+            transform_seconds.append(time.perf_counter() - start)
+
+    serializer = get_json_serializer()
+    outputs = [serializer.dumps(config.to_dict()) for config in configs]
+    return min(list_seconds), peak_mb, min(transform_seconds), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deployments", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    server = serve(synthetic_namespace(args.deployments, namespace=NAMESPACE))
+    kube_apis = LocalApis(server.server_address[1])
+    try:
+        results = {
+            "models": measure(kube_apis, False, args.repeat),
+            "raw json": measure(kube_apis, True, args.repeat),
+        }
+    finally:
+        server.shutdown()
+
+    print(f"{args.deployments} deployments, best of {args.repeat}\n")
+    print(f"{'path':<10} {'list s':>8} {'list peak MB':>13} {'transform s':>12}")
+    for name, (list_s, peak_mb, transform_s, _) in results.items():
+        print(f"{name:<10} {list_s:>8.3f} {peak_mb:>13.1f} {transform_s:>12.3f}")
+    speedup = results["models"][0] / results["raw json"][0]
+    print(f"\nlisting speedup: {speedup:.1f}x")
+    identical = results["models"][3] == results["raw json"][3]
+    print(f"identical ACA configurations: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare the YAML and JSON serializer backends on ACA configurations built by
+YamlTransformer from a synthetic namespace.
+
+Usage:
+    python -m benchmarks.bench_serializers [--apps 500] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.synthetic import synthetic_namespace
+from src.serializers import (
+    JSON_BACKENDS,
+    YAML_BACKENDS,
+    get_json_serializer,
+    get_yaml_serializer,
+)
+from src.snapshot import InMemoryApis
+from src.yaml_transformer import YamlTransformer
+
+
+def build_configs(apps):
+    """
+    Build the ACA configurations of a synthetic namespace.
+
+    Args:
+        apps (int): The number of apps.
+
+    Returns:
+        list: The ACA configurations.
+    """
+    index = synthetic_namespace(apps)
+    kube_apis = InMemoryApis(index)
+    yaml_transformer = YamlTransformer(credential_providers=[], interactive=False)
+    # The extractors print the custom domains they find; keep the report readable.
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [
+            yaml_transformer.transform(kube_apis, deployment).to_dict()
+            for deployment in kube_apis.api_instance.list_namespaced_deployment(
+                "synthetic"
+            ).items
+        ]
+
+
+def available_serializers():
+    serializers = []
+    for backend in YAML_BACKENDS[1:]:
+        with contextlib.suppress(ValueError):
+            serializers.append(get_yaml_serializer(backend))
+    for backend in JSON_BACKENDS:
+        with contextlib.suppress(ValueError):
+            serializers.append(get_json_serializer(backend))
+    return serializers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", type=int, default=500, help="Number of apps")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend")
+    args = parser.parse_args()
+
+    configs = build_configs(args.apps)
+    print(f"{len(configs)} ACA configurations\n")
+    print(f"{'format':<6} {'backend':<8} {'best s':>8} {'us/app':>8} {'MB/s':>8} {'stable':>7}")
+
+    for serializer in available_serializers():
+        timings = []
+        outputs = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            rendered = [serializer.dumps(config) for config in configs]
+            timings.append(time.perf_counter() - start)
+            if outputs is None:
+                outputs = rendered
+        stable = rendered == outputs
+        best = min(timings)
+        size_mb = sum(len(output.encode("utf-8")) for output in outputs) / 1e6
+        print(
+            f"{serializer.extension:<6} {serializer.name:<8} {best:>8.3f} "
+            f"{best / len(configs) * 1e6:>8.1f} {size_mb / best:>8.2f} {str(stable):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Measure the start-up time of the command line, and check it against a budget.
+
+Runs ``python -X importtime -c "import src.main"`` in fresh interpreters and
+reports the median time to import ``src.main`` and the slowest imports, then
+the median wall time of ``python -m src.main --help``. Exits with status 1 when
+the import time exceeds the budget, or when a module that must only be loaded
+by the runs needing it (the kubernetes client, PyYAML, asyncio) is imported at
+start-up, so CI can track both.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 10] [--budget-ms 60] [--top 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules the command line defers until a run needs them.
+DEFERRED_MODULES = ("kubernetes", "yaml", "urllib3", "asyncio")
+
+# Time to import src.main, interpreter start-up excluded.
+DEFAULT_BUDGET_MS = 60.0
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    """
+    Import ``src.main`` in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        tuple: The cumulative and the self import times of every module, in
+            microseconds, as dictionaries by module name.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    own = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        own[name.strip()] = int(self_us)
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative, own
+
+
+def loaded_modules():
+    """
+    List the modules loaded by importing ``src.main``.
+
+    Returns:
+        set: The module names.
+    """
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, src.main; print('\\n'.join(sys.modules))",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(completed.stdout.split())
+
+
+def help_seconds():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "src.main", "--help"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="Maximum median time to import src.main",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of slowest imports to list"
+    )
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(max(args.repeat, 1))]
+    main_ms = statistics.median(cumulative["src.main"] for cumulative, _ in runs) / 1000
+    # The slowest modules by self time, over the median run.
+    _, own = sorted(runs, key=lambda run: run[0]["src.main"])[len(runs) // 2]
+    print(f"{'self ms':>8}  module")
+    for name, self_us in sorted(own.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{self_us / 1000:>8.1f}  {name}")
+
+    help_ms = statistics.median(help_seconds() for _ in range(max(args.repeat, 1))) * 1000
+    print(f"\nimport src.main: {main_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"src.main --help: {help_ms:.1f} ms wall, interpreter start-up included")
+
+    failed = False
+    deferred = sorted(loaded_modules().intersection(DEFERRED_MODULES))
+    if deferred:
+        print(f"FAIL: imported at start-up: {', '.join(deferred)}")
+        failed = True
+    if main_ms > args.budget_ms:
+        print(f"FAIL: over budget by {main_ms - args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure the throughput of the Terraform emitter on apps with many environment
+variables. The time per environment variable should stay flat as apps grow.
+
+Usage:
+    python -m benchmarks.bench_terraform [--apps 50] [--env-vars 100 300 1000]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.synthetic import synthetic_namespace
+from src import transformer_tf
+from src.snapshot import InMemoryApis
+from src.yaml_transformer import YamlTransformer
+
+
+def build_configs(apps, env_vars):
+    kube_apis = InMemoryApis(synthetic_namespace(apps, env_vars=env_vars))
+    yaml_transformer = YamlTransformer(credential_providers=[], interactive=False)
+    deployments = kube_apis.api_instance.list_namespaced_deployment("synthetic").items
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [
+            (deployment.metadata.name, yaml_transformer.transform(kube_apis, deployment))
+            for deployment in deployments
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", type=int, default=50, help="Number of apps")
+    parser.add_argument(
+        "--env-vars",
+        type=int,
+        nargs="+",
+        default=[100, 300, 1000],
+        help="Environment variables per container",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size")
+    args = parser.parse_args()
+
+    print(f"{'env vars':>8} {'best s':>8} {'ms/app':>8} {'us/env':>8} {'MB/s':>8}")
+    for env_vars in args.env_vars:
+        configs = build_configs(args.apps, env_vars)
+        timings = []
+        for _ in range(args.repeat):
+            output = io.StringIO()
+            start = time.perf_counter()
+            for name, config in configs:
+                transformer_tf.write(name, config, output)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        total_env = sum(
+            len(container.env) for _, app in configs for container in app.containers
+        )
+        size_mb = len(output.getvalue().encode("utf-8")) / 1e6
+        print(
+            f"{env_vars:>8} {best:>8.3f} {best / len(configs) * 1e3:>8.2f} "
+            f"{best / total_env * 1e6:>8.2f} {size_mb / best:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+An in-memory stand-in for KubeApis, with configurable per-call latency.
+
+It serves the ``api_v1``, ``api_instance``, ``api_network`` and
+``hpa_api_instance`` methods the tool calls from a ResourceIndex, and records
+how many calls were made and how long they took.
+"""
+
+import threading
+import time
+
+from src.snapshot import InMemoryApis
+
+
+class CallStats:
+    """
+    Thread-safe call counts and durations, by API method.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.seconds = 0.0
+
+    def record(self, method, seconds):
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self.seconds += seconds
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        with self.lock:
+            self.calls = {}
+            self.seconds = 0.0
+
+
+class LatencyApi:
+    """
+    Wraps an API group, sleeping for the configured latency on every call.
+    """
+
+    def __init__(self, api, latency, stats):
+        self.api = api
+        self.latency = latency
+        self.stats = stats
+
+    def __getattr__(self, name):
+        method = getattr(self.api, name)
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                if self.latency:
+                    time.sleep(self.latency)
+                return method(*args, **kwargs)
+            finally:
+                self.stats.record(name, time.perf_counter() - start)
+
+        return call
+
+
+class FakeKubeApis:
+    """
+    Serves a ResourceIndex through the KubeApis interface.
+    """
+
+    def __init__(self, index, latency=0.0):
+        """
+        Args:
+            index (ResourceIndex): The objects of the fake cluster.
+            latency (float, optional): Seconds added to every call. Defaults to 0.
+        """
+        self.stats = CallStats()
+        apis = InMemoryApis(index)
+        self.api_v1 = LatencyApi(apis.api_v1, latency, self.stats)
+        self.api_instance = LatencyApi(apis.api_instance, latency, self.stats)
+        self.api_network = LatencyApi(apis.api_network, latency, self.stats)
+        self.hpa_api_instance = LatencyApi(apis.hpa_api_instance, latency, self.stats)
@@ -0,0 +1,214 @@
+"""
+Synthetic Kubernetes namespaces for the benchmarks.
+
+The generated deployments look like real workloads: several containers with
+resources, readiness probes, environment variables and volume mounts, backed
+by secrets, services, HPAs and ingresses.
+"""
+
+import base64
+
+from kubernetes import client
+
+from src.snapshot import (
+    CONFIG_MAP,
+    DEPLOYMENT,
+    HORIZONTAL_POD_AUTOSCALER,
+    INGRESS,
+    SECRET,
+    SERVICE,
+    ResourceIndex,
+)
+
+
+def _metadata(name, namespace, resource_version="1"):
+    return client.V1ObjectMeta(
+        name=name,
+        namespace=namespace,
+        resource_version=resource_version,
+        labels={"app": name, "team": "team-" + name[-1]},
+    )
+
+
+def _b64(value):
+    return base64.b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def synthetic_deployment(name, namespace, containers=2, env_vars=20, peers=()):
+    """
+    Build a synthetic deployment.
+
+    Args:
+        name (str): The deployment name.
+        namespace (str): The namespace.
+        containers (int, optional): The number of containers. Defaults to 2.
+        env_vars (int, optional): The number of plain environment variables per container. Defaults to 20.
+        peers (iterable, optional): Names of other deployments referenced from environment variables.
+
+    Returns:
+        V1Deployment: The deployment.
+    """
+    pod_containers = []
+    for index in range(containers):
+        env = [
+            client.V1EnvVar(name=f"SETTING_{i}", value=f"value-{i}-{name}")
+            for i in range(env_vars)
+        ]
+        env += [
+            client.V1EnvVar(name=f"{peer.upper()}_URL", value=f"http://{peer}:80")
+            for peer in peers
+        ]
+        pod_containers.append(
+            client.V1Container(
+                name=f"{name}-{index}",
+                image=f"myregistry.azurecr.io/{namespace}/{name}-{index}:1.{index}.0",
+                command=["/bin/app", "--port", "8080"],
+                env=env,
+                env_from=[
+                    client.V1EnvFromSource(
+                        secret_ref=client.V1SecretEnvSource(name=f"{name}-env")
+                    )
+                ],
+                ports=[client.V1ContainerPort(name="http", container_port=8080)],
+                readiness_probe=client.V1Probe(
+                    http_get=client.V1HTTPGetAction(
+                        path="/healthz", port="http", scheme="HTTP"
+                    ),
+                    period_seconds=10,
+                    initial_delay_seconds=5,
+                    failure_threshold=3,
+                ),
+                resources=client.V1ResourceRequirements(
+                    limits={"cpu": "500m", "memory": "768Mi"},
+                    requests={"cpu": "250m", "memory": "512Mi"},
+                ),
+                volume_mounts=[
+                    client.V1VolumeMount(name="certs", mount_path="/etc/certs")
+                ],
+            )
+        )
+
+    return client.V1Deployment(
+        metadata=_metadata(name, namespace),
+        spec=client.V1DeploymentSpec(
+            replicas=2,
+            selector=client.V1LabelSelector(match_labels={"app": name}),
+            template=client.V1PodTemplateSpec(
+                metadata=client.V1ObjectMeta(labels={"app": name}),
+                spec=client.V1PodSpec(
+                    containers=pod_containers,
+                    volumes=[
+                        client.V1Volume(
+                            name="certs",
+                            secret=client.V1SecretVolumeSource(
+                                secret_name=f"{name}-certs"
+                            ),
+                        )
+                    ],
+                ),
+            ),
+        ),
+    )
+
+
+def synthetic_namespace(
+    deployments=100, namespace="synthetic", containers=2, env_vars=20
+):
+    """
+    Build the objects of a synthetic namespace.
+
+    Every deployment has a service and two secrets. Every other deployment has
+    an HPA, every third one an ingress, and each one references the next
+    deployment from an environment variable.
+
+    Args:
+        deployments (int, optional): The number of deployments. Defaults to 100.
+        namespace (str, optional): The namespace. Defaults to "synthetic".
+        containers (int, optional): The number of containers per deployment. Defaults to 2.
+        env_vars (int, optional): The number of plain environment variables per container. Defaults to 20.
+
+    Returns:
+        ResourceIndex: The objects of the namespace, covering every kind.
+    """
+    index = ResourceIndex()
+    for number in range(deployments):
+        name = f"app-{number:05d}"
+        peers = [f"app-{(number + 1) % deployments:05d}"] if deployments > 1 else []
+        index.add(
+            DEPLOYMENT,
+            synthetic_deployment(name, namespace, containers, env_vars, peers),
+        )
+        index.add(
+            SECRET,
+            client.V1Secret(
+                metadata=_metadata(f"{name}-env", namespace),
+                data={f"SECRET_{i}": _b64(f"secret-{i}-{name}") for i in range(5)},
+            ),
+        )
+        index.add(
+            SECRET,
+            client.V1Secret(
+                metadata=_metadata(f"{name}-certs", namespace),
+                data={"tls.crt": _b64("-----BEGIN CERTIFICATE-----"), "tls.key": _b64("key")},
+            ),
+        )
+        index.add(
+            SERVICE,
+            client.V1Service(
+                metadata=_metadata(name, namespace),
+                spec=client.V1ServiceSpec(
+                    ports=[client.V1ServicePort(port=80, target_port=8080)]
+                ),
+            ),
+        )
+        if number % 2 == 0:
+            index.add(
+                HORIZONTAL_POD_AUTOSCALER,
+                client.V1HorizontalPodAutoscaler(
+                    metadata=_metadata(name, namespace),
+                    spec=client.V1HorizontalPodAutoscalerSpec(
+                        min_replicas=2,
+                        max_replicas=10,
+                        scale_target_ref=client.V1CrossVersionObjectReference(
+                            kind="Deployment", name=name
+                        ),
+                    ),
+                ),
+            )
+        if number % 3 == 0:
+            backend = client.V1IngressBackend(
+                service=client.V1IngressServiceBackend(
+                    name=name, port=client.V1ServiceBackendPort(number=80)
+                )
+            )
+            index.add(
+                INGRESS,
+                client.V1Ingress(
+                    metadata=_metadata(name, namespace),
+                    spec=client.V1IngressSpec(
+                        tls=[client.V1IngressTLS(hosts=[f"{name}.example.com"])],
+                        rules=[
+                            client.V1IngressRule(
+                                http=client.V1HTTPIngressRuleValue(
+                                    paths=[
+                                        client.V1HTTPIngressPath(
+                                            path="/", path_type="Prefix", backend=backend
+                                        )
+                                    ]
+                                )
+                            )
+                        ],
+                    ),
+                ),
+            )
+
+    for kind in (
+        CONFIG_MAP,
+        DEPLOYMENT,
+        HORIZONTAL_POD_AUTOSCALER,
+        INGRESS,
+        SECRET,
+        SERVICE,
+    ):
+        index.cover(kind, namespace)
+    return index
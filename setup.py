@@ -22,5 +22,5 @@ setup(
             'K8sToAca=src.main:main',  # Create a command-line script
         ],
     },
-    python_requires='>=3.6'
+    python_requires='>=3.7'
 )
\ No newline at end of file
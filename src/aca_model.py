@@ -0,0 +1,297 @@
+"""
+This module provides the intermediate representation of an Azure Container App.
+
+YamlTransformer builds one ContainerApp per deployment, validated once, and
+every emitter renders from it: ``to_dict`` gives the ACA YAML/JSON document,
+and the Terraform emitter reads the attributes directly. The classes are
+slotted, so thousands of apps can be held in flight cheaply.
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import List, Optional
+
+
+def slotted(cls):
+    """
+    Declare the fields of a dataclass as its ``__slots__``.
+
+    The class is created again with the slots, as ``dataclass(slots=True)``
+    does from Python 3.10 on: a class cannot declare a slot and a default value
+    under the same name, and the defaults are already held by ``__init__``.
+
+    Args:
+        cls (type): The dataclass.
+
+    Returns:
+        type: The slotted dataclass.
+    """
+    slots = tuple(item.name for item in fields(cls))
+    namespace = {
+        name: value
+        for name, value in cls.__dict__.items()
+        if name not in slots and name not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = slots
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@slotted
+@dataclass
+class Registry:
+    server: str
+    username: str
+    password_secret_ref: str
+
+    def to_dict(self):
+        return {
+            "server": self.server,
+            "username": self.username,
+            "passwordSecretRef": self.password_secret_ref,
+        }
+
+
+@slotted
+@dataclass
+class Secret:
+    name: str
+    value: str
+
+    def to_dict(self):
+        return {"name": self.name, "value": self.value}
+
+
+@slotted
+@dataclass
+class TrafficWeight:
+    weight: int = 100
+    latest_revision: bool = True
+
+    def to_dict(self):
+        return {"weight": self.weight, "latestRevision": self.latest_revision}
+
+
+@slotted
+@dataclass
+class Ingress:
+    target_port: object
+    external: bool = False
+    allow_insecure: bool = False
+    traffic: List[TrafficWeight] = field(default_factory=lambda: [TrafficWeight()])
+    # The backend services of the Kubernetes ingress; not rendered.
+    services: List[str] = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            "external": self.external,
+            "allowInsecure": self.allow_insecure,
+            "targetPort": self.target_port,
+            "traffic": [traffic.to_dict() for traffic in self.traffic],
+        }
+
+
+@slotted
+@dataclass
+class Probe:
+    """
+    An HTTP readiness probe.
+    """
+
+    port: Optional[int] = None
+    path: Optional[str] = None
+    host: Optional[str] = None
+    scheme: Optional[str] = None
+    # The headers as {"name": ..., "value": ...} dictionaries.
+    http_headers: Optional[List[dict]] = None
+    tcp_socket: Optional[dict] = None
+    period_seconds: Optional[int] = None
+    initial_delay_seconds: Optional[int] = None
+    failure_threshold: Optional[int] = None
+    type: str = "Readiness"
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "httpGet": {
+                "host": self.host,
+                "path": self.path,
+                "port": self.port,
+                "httpHeaders": self.http_headers,
+                "schema": self.scheme,
+            },
+            "tcpSocket": self.tcp_socket,
+            "periodSeconds": self.period_seconds,
+            "initialDelaySeconds": self.initial_delay_seconds,
+            "failureThreshold": self.failure_threshold,
+        }
+
+
+@slotted
+@dataclass
+class EnvVar:
+    """
+    An environment variable, with either a value or a reference to an app secret.
+    """
+
+    name: str
+    value: Optional[str] = None
+    secret_ref: Optional[str] = None
+
+    def to_dict(self):
+        if self.secret_ref is not None:
+            return {"name": self.name, "secretRef": self.secret_ref}
+        return {"name": self.name, "value": self.value}
+
+
+@slotted
+@dataclass
+class VolumeMount:
+    volume_name: str
+    mount_path: str
+
+    def to_dict(self):
+        return {"mountPath": self.mount_path, "volumeName": self.volume_name}
+
+
+@slotted
+@dataclass
+class Container:
+    name: str
+    image: str
+    cpu: float
+    memory: str
+    command: Optional[List[str]] = None
+    probes: List[Probe] = field(default_factory=list)
+    env: List[EnvVar] = field(default_factory=list)
+    volume_mounts: List[VolumeMount] = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            "image": self.image,
+            "name": self.name,
+            "resources": {"cpu": self.cpu, "memory": self.memory},
+            "command": self.command,
+            "probes": [probe.to_dict() for probe in self.probes],
+            "env": [env.to_dict() for env in self.env],
+            "volumeMounts": [mount.to_dict() for mount in self.volume_mounts],
+        }
+
+
+@slotted
+@dataclass
+class VolumeSecret:
+    """
+    A key of a secret volume, mounted as the file ``path``.
+    """
+
+    secret_ref: str
+    path: str
+
+    def to_dict(self):
+        return {"secretRef": self.secret_ref, "path": self.path}
+
+
+@slotted
+@dataclass
+class Volume:
+    name: str
+    storage_type: str = "Secret"
+    # None when the secret of the volume has no data.
+    secrets: Optional[List[VolumeSecret]] = None
+
+    def to_dict(self):
+        volume = {"name": self.name, "storageType": self.storage_type}
+        if self.secrets is not None:
+            volume["secrets"] = [secret.to_dict() for secret in self.secrets]
+        return volume
+
+
+@slotted
+@dataclass
+class Scale:
+    min_replicas: Optional[int] = None
+    max_replicas: Optional[int] = None
+
+    def to_dict(self):
+        return {"minReplicas": self.min_replicas, "maxReplicas": self.max_replicas}
+
+
+@slotted
+@dataclass
+class ContainerApp:
+    """
+    The ACA configuration of a deployment.
+    """
+
+    name: str
+    containers: List[Container] = field(default_factory=list)
+    registries: List[Registry] = field(default_factory=list)
+    secrets: List[Secret] = field(default_factory=list)
+    ingress: Optional[Ingress] = None
+    scale: Scale = field(default_factory=Scale)
+    volumes: List[Volume] = field(default_factory=list)
+    # The services of the namespace the app depends on, for the rollout order;
+    # not rendered.
+    references: List[str] = field(default_factory=list)
+
+    def validate(self):
+        """
+        Check the app is consistent before it is emitted.
+
+        Raises:
+            ValueError: If a container has no name or image, the scale range is
+                inverted, or a secret reference does not name a secret of the app.
+        """
+        if not self.containers:
+            raise ValueError(f"{self.name}: the app has no containers")
+        for container in self.containers:
+            if not container.name or not container.image:
+                raise ValueError(f"{self.name}: every container needs a name and an image")
+        scale = self.scale
+        if (
+            scale.min_replicas is not None
+            and scale.max_replicas is not None
+            and scale.min_replicas > scale.max_replicas
+        ):
+            raise ValueError(
+                f"{self.name}: minReplicas {scale.min_replicas} is above "
+                f"maxReplicas {scale.max_replicas}"
+            )
+
+        secret_names = {secret.name for secret in self.secrets}
+        references = [registry.password_secret_ref for registry in self.registries]
+        references += [
+            env.secret_ref
+            for container in self.containers
+            for env in container.env
+            if env.secret_ref is not None
+        ]
+        references += [
+            secret.secret_ref
+            for volume in self.volumes
+            for secret in volume.secrets or []
+        ]
+        for reference in references:
+            if reference not in secret_names:
+                raise ValueError(f"{self.name}: unknown secret '{reference}'")
+
+    def to_dict(self):
+        """
+        Render the ACA YAML/JSON document of the app.
+
+        Returns:
+            dict: The ACA configuration.
+        """
+        return {
+            "properties": {
+                "configuration": {
+                    "registries": [registry.to_dict() for registry in self.registries],
+                    "ingress": self.ingress.to_dict() if self.ingress else None,
+                    "secrets": [secret.to_dict() for secret in self.secrets],
+                },
+                "template": {
+                    "containers": [container.to_dict() for container in self.containers],
+                    "scale": self.scale.to_dict(),
+                    "volumes": [volume.to_dict() for volume in self.volumes],
+                },
+            }
+        }
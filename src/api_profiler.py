@@ -0,0 +1,334 @@
+"""
+This module records the Kubernetes API calls made during a migration: call
+counts by verb and kind, response bytes, 404s and latencies, and reports them
+as a summary table or a JSON document.
+"""
+
+import bisect
+import functools
+import json
+import re
+import threading
+import time
+
+from kubernetes.client.rest import ApiException
+
+# Upper bounds, in milliseconds, of the latency histogram buckets.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+API_ATTRIBUTES = ("api_v1", "api_instance", "api_network", "hpa_api_instance")
+
+METHOD_PATTERN = re.compile(
+    r"^(?P<verb>[a-z]+)_(?:namespaced_|cluster_)?(?P<kind>.+?)(?:_for_all_namespaces)?$"
+)
+
+
+def parse_method(method_name, kwargs):
+    """
+    Split an API method name into its verb and kind.
+
+    Args:
+        method_name (str): The method name, e.g. ``list_namespaced_deployment``.
+        kwargs (dict): The keyword arguments of the call.
+
+    Returns:
+        tuple: The (verb, kind), e.g. ("list", "deployment"). List calls made
+            with ``watch=True`` have the verb "watch".
+    """
+    match = METHOD_PATTERN.match(method_name)
+    if not match:
+        return method_name, ""
+    verb, kind = match.group("verb"), match.group("kind")
+    if verb == "list" and kwargs.get("watch"):
+        verb = "watch"
+    return verb, kind
+
+
+def percentile(values, fraction):
+    """
+    Get a percentile of sorted values, by the nearest-rank method.
+
+    Args:
+        values (list): The sorted values.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        float: The percentile, or 0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    rank = max(int(round(fraction * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class CallStats:
+    """
+    The calls of one verb and kind.
+    """
+
+    __slots__ = ("calls", "errors", "not_found", "bytes", "unsized", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.not_found = 0
+        self.bytes = 0
+        # The calls whose response size is unknown, e.g. watch streams.
+        self.unsized = 0
+        self.latencies = []
+
+    def to_dict(self):
+        latencies = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "not_found": self.not_found,
+            "not_found_rate": self.not_found / self.calls if self.calls else 0.0,
+            "bytes": self.bytes,
+            "unsized_calls": self.unsized,
+            "latency_ms": {
+                "total": sum(latencies),
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "max": latencies[-1] if latencies else 0.0,
+            },
+        }
+
+
+class ApiProfiler:
+    """
+    Records the calls made through the API instances of a KubeApis object.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.local = threading.local()
+        self.started = time.perf_counter()
+
+    def instrument(self, kube_apis):
+        """
+        Replace the API instances of a KubeApis object with profiled proxies.
+
+        Args:
+            kube_apis: Kubernetes API instances.
+
+        Returns:
+            The same KubeApis object, instrumented.
+        """
+        for attribute in API_ATTRIBUTES:
+            api = getattr(kube_apis, attribute, None)
+            if api is not None and not isinstance(api, ProfiledApi):
+                self.count_response_bytes(api)
+                setattr(kube_apis, attribute, ProfiledApi(api, self))
+        return kube_apis
+
+    def count_response_bytes(self, api):
+        """
+        Hook the REST client of an API instance, so the responses of each call
+        are kept until the call completes and their size can be recorded.
+        """
+        rest_client = getattr(getattr(api, "api_client", None), "rest_client", None)
+        if rest_client is None or getattr(rest_client, "_profiled", False):
+            return
+        request = rest_client.request
+
+        @functools.wraps(request)
+        def profiled_request(*args, **kwargs):
+            response = request(*args, **kwargs)
+            responses = getattr(self.local, "responses", None)
+            if responses is not None:
+                responses.append(response)
+            return response
+
+        rest_client.request = profiled_request
+        rest_client._profiled = True
+
+    def call(self, method, method_name, args, kwargs):
+        """
+        Make an API call and record it.
+        """
+        verb, kind = parse_method(method_name, kwargs)
+        self.local.responses = []
+        status = None
+        error_body = None
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except ApiException as e:
+            status = e.status
+            error_body = e.body
+            raise
+        except Exception:
+            status = -1
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            size = 0
+            for response in self.local.responses:
+                response_size = self.response_size(response)
+                if response_size is None:
+                    size = None
+                    break
+                size += response_size
+            if not self.local.responses and isinstance(error_body, (bytes, str)):
+                size = len(error_body)
+            self.local.responses = None
+            self.record(verb, kind, latency_ms, size, status)
+
+    @staticmethod
+    def response_size(response):
+        """
+        Get the size of a response without reading its body, which the caller of
+        a ``_preload_content=False`` call, e.g. a watch, streams itself.
+
+        Args:
+            response: A REST client response.
+
+        Returns:
+            int: The size in bytes of the body read by the client, otherwise its
+                Content-Length, or None if it is unknown.
+        """
+        # Only a body already read is an attribute; reading ``data`` from an
+        # unread urllib3 response would drain it.
+        data = vars(response).get("data") if hasattr(response, "__dict__") else None
+        if isinstance(data, (bytes, str)):
+            return len(data)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            return int(headers.get("Content-Length"))
+        except (TypeError, ValueError):
+            return None
+
+    def record(self, verb, kind, latency_ms, size=0, status=None):
+        """
+        Record a call.
+
+        Args:
+            verb (str): The verb, e.g. "list".
+            kind (str): The kind, e.g. "deployment".
+            latency_ms (float): The call duration, in milliseconds.
+            size (int, optional): The response size, in bytes, or None if unknown.
+            status (int, optional): The HTTP status of a failed call.
+        """
+        with self.lock:
+            stats = self.stats.setdefault((verb, kind), CallStats())
+            stats.calls += 1
+            if size is None:
+                stats.unsized += 1
+            else:
+                stats.bytes += size
+            stats.latencies.append(latency_ms)
+            if status == 404:
+                stats.not_found += 1
+            elif status is not None:
+                stats.errors += 1
+
+    def histogram(self):
+        """
+        Get the latency histogram of all calls.
+
+        Returns:
+            list: (upper bound in ms or None for the overflow bucket, count) pairs.
+        """
+        counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        with self.lock:
+            for stats in self.stats.values():
+                for latency in stats.latencies:
+                    counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency)] += 1
+        return list(zip(list(LATENCY_BUCKETS_MS) + [None], counts))
+
+    def report(self):
+        """
+        Get the report of the recorded calls.
+
+        Returns:
+            dict: The report, JSON serializable.
+        """
+        with self.lock:
+            calls = [
+                {"verb": verb, "kind": kind, **stats.to_dict()}
+                for (verb, kind), stats in sorted(self.stats.items())
+            ]
+        return {
+            "elapsed_seconds": time.perf_counter() - self.started,
+            "total_calls": sum(call["calls"] for call in calls),
+            "total_bytes": sum(call["bytes"] for call in calls),
+            "calls": calls,
+            "latency_histogram_ms": [
+                {"le": bound, "count": count} for bound, count in self.histogram()
+            ],
+        }
+
+    def summary(self):
+        """
+        Format the recorded calls as a table.
+
+        Returns:
+            str: The summary.
+        """
+        report = self.report()
+        lines = [
+            f"{'verb':<8} {'kind':<26} {'calls':>7} {'404%':>6} {'errors':>6} "
+            f"{'KiB':>9} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"
+        ]
+        for call in report["calls"]:
+            latency = call["latency_ms"]
+            lines.append(
+                f"{call['verb']:<8} {call['kind']:<26} {call['calls']:>7} "
+                f"{call['not_found_rate'] * 100:>6.1f} {call['errors']:>6} "
+                f"{call['bytes'] / 1024:>9.1f} {latency['mean']:>8.1f} "
+                f"{latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['max']:>8.1f}"
+            )
+        unsized = sum(call["unsized_calls"] for call in report["calls"])
+        lines.append(
+            f"{report['total_calls']} API calls, {report['total_bytes'] / 1024:.1f} KiB "
+            + (f"({unsized} streamed call(s) not counted) " if unsized else "")
+            + f"in {report['elapsed_seconds']:.1f}s"
+        )
+        buckets = []
+        for bucket in report["latency_histogram_ms"]:
+            if bucket["count"]:
+                bound = (
+                    f"<={bucket['le']}"
+                    if bucket["le"] is not None
+                    else f">{LATENCY_BUCKETS_MS[-1]}"
+                )
+                buckets.append(f"{bound}ms: {bucket['count']}")
+        lines.append(f"Latency histogram: {'  '.join(buckets)}")
+        return "\n".join(lines)
+
+    def write_json(self, file_name):
+        """
+        Write the report to a JSON file.
+
+        Args:
+            file_name (str): The path of the file.
+        """
+        with open(file_name, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class ProfiledApi:
+    """
+    A proxy of an API instance that records every call made through it.
+    """
+
+    def __init__(self, api, profiler):
+        self._api = api
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if not callable(attribute) or name.startswith("_") or "_" not in name:
+            return attribute
+        profiler = self._profiler
+
+        # functools.wraps keeps the docstring, which watch.Watch reads to find
+        # the type of the objects it streams.
+        @functools.wraps(attribute)
+        def profiled(*args, **kwargs):
+            return profiler.call(attribute, name, args, kwargs)
+
+        return profiled
@@ -0,0 +1,57 @@
+"""
+This module fetches, concurrently, every Kubernetes object the extractors need
+for a deployment.
+"""
+
+import asyncio
+
+from .async_kubernetes_utils import (
+    read_horizontal_pod_autoscaler_for_deployment,
+    read_ingress_for_service,
+    read_secret,
+    read_service,
+)
+from .extractor import referenced_secret_names
+from .snapshot import (
+    HORIZONTAL_POD_AUTOSCALER,
+    INGRESS,
+    SECRET,
+    SERVICE,
+    InMemoryApis,
+    ResourceIndex,
+)
+
+
+async def fetch_deployment_objects(kube_apis, deployment, image_pull_secrets=True):
+    """
+    Reads the service, ingress, HPA and secrets of a deployment at once.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        deployment: The Kubernetes deployment object.
+        image_pull_secrets (bool, optional): Also read the imagePullSecrets, unless
+            their credentials were resolved already. Defaults to True.
+
+    Returns:
+        InMemoryApis: The fetched objects, ready to be passed to the extractors.
+    """
+    name = deployment.metadata.name
+    namespace = deployment.metadata.namespace
+    secret_names = referenced_secret_names(deployment, image_pull_secrets)
+
+    service, ingress, hpa, *secrets = await asyncio.gather(
+        read_service(kube_apis, name, namespace),
+        read_ingress_for_service(kube_apis, name, namespace),
+        read_horizontal_pod_autoscaler_for_deployment(kube_apis, name, namespace),
+        *(read_secret(kube_apis, secret_name, namespace) for secret_name in secret_names),
+    )
+
+    index = ResourceIndex()
+    fetched = [(SERVICE, service), (INGRESS, ingress), (HORIZONTAL_POD_AUTOSCALER, hpa)]
+    fetched += [(SECRET, secret) for secret in secrets]
+    for kind, obj in fetched:
+        if obj is not None:
+            index.add(kind, obj)
+    for kind in (SERVICE, INGRESS, HORIZONTAL_POD_AUTOSCALER, SECRET):
+        index.cover(kind, namespace)
+    return InMemoryApis(index)
@@ -0,0 +1,89 @@
+"""
+This module provides awaitable variants of the ``kubernetes_utils`` read functions.
+
+The Kubernetes client calls run on the event loop's executor, so every read
+shares the connection pool of the ``KubeApis`` they are given while many of
+them are in flight at once.
+"""
+
+import asyncio
+
+from . import kubernetes_utils
+
+
+async def _run_in_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+async def read_horizontal_pod_autoscaler_for_deployment(
+    kube_apis, deployment_name, namespace="default"
+):
+    """
+    Reads the HPA for a given deployment.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        deployment_name: The name of the deployment.
+        namespace: The namespace of the deployment.
+
+    Returns:
+        object: The HPA object or None if not found or an error occurs.
+    """
+    return await _run_in_executor(
+        kubernetes_utils.read_horizontal_pod_autoscaler_for_deployment,
+        kube_apis,
+        deployment_name,
+        namespace,
+    )
+
+
+async def read_ingress_for_service(kube_apis, service_name, namespace="default"):
+    """
+    Reads the ingress for a given service.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        service_name: The name of the service.
+        namespace: The namespace of the service.
+
+    Returns:
+        object: The ingress object or None if not found or an error occurs.
+    """
+    return await _run_in_executor(
+        kubernetes_utils.read_ingress_for_service, kube_apis, service_name, namespace
+    )
+
+
+async def read_service(kube_apis, service_name, namespace="default"):
+    """
+    Reads a service by name.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        service_name: The name of the service.
+        namespace: The namespace of the service.
+
+    Returns:
+        object: The service object or None if not found or an error occurs.
+    """
+    return await _run_in_executor(
+        kubernetes_utils.read_service, kube_apis, service_name, namespace
+    )
+
+
+async def read_secret(kube_apis, secret_name, namespace="default"):
+    """
+    Reads a secret by name.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        secret_name: The name of the secret.
+        namespace: The namespace of the secret.
+
+    Returns:
+        object: The secret object or None if not found or an error occurs.
+    """
+    return await _run_in_executor(
+        kubernetes_utils.read_secret, kube_apis, secret_name, namespace
+    )
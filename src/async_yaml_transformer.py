@@ -0,0 +1,29 @@
+"""
+    Transform Kubernetes deployments to Azure Container Apps (ACA) deployments on an event loop.
+"""
+from .async_extractor import fetch_deployment_objects
+from .yaml_transformer import YamlTransformer
+
+
+class AsyncYamlTransformer(YamlTransformer):
+    async def transform(self, kube_apis, deployment, pull_credentials=None):
+        """
+        Transform a Kubernetes deployment to an Azure Container Apps (ACA) deployment,
+        awaiting all the reads of the deployment at once.
+
+        Registries must be resolved beforehand with ``resolve_registries``, so no
+        prompt blocks the event loop.
+
+        Args:
+            kube_apis: KubeApis object for interacting with the Kubernetes API.
+            deployment: Kubernetes deployment object.
+            pull_credentials (DockerConfigCredentials, optional): The credentials of the
+                deployment's imagePullSecrets, from ``resolve_registries``. Read if not given.
+
+        Returns:
+            ContainerApp: ACA configuration based on the Kubernetes deployment.
+        """
+        deployment_objects = await fetch_deployment_objects(
+            kube_apis, deployment, image_pull_secrets=pull_credentials is None
+        )
+        return super().transform(deployment_objects, deployment, pull_credentials)
@@ -0,0 +1,237 @@
+"""
+This module writes the outputs of a run to a single file, or to stdout, as each
+app finishes, instead of one file per app.
+
+- ``yaml-stream``: a multi-document YAML stream, one ACA YAML document per app.
+- ``jsonl``: JSON Lines, one ``{"context", "namespace", "name", "config"}``
+  object per app.
+- ``tar.gz`` and ``zip``: an archive of the files a run would write to the
+  output folder (per-app files and ``deployment.sh``), by path relative to it.
+
+Bundles take the place of the OutputWriter of a run: archives store what it
+would write, streams only keep the app configurations.
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+
+from .serializers import get_json_serializer, get_yaml_serializer
+
+BUNDLE_FORMATS = ("yaml-stream", "jsonl", "tar.gz", "zip")
+
+BUNDLE_EXTENSIONS = {
+    "yaml-stream": "yaml",
+    "jsonl": "jsonl",
+    "tar.gz": "tar.gz",
+    "zip": "zip",
+}
+
+# The file name of a bundle in the output folder, without extension.
+BUNDLE_FILE_NAME = "aca"
+
+
+class Bundle:
+    """
+    A single-file output, shared by the namespaces and clusters of a run.
+    """
+
+    # Whether the bundle takes the app configurations, rather than their files.
+    streams_apps = False
+    unit = "file(s)"
+
+    def __init__(self, file, root, description):
+        """
+        Args:
+            file: A binary file handle, owned by the bundle.
+            root (str): The output folder the paths of the files are relative to.
+            description (str): Where the bundle is written, for the summary.
+        """
+        self.file = file
+        self.root = root
+        self.description = description
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def write(self, filename, content, executable=False):
+        """
+        Add an output file to the bundle. Streams ignore the files.
+
+        Args:
+            filename (str): The path the file would have in the output folder.
+            content (str): The content of the file.
+            executable (bool, optional): Whether the file is a script.
+
+        Returns:
+            str: The path of the file.
+        """
+        return filename
+
+    def add_app(self, context, namespace, name, aca_config):
+        """
+        Add the configuration of an app to a stream.
+
+        Args:
+            context (str): The kubeconfig context, or None.
+            namespace (str): The namespace of the app.
+            name (str): The name of the app.
+            aca_config (ContainerApp): The ACA configuration.
+
+        Returns:
+            list: The paths of the files written, none for a stream.
+        """
+        raise NotImplementedError
+
+    def keep(self, filename):
+        pass
+
+    def prune(self, namespace, directory, extension, keep=()):
+        pass
+
+    def entry_name(self, filename):
+        return os.path.relpath(filename, self.root).replace(os.sep, "/")
+
+    def close(self):
+        self.file.close()
+
+    def summary(self):
+        """
+        Get a summary of the bundle.
+
+        Returns:
+            str: The number of apps or files, and where they were written.
+        """
+        return f"Bundle: {self.count} {self.unit} written to {self.description}"
+
+
+class YamlStreamBundle(Bundle):
+    streams_apps = True
+    unit = "app(s)"
+
+    def __init__(self, file, root, description, serializer=None):
+        super().__init__(file, root, description)
+        self.serializer = serializer or get_yaml_serializer()
+
+    def add_app(self, context, namespace, name, aca_config):
+        label = "/".join(part for part in (context, namespace, name) if part)
+        document = self.serializer.dumps({"name": name, **aca_config.to_dict()})
+        data = f"--- # {label}\n{document}".encode("utf-8")
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()
+            self.count += 1
+        return []
+
+
+class JsonLinesBundle(Bundle):
+    streams_apps = True
+    unit = "app(s)"
+
+    def __init__(self, file, root, description, serializer=None):
+        super().__init__(file, root, description)
+        self.serializer = serializer or get_json_serializer()
+
+    def add_app(self, context, namespace, name, aca_config):
+        line = self.serializer.dumps(
+            {
+                "context": context,
+                "namespace": namespace,
+                "name": name,
+                "config": aca_config.to_dict(),
+            }
+        )
+        data = (line + "\n").encode("utf-8")
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()
+            self.count += 1
+        return []
+
+
+class TarBundle(Bundle):
+    def __init__(self, file, root, description):
+        import tarfile
+
+        super().__init__(file, root, description)
+        self.tarfile = tarfile
+        # The "|" mode streams the archive, so it can be written to a pipe.
+        self.archive = tarfile.open(fileobj=file, mode="w|gz")
+
+    def write(self, filename, content, executable=False):
+        data = content.encode("utf-8")
+        info = self.tarfile.TarInfo(self.entry_name(filename))
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o755 if executable else 0o644
+        with self.lock:
+            self.archive.addfile(info, io.BytesIO(data))
+            self.count += 1
+        return filename
+
+    def close(self):
+        self.archive.close()
+        super().close()
+
+
+class ZipBundle(Bundle):
+    def __init__(self, file, root, description):
+        import zipfile
+
+        super().__init__(file, root, description)
+        self.zipfile = zipfile
+        # ZipFile writes data descriptors on unseekable files, e.g. a pipe.
+        self.archive = zipfile.ZipFile(file, mode="w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, filename, content, executable=False):
+        info = self.zipfile.ZipInfo(
+            self.entry_name(filename), date_time=time.localtime()[:6]
+        )
+        info.compress_type = self.zipfile.ZIP_DEFLATED
+        info.external_attr = (0o100755 if executable else 0o100644) << 16
+        with self.lock:
+            self.archive.writestr(info, content.encode("utf-8"))
+            self.count += 1
+        return filename
+
+    def close(self):
+        self.archive.close()
+        super().close()
+
+
+def open_bundle(bundle_format, path, root, yaml_serializer=None, json_serializer=None):
+    """
+    Open a bundle.
+
+    Args:
+        bundle_format (str): One of BUNDLE_FORMATS.
+        path (str): The bundle file, "-" for stdout, or None for
+            ``aca.<extension>`` in the output folder.
+        root (str): The output folder, which the paths of archived files are relative to.
+        yaml_serializer (YamlSerializer, optional): The serializer of YAML streams.
+        json_serializer (JsonSerializer, optional): The serializer of JSON Lines.
+
+    Returns:
+        Bundle: The bundle, to close at the end of the run.
+    """
+    if path == "-":
+        sys.stdout.flush()
+        file = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+        description = "stdout"
+    else:
+        if path is None:
+            path = os.path.join(
+                root, f"{BUNDLE_FILE_NAME}.{BUNDLE_EXTENSIONS[bundle_format]}"
+            )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        file = open(path, "wb")
+        description = path
+
+    if bundle_format == "yaml-stream":
+        return YamlStreamBundle(file, root, description, yaml_serializer)
+    if bundle_format == "jsonl":
+        return JsonLinesBundle(file, root, description, json_serializer)
+    if bundle_format == "tar.gz":
+        return TarBundle(file, root, description)
+    return ZipBundle(file, root, description)
@@ -0,0 +1,266 @@
+"""
+This module keeps a persistent cache, in the output folder, of the deployments
+already migrated, so later runs only regenerate the apps whose Kubernetes
+objects changed.
+"""
+
+import hashlib
+import json
+import os
+
+from .extractor import referenced_secret_names
+from .kubernetes_utils import (
+    read_horizontal_pod_autoscaler_for_deployment,
+    read_ingress_for_service,
+    read_secret,
+    read_service,
+)
+
+CACHE_FILE_NAME = ".k8stoaca-cache.json"
+CACHE_FORMAT_VERSION = 3
+
+
+def content_hash(content):
+    """
+    Hash JSON-serializable content.
+
+    Args:
+        content: The content to hash.
+
+    Returns:
+        str: The SHA-256 hex digest of the content.
+    """
+    serialized = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def object_version(obj):
+    """
+    Get the version of a Kubernetes object.
+
+    Args:
+        obj: The Kubernetes object, or None if it does not exist.
+
+    Returns:
+        str or None: The resourceVersion, a content hash for objects without one
+        (e.g. loaded from manifests), or None if the object does not exist.
+    """
+    if obj is None:
+        return None
+    if obj.metadata.resource_version:
+        return obj.metadata.resource_version
+    return content_hash(obj.to_dict())
+
+
+def dependency_versions(kube_apis, deployment):
+    """
+    Collects the versions of a deployment and of the objects it is migrated from.
+
+    Args:
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
+        deployment: The Kubernetes deployment object.
+
+    Returns:
+        dict: The versions keyed by "<Kind>/<name>".
+    """
+    name = deployment.metadata.name
+    namespace = deployment.metadata.namespace
+
+    versions = {
+        f"Deployment/{name}": object_version(deployment),
+        f"Service/{name}": object_version(read_service(kube_apis, name, namespace)),
+        f"Ingress/{name}": object_version(
+            read_ingress_for_service(kube_apis, name, namespace)
+        ),
+        f"HorizontalPodAutoscaler/{name}": object_version(
+            read_horizontal_pod_autoscaler_for_deployment(kube_apis, name, namespace)
+        ),
+    }
+    for secret_name in referenced_secret_names(deployment):
+        versions[f"Secret/{secret_name}"] = object_version(
+            read_secret(kube_apis, secret_name, namespace)
+        )
+    return versions
+
+
+class DeploymentCache:
+    """
+    Maps each migrated deployment to the versions of its Kubernetes objects,
+    the hash of the ACA configuration produced from them and the files written.
+    """
+
+    def __init__(self, output_path, settings):
+        """
+        Loads the cache from the output folder.
+
+        The cache is discarded when it was written with different settings, e.g.
+        another output format or target environment.
+
+        Args:
+            output_path (str): The output folder.
+            settings (dict): The run settings the outputs depend on.
+        """
+        self.filename = os.path.join(output_path, CACHE_FILE_NAME)
+        self.settings = settings
+        self.entries = {}
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        try:
+            with open(self.filename, "r", encoding="utf-8") as file:
+                cached = json.load(file)
+        except (OSError, ValueError):
+            return
+        if (
+            cached.get("version") == CACHE_FORMAT_VERSION
+            and cached.get("settings") == settings
+        ):
+            self.entries = cached.get("entries", {})
+
+    @staticmethod
+    def key(deployment):
+        return f"{deployment.metadata.namespace}/{deployment.metadata.name}"
+
+    def is_fresh(self, deployment, versions):
+        """
+        Check whether the outputs of a deployment are up to date.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+            versions (dict): The current versions, from ``dependency_versions``.
+
+        Returns:
+            bool: True if nothing changed since the outputs were written.
+        """
+        entry = self.entries.get(self.key(deployment))
+        return (
+            entry is not None
+            and entry["versions"] == versions
+            and all(os.path.exists(file_name) for file_name in entry["files"])
+        )
+
+    def is_unchanged(self, deployment, aca_config):
+        """
+        Check whether a regenerated ACA configuration matches the one already written.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+            aca_config (ContainerApp): The regenerated ACA configuration.
+
+        Returns:
+            bool: True if the written outputs already hold this configuration.
+        """
+        entry = self.entries.get(self.key(deployment))
+        return (
+            entry is not None
+            and entry["config_hash"] == content_hash(aca_config.to_dict())
+            and all(os.path.exists(file_name) for file_name in entry["files"])
+        )
+
+    def files(self, deployment):
+        """
+        Get the output files recorded for a deployment.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+
+        Returns:
+            list: The output file paths.
+        """
+        return self.entries[self.key(deployment)]["files"]
+
+    def references(self, deployment):
+        """
+        Get the services a cached deployment depends on.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+
+        Returns:
+            list: The referenced service names.
+        """
+        return self.entries[self.key(deployment)]["references"]
+
+    def hit(self, deployment):
+        """
+        Record that a deployment was served from the cache.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+        """
+        self.seen.add(self.key(deployment))
+        self.hits += 1
+
+    def miss(self, deployment, versions, aca_config, files):
+        """
+        Record a regenerated deployment.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+            versions (dict): The versions the configuration was produced from.
+            aca_config (ContainerApp): The ACA configuration.
+            files (list): The output files holding the configuration.
+        """
+        key = self.key(deployment)
+        self.seen.add(key)
+        self.misses += 1
+        self.entries[key] = {
+            "versions": versions,
+            "config_hash": content_hash(aca_config.to_dict()),
+            "files": files,
+            "references": aca_config.references,
+        }
+
+    def discard(self, deployment):
+        """
+        Forget a deployment, e.g. after its migration failed.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+        """
+        key = self.key(deployment)
+        self.seen.add(key)
+        self.misses += 1
+        self.entries.pop(key, None)
+
+    def evict_unseen(self, namespace):
+        """
+        Forget the deployments of a namespace that were not part of this run.
+
+        Args:
+            namespace (str): The namespace that was fully listed.
+        """
+        for key in list(self.entries):
+            if key.startswith(f"{namespace}/") and key not in self.seen:
+                del self.entries[key]
+                self.evictions += 1
+
+    def save(self):
+        """
+        Write the cache to the output folder.
+        """
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        with open(self.filename, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": CACHE_FORMAT_VERSION,
+                    "settings": self.settings,
+                    "entries": self.entries,
+                },
+                file,
+                sort_keys=True,
+            )
+
+    def summary(self):
+        """
+        Get a summary of the cache activity of this run.
+
+        Returns:
+            str: The number of hits, misses and evictions.
+        """
+        return (
+            f"Cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.evictions} evictions"
+        )
@@ -0,0 +1,219 @@
+"""
+This module migrates several clusters in one run, from a run manifest mapping
+each kubeconfig context to its namespaces and target ACA environment.
+
+A run manifest is a YAML (or JSON) document such as::
+
+    clusters:
+      - context: weu-prod
+        namespaces: [frontend, backend]
+        aca_resource_group: rg-weu
+        aca_environment: aca-weu
+      - context: neu-prod
+        kubeconfig: ~/.kube/neu.yaml
+        namespace_selector: migrate=true
+        aca_resource_group: rg-neu
+        aca_environment: aca-neu
+        output_path: out/neu
+
+``all_namespaces: true`` selects every namespace of a cluster. Each cluster
+is written to ``output_path``, by default ``<outputpath>/<context>``.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+REPORT_FILE_NAME = "report.json"
+
+
+class ClusterPlan:
+    """
+    What to migrate from one kubeconfig context, and where to.
+    """
+
+    def __init__(
+        self,
+        context,
+        aca_resource_group,
+        aca_environment,
+        namespaces=None,
+        all_namespaces=False,
+        namespace_selector=None,
+        kubeconfig=None,
+        output_path=None,
+    ):
+        self.context = context
+        self.aca_resource_group = aca_resource_group
+        self.aca_environment = aca_environment
+        self.namespaces = namespaces or []
+        self.all_namespaces = all_namespaces
+        self.namespace_selector = namespace_selector
+        self.kubeconfig = kubeconfig
+        self.output_path = output_path
+
+
+def load_run_manifest(file_name, output_path="."):
+    """
+    Load the cluster plans of a run manifest.
+
+    Args:
+        file_name (str): The path of the run manifest.
+        output_path (str, optional): The folder the clusters without an
+            ``output_path`` are written to, one subfolder per context.
+
+    Returns:
+        list: The ClusterPlan of every cluster, in the manifest order.
+
+    Raises:
+        ValueError: If the manifest is invalid.
+    """
+    with open(file_name, "r", encoding="utf-8") as file:
+        document = yaml.safe_load(file) or {}
+    clusters = document.get("clusters") if isinstance(document, dict) else None
+    if not clusters or not isinstance(clusters, list):
+        raise ValueError(f"{file_name}: 'clusters' must be a non-empty list")
+
+    plans = []
+    contexts = set()
+    for position, cluster in enumerate(clusters, 1):
+        if not isinstance(cluster, dict):
+            raise ValueError(f"{file_name}: cluster #{position} must be a mapping")
+        missing = [
+            key
+            for key in ("context", "aca_resource_group", "aca_environment")
+            if not cluster.get(key)
+        ]
+        if missing:
+            raise ValueError(
+                f"{file_name}: cluster #{position} is missing {', '.join(missing)}"
+            )
+        namespaces = cluster.get("namespaces") or []
+        if isinstance(namespaces, str):
+            namespaces = namespaces.split(",")
+        if not (
+            namespaces
+            or cluster.get("all_namespaces")
+            or cluster.get("namespace_selector")
+        ):
+            raise ValueError(
+                f"{file_name}: cluster {cluster['context']} needs namespaces, "
+                "all_namespaces or namespace_selector"
+            )
+        if cluster["context"] in contexts:
+            raise ValueError(f"{file_name}: context {cluster['context']} is listed twice")
+        contexts.add(cluster["context"])
+        kubeconfig = cluster.get("kubeconfig")
+        plans.append(
+            ClusterPlan(
+                cluster["context"],
+                cluster["aca_resource_group"],
+                cluster["aca_environment"],
+                namespaces=namespaces,
+                all_namespaces=bool(cluster.get("all_namespaces")),
+                namespace_selector=cluster.get("namespace_selector"),
+                kubeconfig=os.path.expanduser(kubeconfig) if kubeconfig else None,
+                output_path=cluster.get("output_path")
+                or os.path.join(output_path, cluster["context"]),
+            )
+        )
+    return plans
+
+
+class ClusterReport:
+    """
+    The outcome of migrating a cluster.
+    """
+
+    def __init__(self, plan, output_path):
+        """
+        Args:
+            plan (ClusterPlan): The plan of the cluster.
+            output_path (str): The folder the cluster was migrated to.
+        """
+        self.plan = plan
+        self.output_path = output_path
+        self.namespaces = []
+        self.seconds = 0.0
+        self.error = None
+
+    @property
+    def apps(self):
+        return sum(len(report.apps) for report in self.namespaces)
+
+    @property
+    def failures(self):
+        return sum(len(report.failures) for report in self.namespaces) + sum(
+            1 for report in self.namespaces if report.error
+        )
+
+    def to_dict(self):
+        return {
+            "context": self.plan.context,
+            "aca_resource_group": self.plan.aca_resource_group,
+            "aca_environment": self.plan.aca_environment,
+            "output_path": self.output_path,
+            "apps": self.apps,
+            "failures": self.failures,
+            "seconds": round(self.seconds, 3),
+            "error": self.error,
+            "namespaces": [report.to_dict() for report in self.namespaces],
+        }
+
+
+def migrate_clusters(migrate, plans, workers=1):
+    """
+    Migrate clusters concurrently.
+
+    Args:
+        migrate: A function migrating a cluster from its ClusterPlan and filling
+            the given ClusterReport.
+        plans (list): The ClusterPlan of every cluster.
+        workers (int, optional): The number of clusters migrated at once. Defaults to 1.
+
+    Yields:
+        ClusterReport: One report per cluster, in the order of ``plans``. A
+            cluster whose migration raised has the error in its report.
+    """
+
+    def run(plan):
+        report = ClusterReport(plan, plan.output_path)
+        start = time.perf_counter()
+        try:
+            migrate(plan, report)
+        except Exception as e:
+            report.error = str(e)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        yield from executor.map(run, plans)
+
+
+def write_report(output_path, reports, seconds):
+    """
+    Write the merged report of a multi-cluster migration.
+
+    Args:
+        output_path (str): The top-level output folder.
+        reports (list): The ClusterReport of every cluster.
+        seconds (float): The duration of the whole run.
+
+    Returns:
+        str: The path of the report.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    merged = {
+        "clusters": [report.to_dict() for report in reports],
+        "apps": sum(report.apps for report in reports),
+        "failures": sum(report.failures for report in reports)
+        + sum(1 for report in reports if report.error),
+        "seconds": round(seconds, 3),
+    }
+    filename = os.path.join(output_path, REPORT_FILE_NAME)
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump(merged, file, indent=2)
+    return filename
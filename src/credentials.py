@@ -0,0 +1,153 @@
+"""
+    Registry credential providers.
+
+    Credentials are looked up, in order, in the deployment's imagePullSecrets,
+    a local docker config file and environment variables, so registries can be
+    resolved without prompting.
+"""
+import base64
+import hashlib
+import json
+import os
+import re
+
+from .kubernetes_utils import read_referenced_secret
+from .registries import normalize_server
+
+ENV_PREFIX = "K8STOACA_REGISTRY_"
+
+
+class CredentialProvider:
+    """
+    Base class of the registry credential providers.
+    """
+
+    def get(self, server):
+        """
+        Get the credentials of a registry.
+
+        Parameters:
+            server (str): The normalized server address of the registry.
+
+        Returns:
+            tuple or None: The (username, password) of the registry, or None if unknown.
+        """
+        return None
+
+
+class DockerConfigCredentials(CredentialProvider):
+    """
+    Credentials from a docker config (``config.json`` / ``.dockerconfigjson``) document.
+    """
+
+    def __init__(self, docker_config):
+        """
+        Parameters:
+            docker_config (dict): The docker config, either ``{"auths": {...}}`` or the
+                legacy ``.dockercfg`` map of servers.
+        """
+        self.credentials = {}
+        auths = docker_config.get("auths", docker_config)
+        for server, auth in auths.items():
+            if not isinstance(auth, dict):
+                continue
+            username = auth.get("username")
+            password = auth.get("password")
+            if auth.get("auth") and not (username and password):
+                decoded = base64.b64decode(auth["auth"]).decode("utf-8")
+                username, _, password = decoded.partition(":")
+            if username and password:
+                self.credentials.setdefault(normalize_server(server), (username, password))
+
+    @classmethod
+    def from_file(cls, file_name):
+        """
+        Load the credentials of a docker config file.
+
+        Parameters:
+            file_name (str): The path of the file.
+
+        Returns:
+            DockerConfigCredentials: The credentials of the file.
+        """
+        with open(file_name, "r", encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def get(self, server):
+        return self.credentials.get(server)
+
+
+class EnvironmentCredentials(CredentialProvider):
+    """
+    Credentials from ``K8STOACA_REGISTRY_<SERVER>_USERNAME`` and ``..._PASSWORD`` environment
+    variables, where ``<SERVER>`` is the server address in upper case with every other
+    character than letters and digits replaced by "_", e.g. ``MYACR_AZURECR_IO``.
+    """
+
+    def __init__(self, environ=None):
+        self.environ = os.environ if environ is None else environ
+
+    @staticmethod
+    def variable_prefix(server):
+        return ENV_PREFIX + re.sub(r"[^A-Z0-9]", "_", server.upper())
+
+    def get(self, server):
+        prefix = self.variable_prefix(server)
+        username = self.environ.get(f"{prefix}_USERNAME")
+        password = self.environ.get(f"{prefix}_PASSWORD")
+        if username and password:
+            return username, password
+        return None
+
+
+def credentials_fingerprint(file_name=None, environ=None):
+    """
+    Fingerprint the local credential sources, so outputs cached with other
+    registry credentials are regenerated.
+
+    Parameters:
+        file_name (str, optional): The docker config file given with --registry-credentials.
+        environ (dict, optional): The environment variables. Defaults to ``os.environ``.
+
+    Returns:
+        str: The SHA-256 hex digest of the file content and of the credential variables.
+    """
+    environ = os.environ if environ is None else environ
+    digest = hashlib.sha256()
+    if file_name:
+        with open(file_name, "rb") as file:
+            digest.update(file.read())
+    for name in sorted(environ):
+        if name.startswith(ENV_PREFIX):
+            digest.update(f"\0{name}={environ[name]}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def image_pull_secret_credentials(kube_apis, deployment):
+    """
+    Load the credentials of the imagePullSecrets of a deployment.
+
+    Parameters:
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
+        deployment: The Kubernetes deployment object.
+
+    Returns:
+        DockerConfigCredentials: The credentials of every pull secret.
+
+    Raises:
+        LookupError: If a pull secret is not found.
+    """
+    auths = {}
+    pull_secrets = deployment.spec.template.spec.image_pull_secrets or []
+    for pull_secret in pull_secrets:
+        secret = read_referenced_secret(
+            kube_apis, pull_secret.name, deployment.metadata.namespace
+        )
+        if not secret.data:
+            continue
+        for key in (".dockerconfigjson", ".dockercfg"):
+            if secret.data.get(key):
+                docker_config = json.loads(base64.b64decode(secret.data[key]))
+                for server, auth in docker_config.get("auths", docker_config).items():
+                    auths.setdefault(server, auth)
+    return DockerConfigCredentials({"auths": auths})
@@ -4,11 +4,24 @@ This module provides functions to extract information from a Kubernetes cluster
 and generate the necessary configurations for migrating to Azure Container Apps.
 """
 import base64
+
+from .aca_model import (
+    EnvVar,
+    Ingress,
+    Probe,
+    Scale,
+    Secret,
+    Volume,
+    VolumeMount,
+    VolumeSecret,
+)
 from .kubernetes_utils import (
     read_horizontal_pod_autoscaler_for_deployment,
     read_ingress_for_service,
+    read_referenced_secret,
     read_service,
 )
+from .rollout import service_references
 from .utils import (
     transform_string,
     parse_memory_string
@@ -20,11 +33,11 @@ def extract_scale(kube_apis, deployment):
     Extracts the scale (min and max replicas) of a deployment.
 
     Args:
-        kube_apis: Kubernetes API instances.
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
         deployment: The Kubernetes deployment object.
 
     Returns:
-        dict: A dictionary containing the min and max replicas.
+        Scale: The min and max replicas.
     """
     k8_min_replicas = deployment.spec.replicas
     k8_max_replicas = deployment.spec.replicas
@@ -36,7 +49,7 @@ def extract_scale(kube_apis, deployment):
         k8_min_replicas = hpa.spec.min_replicas
         k8_max_replicas = hpa.spec.max_replicas
 
-    return {"minReplicas": k8_min_replicas, "maxReplicas": k8_max_replicas}
+    return Scale(k8_min_replicas, k8_max_replicas)
 
 
 def extract_resources(container):
@@ -81,28 +94,29 @@ def extract_readiness_probes(container):
         container: The Kubernetes container object.
 
     Returns:
-        list: A list of readiness probe dictionaries.
+        list: A list of Probe objects.
     """
     k8_readiness_probe = container.readiness_probe
     aca_readiness_probes = []
 
     if k8_readiness_probe and k8_readiness_probe.http_get:
-        aca_readiness_probe = {
-            "type": "Readiness",
-            "httpGet": {
-                "host": k8_readiness_probe.http_get.host,
-                "path": k8_readiness_probe.http_get.path,
-                "port": find_container_port(
-                    container.ports, k8_readiness_probe.http_get.port
-                ),
-                "httpHeaders": k8_readiness_probe.http_get.http_headers,
-                "schema": k8_readiness_probe.http_get.scheme,
-            },
-            "tcpSocket": k8_readiness_probe.tcp_socket,
-            "periodSeconds": k8_readiness_probe.period_seconds,
-            "initialDelaySeconds": k8_readiness_probe.initial_delay_seconds,
-            "failureThreshold": k8_readiness_probe.failure_threshold,
-        }
+        http_get = k8_readiness_probe.http_get
+        tcp_socket = k8_readiness_probe.tcp_socket
+        aca_readiness_probe = Probe(
+            port=find_container_port(container.ports, http_get.port),
+            path=http_get.path,
+            host=http_get.host,
+            scheme=http_get.scheme,
+            http_headers=(
+                [header.to_dict() for header in http_get.http_headers]
+                if http_get.http_headers is not None
+                else None
+            ),
+            tcp_socket=tcp_socket.to_dict() if tcp_socket is not None else None,
+            period_seconds=k8_readiness_probe.period_seconds,
+            initial_delay_seconds=k8_readiness_probe.initial_delay_seconds,
+            failure_threshold=k8_readiness_probe.failure_threshold,
+        )
         aca_readiness_probes.append(aca_readiness_probe)
 
     return aca_readiness_probes
@@ -127,16 +141,45 @@ def find_container_port(ports, port_name):
     return None
 
 
+def resolve_target_port(deployment, target_port):
+    """
+    Resolves the target port of a service to a container port number, as ACA
+    only takes port numbers.
+
+    Args:
+        deployment: The Kubernetes deployment object.
+        target_port: The target port of the service, a number or a port name.
+
+    Returns:
+        int or str: The container port number, or the name if no container of
+            the deployment has a port of that name.
+    """
+    if not isinstance(target_port, str):
+        return target_port
+    if target_port.isdigit():
+        return int(target_port)
+    for container in deployment.spec.template.spec.containers:
+        port = find_container_port(container.ports or [], target_port)
+        if port is not None:
+            return port
+    print(
+        f"Target port {target_port} of the service of {deployment.metadata.name} "
+        "is not a container port"
+    )
+    return target_port
+
+
 def extract_volumes(kube_apis, deployment):
     """
     Extracts volumes from a deployment.
 
     Args:
-        kube_apis: Kubernetes API instances.
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
         deployment: The Kubernetes deployment object.
 
     Returns:
-        dict: A dictionary containing volumes and secrets.
+        tuple: The list of Volume objects and the list of Secret objects they mount.
+            Only secret volumes are migrated.
     """
     secrets = []
     volumes = []
@@ -145,28 +188,28 @@ def extract_volumes(kube_apis, deployment):
     if k8_volumes:
         for volume in k8_volumes:
             if volume.secret:
-                k8_secret = kube_apis.api_v1.read_namespaced_secret(
-                    volume.secret.secret_name, deployment.metadata.namespace
+                k8_secret = read_referenced_secret(
+                    kube_apis,
+                    volume.secret.secret_name,
+                    deployment.metadata.namespace,
+                    volume.secret.optional,
                 )
-                aca_volumes = {"name": volume.name, "storageType": "Secret"}
+                aca_volume = Volume(volume.name)
                 if k8_secret and k8_secret.data:
-                    aca_volumes_secrets = []
+                    aca_volume.secrets = []
                     for key, value in k8_secret.data.items():
-                        aca_volumes_secret = {
-                            "secretRef": transform_string(key),
-                            "path": key,
-                        }
-                        aca_volumes_secrets.append(aca_volumes_secret)
-
-                        aca_secrets = {
-                            "name": transform_string(key),
-                            "value": base64.b64decode(value).decode("utf-8"),
-                        }
-                        secrets.append(aca_secrets)
-                    aca_volumes["secrets"] = aca_volumes_secrets
-            volumes.append(aca_volumes)
-
-    return {"volumes": volumes, "secrets": secrets}
+                        aca_volume.secrets.append(
+                            VolumeSecret(transform_string(key), key)
+                        )
+                        secrets.append(
+                            Secret(
+                                transform_string(key),
+                                base64.b64decode(value).decode("utf-8"),
+                            )
+                        )
+                volumes.append(aca_volume)
+
+    return volumes, secrets
 
 def extract_mounts(container):
     """
@@ -176,18 +219,14 @@ def extract_mounts(container):
         container: Kubernetes container object.
 
     Returns:
-        list: List of volume mounts in ACA format, containing dictionaries with 'mountPath' and 'volumeName'.
+        list: List of VolumeMount objects.
     """
     aca_mounts = []
     k8_mounts = container.volume_mounts
     if k8_mounts:
         for k8_mount in k8_mounts:
-            aca_mount = {
-                "mountPath" : k8_mount.mount_path,
-                "volumeName": k8_mount.name
-            }
-            aca_mounts.append(aca_mount)
-        
+            aca_mounts.append(VolumeMount(k8_mount.name, k8_mount.mount_path))
+
     return aca_mounts
 
 def extract_ingress(kube_apis, deployment):
@@ -195,23 +234,20 @@ def extract_ingress(kube_apis, deployment):
     Extracts ingress information from a deployment.
 
     Args:
-        kube_apis: Kubernetes API instances.
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
         deployment: The Kubernetes deployment object.
 
     Returns:
-        dict: A dictionary containing ingress information.
+        Ingress: The ingress of the app, or None if the deployment has no service.
     """
     service = read_service(
         kube_apis, deployment.metadata.name, deployment.metadata.namespace
     )
     aca_ingress = None
     if service:
-        aca_ingress = {
-            "external": False,
-            "allowInsecure": False,
-            "targetPort": service.spec.ports[0].target_port,
-            "traffic": [{"weight": 100, "latestRevision": True}],
-        }
+        aca_ingress = Ingress(
+            resolve_target_port(deployment, service.spec.ports[0].target_port)
+        )
 
         ingress = read_ingress_for_service(
             kube_apis, service.metadata.name, deployment.metadata.namespace
@@ -219,6 +255,7 @@ def extract_ingress(kube_apis, deployment):
         if ingress:
             for tls in ingress.spec.tls:
                 print(f"CUSTOM_DOMAIN: required for {tls.hosts}")
+            serves_root = False
             for rule in ingress.spec.rules:
                 for path in rule.http.paths:
                     if (
@@ -226,10 +263,46 @@ def extract_ingress(kube_apis, deployment):
                         and path.backend.service.port.number
                         == service.spec.ports[0].port
                     ):
-                        aca_ingress["external"] = True
+                        aca_ingress.external = True
+                        serves_root = serves_root or (path.path or "/") == "/"
+                    else:
+                        aca_ingress.services.append(path.backend.service.name)
+            # The app serving the root of the ingress is the front end of the
+            # other backends: it is rolled out after them. The other apps do
+            # not depend on each other.
+            if not serves_root:
+                aca_ingress.services = []
+            aca_ingress.services = list(dict.fromkeys(aca_ingress.services))
     return aca_ingress
 
 
+def extract_references(deployment, ingress):
+    """
+    Extracts the services of its namespace a deployment depends on, from its
+    environment values and its ingress.
+
+    Args:
+        deployment: The Kubernetes deployment object.
+        ingress (Ingress): The ingress of the app, or None.
+
+    Returns:
+        list: The referenced service names, without duplicates and without the
+            app's own name.
+    """
+    namespace = deployment.metadata.namespace
+    references = []
+    for container in deployment.spec.template.spec.containers:
+        for env in container.env or []:
+            references += service_references(env.value, namespace)
+    if ingress:
+        references += ingress.services
+    return [
+        name
+        for name in dict.fromkeys(references)
+        if name != deployment.metadata.name
+    ]
+
+
 def extract_envs(container):
     """
     Extracts environment variables from a container.
@@ -238,15 +311,14 @@ def extract_envs(container):
         container: The Kubernetes container object.
 
     Returns:
-        list: A list of environment variable dictionaries.
+        list: A list of EnvVar objects.
     """
 
     k8_envs = container.env
     aca_envs = []
     if k8_envs:
         for k8_env in k8_envs:
-            aca_env = {"name": k8_env.name, "value": k8_env.value}
-            aca_envs.append(aca_env)
+            aca_envs.append(EnvVar(k8_env.name, k8_env.value))
     return aca_envs
 
 
@@ -255,58 +327,87 @@ def extract_env_from(kube_apis, container, namespace):
     Extracts environment variables from secrets.
 
     Args:
-        kube_apis: Kubernetes API instances.
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
         container: The Kubernetes container object.
         namespace: The namespace of the container.
 
     Returns:
-        list: A list of secret environment variable dictionaries.
+        list: A list of Secret objects, named after the secret keys.
     """
     k8_envs_from = container.env_from
     aca_secrets = []
     if k8_envs_from:
         for env_from in k8_envs_from:
             k8_secret_name = env_from.secret_ref.name
-            k8_secret = kube_apis.api_v1.read_namespaced_secret(
-                k8_secret_name, namespace
+            k8_secret = read_referenced_secret(
+                kube_apis, k8_secret_name, namespace, env_from.secret_ref.optional
             )
             if k8_secret and k8_secret.data:
                 for key, value in k8_secret.data.items():
-                    aca_secret = {
-                        "name": key,
-                        "value": base64.b64decode(value).decode("utf-8"),
-                    }
-                    aca_secrets.append(aca_secret)
+                    aca_secrets.append(
+                        Secret(key, base64.b64decode(value).decode("utf-8"))
+                    )
     return aca_secrets
 
 
+def referenced_secret_names(deployment, image_pull_secrets=True):
+    """
+    Lists the secrets a deployment reads through envFrom, secret volumes and
+    imagePullSecrets.
+
+    Args:
+        deployment: The Kubernetes deployment object.
+        image_pull_secrets (bool, optional): Include the imagePullSecrets. Defaults to True.
+
+    Returns:
+        list: The secret names, without duplicates, in the order they are referenced.
+    """
+    secret_names = []
+    pod_spec = deployment.spec.template.spec
+    for volume in pod_spec.volumes or []:
+        if volume.secret:
+            secret_names.append(volume.secret.secret_name)
+    for container in pod_spec.containers:
+        for env_from in container.env_from or []:
+            if env_from.secret_ref:
+                secret_names.append(env_from.secret_ref.name)
+    if image_pull_secrets:
+        for pull_secret in pod_spec.image_pull_secrets or []:
+            secret_names.append(pull_secret.name)
+    return list(dict.fromkeys(secret_names))
+
+
 def extract_secrets_ref_from_env_from(secrests):
     """
     Extracts secret references from environment variables.
 
     Args:
-        secrests: A list of secrets.
+        secrests: A list of Secret objects.
 
     Returns:
-        list: A list of secret reference dictionaries.
+        list: A list of EnvVar objects referencing the secrets.
     """
     aca_env_secrets_ref = []
     if secrests:
         for secret in secrests:
-            aca_env_secret_ref = {
-                "name": secret["name"],
-                "secretRef": transform_string(secret["name"]),
-            }
-            aca_env_secrets_ref.append(aca_env_secret_ref)
+            aca_env_secrets_ref.append(
+                EnvVar(secret.name, secret_ref=transform_string(secret.name))
+            )
 
     return aca_env_secrets_ref
 
 
 def normalize_secrets(secrets):
-    for secret in secrets:
-        secret['name'] = transform_string(secret['name'])
-    
-    return secrets
+    """
+    Rename secrets to valid ACA secret names.
+
+    Args:
+        secrets: A list of Secret objects.
+
+    Returns:
+        list: The renamed Secret objects.
+    """
+    return [Secret(transform_string(secret.name), secret.value) for secret in secrets]
 
 memory_mapping = {
     "0.5Gi": 512 * 1024 * 1024,
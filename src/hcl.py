@@ -0,0 +1,165 @@
+"""
+    A small HCL (Terraform) writer.
+
+    Configurations are built as a tree of blocks and attributes, then streamed
+    to a file handle in one pass, formatted the way ``terraform fmt`` does.
+"""
+import json
+
+INDENT = "  "
+
+
+class Expression:
+    """
+    A raw HCL expression, written without quoting (e.g. ``var.environment_id``).
+    """
+
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class Attribute:
+    """
+    An HCL attribute: ``name = value``.
+    """
+
+    __slots__ = ("name", "value")
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+
+class Block:
+    """
+    An HCL block: ``type "label" ... { body }``.
+    """
+
+    __slots__ = ("type", "labels", "body")
+
+    def __init__(self, block_type, *labels):
+        self.type = block_type
+        self.labels = labels
+        self.body = []
+
+    def attribute(self, name, value):
+        """
+        Add an attribute to the block, unless its value is None.
+
+        Args:
+            name (str): The attribute name.
+            value: The attribute value.
+
+        Returns:
+            Block: The block itself, so calls can be chained.
+        """
+        if value is not None:
+            self.body.append(Attribute(name, value))
+        return self
+
+    def block(self, block_type, *labels):
+        """
+        Add a nested block.
+
+        Args:
+            block_type (str): The block type.
+            *labels (str): The block labels.
+
+        Returns:
+            Block: The nested block.
+        """
+        nested = Block(block_type, *labels)
+        self.body.append(nested)
+        return nested
+
+
+def format_string(value):
+    """
+    Quote a string as an HCL string literal, escaping template sequences.
+
+    Args:
+        value (str): The string.
+
+    Returns:
+        str: The HCL string literal.
+    """
+    quoted = json.dumps(value, ensure_ascii=False)
+    return quoted.replace("${", "$${").replace("%{", "%%{")
+
+
+def format_value(value, indent=0):
+    """
+    Format a value as an HCL expression.
+
+    Args:
+        value: A string, number, boolean, None, list, dict or Expression.
+        indent (int, optional): The indentation level of the enclosing attribute.
+
+    Returns:
+        str: The HCL expression.
+    """
+    if isinstance(value, Expression):
+        return value.expression
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        return format_string(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(format_value(item, indent) for item in value) + "]"
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        inner = INDENT * (indent + 1)
+        width = max(len(format_string(str(key))) for key in value)
+        lines = [
+            f"{inner}{format_string(str(key)).ljust(width)} = {format_value(item, indent + 1)}"
+            for key, item in value.items()
+        ]
+        return "{\n" + "\n".join(lines) + "\n" + INDENT * indent + "}"
+    return format_string(str(value))
+
+
+def write(node, file, indent=0):
+    """
+    Stream a block to a file handle.
+
+    Consecutive attributes have their "=" aligned, and blocks are separated
+    from their neighbours by a blank line.
+
+    Args:
+        node (Block): The block to write.
+        file: A text file handle.
+        indent (int, optional): The indentation level. Defaults to 0.
+    """
+    prefix = INDENT * indent
+    labels = "".join(f" {format_string(label)}" for label in node.labels)
+    file.write(f"{prefix}{node.type}{labels} {{\n")
+
+    body = node.body
+    position = 0
+    while position < len(body):
+        if position > 0:
+            file.write("\n")
+        if isinstance(body[position], Block):
+            write(body[position], file, indent + 1)
+            position += 1
+            continue
+
+        end = position
+        while end < len(body) and isinstance(body[end], Attribute):
+            end += 1
+        width = max(len(attribute.name) for attribute in body[position:end])
+        for attribute in body[position:end]:
+            file.write(
+                f"{prefix}{INDENT}{attribute.name.ljust(width)} = "
+                f"{format_value(attribute.value, indent + 1)}\n"
+            )
+        position = end
+
+    file.write(f"{prefix}}}\n")
@@ -4,27 +4,134 @@ to various Kubernetes resources.
 
 """
 
-from kubernetes import client, config
+import functools
+
+# The kubernetes client is slow to import, so it is only imported once the API
+# clients are built, and the defaults below can be read at start-up for free.
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_QPS = 20
+DEFAULT_BURST = 40
+
+# Throttled (429) and transient server errors worth retrying. Every call the
+# tool makes is a read, so retrying is always safe.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def retry_policy(
+    retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR, limiter=None
+):
+    """
+    Build the retry policy of the API calls.
+
+    Connection errors, connection resets and RETRY_STATUSES responses are
+    retried with exponential backoff (``backoff_factor * 2 ** (retry - 1)``
+    seconds), or after the ``Retry-After`` delay of the response.
+
+    Args:
+        retries (int, optional): The maximum number of retries. Defaults to DEFAULT_RETRIES.
+        backoff_factor (float, optional): The backoff factor, in seconds.
+            Defaults to DEFAULT_BACKOFF_FACTOR.
+        limiter (RateLimiter, optional): The rate limiter retries wait for and
+            report throttled responses to.
+
+    Returns:
+        RateLimitedRetry: The urllib3 retry policy.
+    """
+    from .rate_limiter import RateLimitedRetry
+
+    retry = RateLimitedRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        # Give the last response back, so it surfaces as an ApiException.
+        raise_on_status=False,
+    )
+    retry.limiter = limiter
+    return retry
+
+
+def set_default_timeout(api_client, timeout):
+    """
+    Apply a timeout to the calls of an ApiClient that do not set ``_request_timeout``.
+
+    Args:
+        api_client (ApiClient): The client.
+        timeout (tuple): The (connect, read) timeouts, in seconds.
+    """
+    rest_client = api_client.rest_client
+    request = rest_client.request
+
+    @functools.wraps(request)
+    def request_with_timeout(*args, _request_timeout=None, **kwargs):
+        return request(*args, _request_timeout=_request_timeout or timeout, **kwargs)
+
+    rest_client.request = request_with_timeout
 
 
 class KubeApis:
     """
     A class to initialize and provide access to different Kubernetes API clients.
+
+    All the API instances share one ApiClient, and so one connection pool,
+    timeouts, retry policy and rate limiter.
     """
 
-    def __init__(self, kubeconfig_path=None, kubeconf_context=None):
+    def __init__(
+        self,
+        kubeconfig_path=None,
+        kubeconf_context=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        qps=DEFAULT_QPS,
+        burst=DEFAULT_BURST,
+    ):
         """
         Initializes the KubeApis class and loads the Kubernetes configuration.
 
         Args:
             kubeconfig_path (str, optional): The path to the kubeconfig file. Defaults to None.
             kubeconf_context (str, optional): The context to use from the kubeconfig file. Defaults to None.
+            pool_size (int, optional): The maximum number of connections kept open to the
+                API server. Defaults to DEFAULT_POOL_SIZE.
+            connect_timeout (float, optional): The connect timeout, in seconds.
+                Defaults to DEFAULT_CONNECT_TIMEOUT.
+            read_timeout (float, optional): The read timeout, in seconds.
+                Defaults to DEFAULT_READ_TIMEOUT.
+            retries (int, optional): The maximum number of retries of a call.
+                Defaults to DEFAULT_RETRIES.
+            qps (float, optional): The sustained rate of calls per second, or 0 for no
+                rate limit. Defaults to DEFAULT_QPS.
+            burst (int, optional): The number of calls that can be made at once above
+                ``qps``. Defaults to DEFAULT_BURST.
         """
-        self.load_kube_config(kubeconfig_path, kubeconf_context)
-        self.api_v1 = client.CoreV1Api()
-        self.api_instance = client.AppsV1Api()
-        self.api_network = client.NetworkingV1Api()
-        self.hpa_api_instance = client.AutoscalingV1Api()
+        from kubernetes import client
+
+        from .rate_limiter import RateLimiter, rate_limit
+
+        configuration = self.load_kube_config(kubeconfig_path, kubeconf_context)
+        configuration.connection_pool_maxsize = pool_size
+        self.rate_limiter = RateLimiter(qps, burst) if qps else None
+        configuration.retries = retry_policy(retries, limiter=self.rate_limiter)
+
+        self.api_client = client.ApiClient(configuration)
+        set_default_timeout(self.api_client, (connect_timeout, read_timeout))
+        if self.rate_limiter is not None:
+            rate_limit(self.api_client, self.rate_limiter)
+        self.api_v1 = client.CoreV1Api(self.api_client)
+        self.api_instance = client.AppsV1Api(self.api_client)
+        self.api_network = client.NetworkingV1Api(self.api_client)
+        self.hpa_api_instance = client.AutoscalingV1Api(self.api_client)
 
     def load_kube_config(self, kubeconfig_path=None, kubeconf_context=None):
         """
@@ -33,5 +140,16 @@ class KubeApis:
         Args:
             kubeconfig_path (str, optional): The path to the kubeconfig file. Defaults to None.
             kubeconf_context (str, optional): The context to use from the kubeconfig file. Defaults to None.
+
+        Returns:
+            Configuration: The client configuration of the context.
         """
-        config.load_kube_config(config_file=kubeconfig_path, context=kubeconf_context)
+        from kubernetes import client, config
+
+        configuration = client.Configuration()
+        config.load_kube_config(
+            config_file=kubeconfig_path,
+            context=kubeconf_context,
+            client_configuration=configuration,
+        )
+        return configuration
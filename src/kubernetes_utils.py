@@ -3,7 +3,38 @@ This module provides functions to interact with a Kubernetes cluster and extract
 necessary configurations for migrating to Azure Container Apps.
 """
 
-from kubernetes.client.rest import ApiException
+import json
+
+from .resource_view import ResourceView
+
+# ApiException is imported where it is caught, so that importing this module
+# for its constants does not import the (slow to load) kubernetes client.
+
+# Objects per page of paginated list calls, the default chunk size of kubectl.
+DEFAULT_PAGE_SIZE = 500
+
+
+def list_namespaces(kube_apis, label_selector=None):
+    """
+    Lists the namespaces of the cluster.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        label_selector (str, optional): Only list the namespaces matching this
+            label selector, e.g. ``team=payments``. Defaults to None.
+
+    Returns:
+        list: The namespace names, sorted, or an empty list if an error occurs.
+    """
+    from kubernetes.client.rest import ApiException
+
+    kwargs = {"label_selector": label_selector} if label_selector else {}
+    try:
+        api_response = kube_apis.api_v1.list_namespace(**kwargs)
+        return sorted(namespace.metadata.name for namespace in api_response.items)
+    except ApiException as e:
+        print(f"Error fetching namespaces: {e}")
+        return []
 
 
 def get_deployments(kube_apis, namespace):
@@ -17,6 +48,8 @@ def get_deployments(kube_apis, namespace):
     Returns:
         list: A list of deployment objects or an empty list if an error occurs.
     """
+    from kubernetes.client.rest import ApiException
+
     try:
         # List deployments in the namespace
         api_response = kube_apis.api_instance.list_namespaced_deployment(
@@ -28,6 +61,148 @@ def get_deployments(kube_apis, namespace):
         return []
 
 
+def list_objects(list_call, raw=False, **kwargs):
+    """
+    Calls a list API.
+
+    With ``raw``, the response is not deserialized into kubernetes client
+    models: its JSON is parsed and wrapped in ResourceView objects, which
+    expose the same attributes at a fraction of the cost.
+
+    Args:
+        list_call: The ``list_namespaced_*`` method to call.
+        raw (bool, optional): Skip the model deserialization. Defaults to False.
+        **kwargs: The arguments of the call.
+
+    Returns:
+        The list result, with ``items`` and ``metadata``.
+    """
+    if not raw:
+        return list_call(**kwargs)
+    response = list_call(_preload_content=False, **kwargs)
+    data = getattr(response, "data", None)
+    if data is None:
+        # In-memory APIs have no serialized form and return their objects as is.
+        return response
+    return ResourceView(json.loads(data))
+
+
+def selector_arguments(label_selector=None, field_selector=None):
+    """
+    Build the selector arguments of a list call.
+
+    Args:
+        label_selector (str, optional): The label selector.
+        field_selector (str, optional): The field selector.
+
+    Returns:
+        dict: The ``label_selector`` and ``field_selector`` arguments that are set.
+    """
+    kwargs = {}
+    if label_selector:
+        kwargs["label_selector"] = label_selector
+    if field_selector:
+        kwargs["field_selector"] = field_selector
+    return kwargs
+
+
+def iter_deployment_pages(
+    kube_apis,
+    namespace,
+    page_size=DEFAULT_PAGE_SIZE,
+    raw=False,
+    label_selector=None,
+    field_selector=None,
+):
+    """
+    Lists the deployments of a namespace page by page.
+
+    Only one page is held at a time. If the continue token expires during the
+    listing, the listing starts over and skips the deployments already returned.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespace: The Kubernetes namespace to list deployments from.
+        page_size (int, optional): The maximum number of deployments per page.
+            Defaults to DEFAULT_PAGE_SIZE.
+        raw (bool, optional): Return ResourceView objects instead of kubernetes
+            client models. Defaults to False.
+        label_selector (str, optional): Only list the deployments matching this
+            label selector. The API server does the filtering.
+        field_selector (str, optional): Only list the deployments matching this
+            field selector. The API server does the filtering.
+
+    Yields:
+        list: The deployment objects of each page.
+
+    Raises:
+        ApiException: If a page cannot be listed, so an incomplete listing is
+            not taken for the whole namespace.
+    """
+    from kubernetes.client.rest import ApiException
+
+    seen = set()
+    restarted = False
+    token = None
+    while True:
+        try:
+            api_response = list_objects(
+                kube_apis.api_instance.list_namespaced_deployment,
+                raw,
+                namespace=namespace,
+                limit=page_size,
+                _continue=token,
+                **selector_arguments(label_selector, field_selector),
+            )
+        except ApiException as e:
+            if e.status == 410 and token is not None and not restarted:
+                restarted = True
+                token = None
+                continue
+            raise
+        page = [
+            deployment
+            for deployment in api_response.items
+            if deployment.metadata.name not in seen
+        ]
+        seen.update(deployment.metadata.name for deployment in page)
+        if page:
+            yield page
+        token = api_response.metadata._continue
+        if not token:
+            return
+
+
+def iter_deployments(
+    kube_apis,
+    namespace,
+    page_size=DEFAULT_PAGE_SIZE,
+    raw=False,
+    label_selector=None,
+    field_selector=None,
+):
+    """
+    Lists the deployments of a namespace one by one, fetching them page by page.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespace: The Kubernetes namespace to list deployments from.
+        page_size (int, optional): The maximum number of deployments per page.
+            Defaults to DEFAULT_PAGE_SIZE.
+        raw (bool, optional): Return ResourceView objects instead of kubernetes
+            client models. Defaults to False.
+        label_selector (str, optional): Only list the deployments matching this label selector.
+        field_selector (str, optional): Only list the deployments matching this field selector.
+
+    Yields:
+        The deployment objects.
+    """
+    for page in iter_deployment_pages(
+        kube_apis, namespace, page_size, raw, label_selector, field_selector
+    ):
+        yield from page
+
+
 def parse_kubernetes_objects_from_deployments(kube_apis, deployments):
     """
     Parses Kubernetes objects from deployment YAMLs.
@@ -65,6 +240,8 @@ def read_horizontal_pod_autoscaler_for_deployment(
     Returns:
         object: The HPA object or None if not found or an error occurs.
     """
+    from kubernetes.client.rest import ApiException
+
     try:
         hpa = kube_apis.hpa_api_instance.read_namespaced_horizontal_pod_autoscaler(
             deployment_name, namespace
@@ -92,6 +269,8 @@ def read_ingress_for_service(kube_apis, service_name, namespace="default"):
     Returns:
         object: The ingress object or None if not found or an error occurs.
     """
+    from kubernetes.client.rest import ApiException
+
     try:
         ingress = kube_apis.api_network.read_namespaced_ingress(service_name, namespace)
         return ingress
@@ -117,6 +296,8 @@ def read_service(kube_apis, service_name, namespace="default"):
     Returns:
         object: The service object or None if not found or an error occurs.
     """
+    from kubernetes.client.rest import ApiException
+
     try:
         service = kube_apis.api_v1.read_namespaced_service(service_name, namespace)
         return service
@@ -126,3 +307,170 @@ def read_service(kube_apis, service_name, namespace="default"):
         else:
             print(f"Exception when calling CoreV1Api->read_namespaced_service: {e}")
             return None
+
+
+def read_secret(kube_apis, secret_name, namespace="default"):
+    """
+    Reads a secret by name.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        secret_name: The name of the secret.
+        namespace: The namespace of the secret.
+
+    Returns:
+        object: The secret object or None if not found or an error occurs.
+    """
+    from kubernetes.client.rest import ApiException
+
+    try:
+        secret = kube_apis.api_v1.read_namespaced_secret(secret_name, namespace)
+        return secret
+    except ApiException as e:
+        if e.status == 404:
+            return None
+        else:
+            print(f"Exception when calling CoreV1Api->read_namespaced_secret: {e}")
+            return None
+
+
+def read_referenced_secret(kube_apis, secret_name, namespace="default", optional=False):
+    """
+    Reads a secret a deployment references.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        secret_name: The name of the secret.
+        namespace: The namespace of the secret.
+        optional: Whether the reference is optional. Defaults to False.
+
+    Returns:
+        object: The secret object, or None if the optional secret is not found.
+
+    Raises:
+        LookupError: If the secret is not optional and not found or unreadable, so
+            the deployment is not migrated without it.
+    """
+    secret = read_secret(kube_apis, secret_name, namespace)
+    if secret is None and not optional:
+        raise LookupError(f"Secret {namespace}/{secret_name} not found")
+    return secret
+
+
+def _list_items(list_call, description, namespace, raw=False, **kwargs):
+    from kubernetes.client.rest import ApiException
+
+    try:
+        return list_objects(list_call, raw, namespace=namespace, **kwargs).items
+    except ApiException as e:
+        print(f"Error fetching {description}: {e}")
+        return None
+
+
+def list_services(
+    kube_apis, namespace, raw=False, label_selector=None, field_selector=None
+):
+    """
+    Lists the services in a namespace.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespace: The Kubernetes namespace to list services from.
+        raw (bool, optional): Return ResourceView objects. Defaults to False.
+        label_selector (str, optional): Only list the services matching this label selector.
+        field_selector (str, optional): Only list the services matching this field selector.
+
+    Returns:
+        list: A list of service objects or None if an error occurs.
+    """
+    return _list_items(
+        kube_apis.api_v1.list_namespaced_service,
+        "services",
+        namespace,
+        raw,
+        **selector_arguments(label_selector, field_selector),
+    )
+
+
+def list_ingresses(
+    kube_apis, namespace, raw=False, label_selector=None, field_selector=None
+):
+    """
+    Lists the ingresses in a namespace.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespace: The Kubernetes namespace to list ingresses from.
+        raw (bool, optional): Return ResourceView objects. Defaults to False.
+        label_selector (str, optional): Only list the ingresses matching this label selector.
+        field_selector (str, optional): Only list the ingresses matching this field selector.
+
+    Returns:
+        list: A list of ingress objects or None if an error occurs.
+    """
+    return _list_items(
+        kube_apis.api_network.list_namespaced_ingress,
+        "ingresses",
+        namespace,
+        raw,
+        **selector_arguments(label_selector, field_selector),
+    )
+
+
+def list_horizontal_pod_autoscalers(
+    kube_apis, namespace, raw=False, label_selector=None, field_selector=None
+):
+    """
+    Lists the HPAs in a namespace.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespace: The Kubernetes namespace to list HPAs from.
+        raw (bool, optional): Return ResourceView objects. Defaults to False.
+        label_selector (str, optional): Only list the HPAs matching this label selector.
+        field_selector (str, optional): Only list the HPAs matching this field selector.
+
+    Returns:
+        list: A list of HPA objects or None if an error occurs.
+    """
+    return _list_items(
+        kube_apis.hpa_api_instance.list_namespaced_horizontal_pod_autoscaler,
+        "horizontal pod autoscalers",
+        namespace,
+        raw,
+        **selector_arguments(label_selector, field_selector),
+    )
+
+
+def list_secrets(kube_apis, namespace, raw=False):
+    """
+    Lists the secrets in a namespace.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespace: The Kubernetes namespace to list secrets from.
+        raw (bool, optional): Return ResourceView objects. Defaults to False.
+
+    Returns:
+        list: A list of secret objects or None if an error occurs.
+    """
+    return _list_items(
+        kube_apis.api_v1.list_namespaced_secret, "secrets", namespace, raw
+    )
+
+
+def list_config_maps(kube_apis, namespace, raw=False):
+    """
+    Lists the config maps in a namespace.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespace: The Kubernetes namespace to list config maps from.
+        raw (bool, optional): Return ResourceView objects. Defaults to False.
+
+    Returns:
+        list: A list of config map objects or None if an error occurs.
+    """
+    return _list_items(
+        kube_apis.api_v1.list_namespaced_config_map, "config maps", namespace, raw
+    )
@@ -0,0 +1,199 @@
+"""
+This module evaluates Kubernetes label and field selectors on objects, so
+in-memory sources (manifests, snapshots) filter the way the API server does.
+
+Label selectors support equality (``app=web``, ``app==web``, ``app!=web``),
+set (``tier in (api,web)``, ``tier notin (db)``) and existence (``app``,
+``!app``) requirements. Field selectors support ``=``, ``==`` and ``!=`` on
+dotted field paths such as ``metadata.name``.
+"""
+
+import re
+from functools import lru_cache
+
+SET_REQUIREMENT = re.compile(r"^(?P<key>\S+)\s+(?P<operator>in|notin)\s+\((?P<values>.*)\)$")
+EQUALITY_REQUIREMENT = re.compile(r"^(?P<key>[^!=\s]+)\s*(?P<operator>==|!=|=)\s*(?P<value>.*)$")
+
+
+def split_requirements(selector):
+    """
+    Split a selector into its comma-separated requirements, keeping the commas
+    of ``in (...)`` value sets.
+
+    Args:
+        selector (str): The selector.
+
+    Returns:
+        list: The requirements, stripped.
+    """
+    requirements = []
+    depth = 0
+    current = ""
+    for character in selector:
+        if character == "(":
+            depth += 1
+        elif character == ")":
+            depth -= 1
+        if character == "," and depth == 0:
+            requirements.append(current.strip())
+            current = ""
+        else:
+            current += character
+    requirements.append(current.strip())
+    return [requirement for requirement in requirements if requirement]
+
+
+@lru_cache(maxsize=None)
+def parse_label_selector(selector):
+    """
+    Parse a label selector.
+
+    Args:
+        selector (str): The label selector.
+
+    Returns:
+        tuple: (key, operator, values) requirements, where operator is one of
+            "in", "notin", "exists" and "!exists".
+
+    Raises:
+        ValueError: If the selector is invalid.
+    """
+    requirements = []
+    for requirement in split_requirements(selector):
+        match = SET_REQUIREMENT.match(requirement)
+        if match:
+            values = frozenset(
+                value.strip() for value in match.group("values").split(",")
+            )
+            requirements.append((match.group("key"), match.group("operator"), values))
+            continue
+        match = EQUALITY_REQUIREMENT.match(requirement)
+        if match:
+            operator = "notin" if match.group("operator") == "!=" else "in"
+            values = frozenset({match.group("value").strip()})
+            requirements.append((match.group("key"), operator, values))
+            continue
+        if re.fullmatch(r"!?[^\s!=(),]+", requirement):
+            if requirement.startswith("!"):
+                requirements.append((requirement[1:], "!exists", None))
+            else:
+                requirements.append((requirement, "exists", None))
+            continue
+        raise ValueError(f"Invalid label selector requirement '{requirement}'")
+    return tuple(requirements)
+
+
+def matches_label_selector(labels, selector):
+    """
+    Check whether labels match a label selector.
+
+    Args:
+        labels (dict): The labels of an object, or None.
+        selector (str): The label selector.
+
+    Returns:
+        bool: True if every requirement of the selector is met.
+    """
+    labels = labels or {}
+    for key, operator, values in parse_label_selector(selector):
+        if operator == "exists" and key not in labels:
+            return False
+        if operator == "!exists" and key in labels:
+            return False
+        if operator == "in" and labels.get(key) not in values:
+            return False
+        if operator == "notin" and key in labels and labels[key] in values:
+            return False
+    return True
+
+
+def snake_case(name):
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def field_value(obj, path):
+    """
+    Read a dotted field path, e.g. ``metadata.name``, from an object.
+
+    Args:
+        obj: A kubernetes client model or a ResourceView.
+        path (str): The field path, with the API (camelCase) field names.
+
+    Returns:
+        str: The field value as a string, or "" if it is not set.
+    """
+    value = obj
+    for part in path.split("."):
+        value = getattr(value, snake_case(part), None)
+        if value is None:
+            return ""
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+@lru_cache(maxsize=None)
+def parse_field_selector(selector):
+    """
+    Parse a field selector.
+
+    Args:
+        selector (str): The field selector.
+
+    Returns:
+        tuple: (path, equal, value) requirements, where equal is False for ``!=``.
+
+    Raises:
+        ValueError: If the selector is invalid.
+    """
+    requirements = []
+    for requirement in split_requirements(selector):
+        match = EQUALITY_REQUIREMENT.match(requirement)
+        if not match:
+            raise ValueError(f"Invalid field selector requirement '{requirement}'")
+        requirements.append(
+            (
+                match.group("key"),
+                match.group("operator") != "!=",
+                match.group("value").strip(),
+            )
+        )
+    return tuple(requirements)
+
+
+def matches_field_selector(obj, selector):
+    """
+    Check whether an object matches a field selector.
+
+    Args:
+        obj: A kubernetes client model or a ResourceView.
+        selector (str): The field selector.
+
+    Returns:
+        bool: True if every requirement of the selector is met.
+    """
+    for path, equal, value in parse_field_selector(selector):
+        if (field_value(obj, path) == value) != equal:
+            return False
+    return True
+
+
+def matches_selectors(obj, label_selector=None, field_selector=None):
+    """
+    Check whether an object matches a label selector and a field selector.
+
+    Args:
+        obj: A kubernetes client model or a ResourceView.
+        label_selector (str, optional): The label selector.
+        field_selector (str, optional): The field selector.
+
+    Returns:
+        bool: True if the object matches both selectors.
+    """
+    if label_selector and not matches_label_selector(
+        obj.metadata.labels, label_selector
+    ):
+        return False
+    if field_selector and not matches_field_selector(obj, field_selector):
+        return False
+    return True
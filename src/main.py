@@ -6,21 +6,491 @@ format for ACA, outputting the result in YAML, JSON, or Terraform formats.
 
 """
 
+import io
 import os
 import argparse
+import sys
+import time
 
-from src import transformer_tf
-from src.kube_init import KubeApis
-from src.kubernetes_utils import get_deployments
+from src import transformer_arm, transformer_tf
+from src.kube_init import (
+    DEFAULT_BURST,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_QPS,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    KubeApis,
+)
+from src.kubernetes_utils import DEFAULT_PAGE_SIZE, iter_deployments
+from src.label_selectors import parse_field_selector, parse_label_selector
+from src.namespaces import (
+    NamespaceReport,
+    migrate_namespaces,
+    select_namespaces,
+    write_index,
+)
+from src.bundles import BUNDLE_FORMATS, open_bundle
+from src.cache import DeploymentCache
+from src.credentials import (
+    DockerConfigCredentials,
+    EnvironmentCredentials,
+    credentials_fingerprint,
+)
+from src.rollout import DEFAULT_ROLLOUT_PARALLELISM
+from src.output_writer import OutputWriter
+from src.pipeline import (
+    READS_PER_DEPLOYMENT,
+    transform_deployments,
+    transform_deployments_async,
+)
+from src.serializers import (
+    JSON_BACKENDS,
+    YAML_BACKENDS,
+    get_json_serializer,
+    get_yaml_serializer,
+)
+from src.snapshot import NamespaceSnapshot
 from src.utils import (
-    write_to_az_scripts_file,
+    update_az_scripts_file,
+    write_az_scripts_file,
     write_to_json_file,
+    write_to_parameters_file,
+    write_to_template_file,
     write_to_terraform_file,
+    write_to_terraform_module,
     write_to_yaml_file,
 )
 from src.yaml_transformer import YamlTransformer
 
 
+# The folder, and file extension, of the per-app outputs of each format.
+APP_OUTPUT_FOLDERS = {"yaml": "yaml", "json": "json", "terraform": "tf"}
+
+
+def write_aca_config(args, name, aca_config, writer=None):
+    """
+    Write the ACA configuration of a deployment in the requested output format.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        name (str): The name of the deployment.
+        aca_config (ContainerApp): The ACA configuration.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        list: The paths of the files.
+    """
+    files = []
+    if args.output == "yaml":
+        files.append(
+            write_to_yaml_file(
+                args.outputpath,
+                name,
+                aca_config.to_dict(),
+                get_yaml_serializer(args.yaml_backend),
+                writer,
+            )
+        )
+
+    if args.output == "terraform":
+        tf = transformer_tf.transform(name, aca_config)
+        files.append(write_to_terraform_file(args.outputpath, name, tf, writer))
+    if args.output == "json":
+        files.append(
+            write_to_json_file(
+                args.outputpath,
+                name,
+                aca_config.to_dict(),
+                get_json_serializer(args.json_backend),
+                writer,
+            )
+        )
+    return files
+
+
+# Outputs holding every app of a namespace, written once all the apps are
+# transformed.
+TEMPLATE_OUTPUTS = ("arm", "bicep", "terraform-module")
+
+
+def write_namespace_template(args, apps, writer=None):
+    """
+    Write the ARM template, Bicep file or Terraform module configuration
+    deploying every app of a namespace.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        apps (list): The ContainerApp of every migrated app.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        list: The paths of the files.
+    """
+    if args.output == "terraform-module":
+        return write_to_terraform_module(
+            args.outputpath,
+            transformer_tf.transform_module(
+                apps, args.aca_resource_group, args.aca_environment
+            ),
+            writer,
+        )
+    if args.output == "arm":
+        content = transformer_arm.dumps_arm(
+            apps, args.aca_resource_group, args.aca_environment
+        )
+    else:
+        output = io.StringIO()
+        transformer_arm.write_bicep(
+            apps, output, args.aca_resource_group, args.aca_environment
+        )
+        content = output.getvalue()
+    files = [
+        write_to_template_file(
+            args.outputpath, args.output, args.namespace, content, writer
+        )
+    ]
+
+    # The secrets are kept out of the template, in a parameters file beside it.
+    values = transformer_arm.secret_values(apps)
+    if values:
+        if args.output == "arm":
+            parameters = transformer_arm.dumps_arm_parameters(values)
+        else:
+            output = io.StringIO()
+            transformer_arm.write_bicep_parameters(
+                values, output, os.path.basename(files[0])
+            )
+            parameters = output.getvalue()
+        files.append(
+            write_to_parameters_file(
+                args.outputpath, args.output, args.namespace, parameters, writer
+            )
+        )
+        print(
+            f"The secrets of {args.namespace} are in {files[-1]}: "
+            "keep it out of source control"
+        )
+    return files
+
+
+def update_aca_config(args, name, aca_config):
+    """
+    Rewrite the outputs of a single deployment, including its deployment.sh line.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        name (str): The name of the deployment.
+        aca_config (ContainerApp): The ACA configuration.
+    """
+    write_aca_config(args, name, aca_config)
+    if args.output == "yaml":
+        update_az_scripts_file(
+            args.outputpath,
+            name,
+            args.aca_resource_group,
+            args.aca_environment,
+            references=aca_config.references,
+        )
+    print(f"Updated {name}")
+
+
+def delete_aca_config(args, name):
+    """
+    Remove the outputs of a deleted deployment, including its deployment.sh line.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        name (str): The name of the deployment.
+    """
+    for folder in APP_OUTPUT_FOLDERS.values():
+        filename = os.path.join(args.outputpath, folder, f"{name}.{folder}")
+        if os.path.exists(filename):
+            os.remove(filename)
+    if args.output == "yaml":
+        update_az_scripts_file(
+            args.outputpath,
+            name,
+            args.aca_resource_group,
+            args.aca_environment,
+            remove=True,
+        )
+    print(f"Removed {name}")
+
+
+def namespace_args(args, namespace):
+    """
+    Derive the arguments of one namespace of a multi-namespace run, which is
+    written to its own folder.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        namespace (str): The namespace.
+
+    Returns:
+        argparse.Namespace: A copy of the arguments for the namespace.
+    """
+    return argparse.Namespace(
+        **dict(
+            vars(args),
+            namespace=namespace,
+            outputpath=os.path.join(args.outputpath, namespace),
+        )
+    )
+
+
+def migrate_namespace(args, kube_apis, yaml_transformer, watcher=None, bundle=None):
+    """
+    Migrate the deployments of a namespace, writing their ACA configurations and
+    ``deployment.sh`` to ``args.outputpath``.
+
+    Only the files whose content changed are rewritten. After a full listing of
+    the namespace, the outputs of the deployments it no longer has are deleted.
+    If the listing fails, the apps listed until then are written, and the files
+    of the namespace as a whole are left as they are.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments, for the namespace.
+        kube_apis: Kubernetes API instances or a ManifestSource.
+        yaml_transformer (YamlTransformer): The transformer to use.
+        watcher (AppWatcher, optional): A watcher that already listed the namespace.
+        bundle (Bundle, optional): The single-file output of the run, instead of
+            the output folder.
+
+    Returns:
+        NamespaceReport: The apps written and the failures.
+    """
+    from kubernetes.client.rest import ApiException
+
+    report = NamespaceReport(args.namespace, args.outputpath)
+    deployments = []
+    source_apis = kube_apis
+    if watcher is not None:
+        deployments = watcher.deployments
+        source_apis = watcher.apis
+    elif args.deployment:
+        deployments.append(
+            kube_apis.api_instance.read_namespaced_deployment(
+                name=args.deployment, namespace=args.namespace
+            )
+        )
+    else:
+        deployments = iter_deployments(
+            kube_apis,
+            args.namespace,
+            args.page_size,
+            raw=args.raw_json,
+            label_selector=args.selector,
+            field_selector=args.field_selector,
+        )
+        if not args.no_prefetch and not args.manifests:
+            source_apis = NamespaceSnapshot(
+                kube_apis,
+                args.namespace,
+                raw=args.raw_json,
+                label_selector=args.selector,
+                field_selector=args.field_selector,
+            )
+
+    cache = None
+    if args.incremental:
+        cache = DeploymentCache(
+            args.outputpath,
+            {
+                "output": args.output,
+                "aca_resource_group": args.aca_resource_group,
+                "aca_environment": args.aca_environment,
+                "registry_credentials": credentials_fingerprint(
+                    args.registry_credentials
+                ),
+            },
+        )
+
+    if args.engine == "async":
+        results = transform_deployments_async(
+            source_apis,
+            yaml_transformer,
+            deployments,
+            concurrency=args.workers,
+            cache=cache,
+            batch_size=args.page_size,
+        )
+    else:
+        results = transform_deployments(
+            source_apis,
+            yaml_transformer,
+            deployments,
+            workers=args.workers,
+            cache=cache,
+            batch_size=args.page_size,
+        )
+
+    writer = bundle or OutputWriter()
+    # The services each migrated app references, for the order of deployment.sh.
+    references = {}
+    template_apps = []
+    # Whether every deployment was listed: otherwise the outputs of the namespace
+    # as a whole would drop the apps that were not, and their files be pruned.
+    listed = True
+    try:
+        for result in results:
+            if result.cached:
+                cache.hit(result.deployment)
+                report.cached += 1
+                references[result.name] = cache.references(result.deployment)
+                for file_name in cache.files(result.deployment):
+                    writer.keep(file_name)
+            elif result.error is None:
+                try:
+                    if cache is not None and cache.is_unchanged(
+                        result.deployment, result.aca_config
+                    ):
+                        files = cache.files(result.deployment)
+                        for file_name in files:
+                            writer.keep(file_name)
+                    elif bundle is not None and bundle.streams_apps:
+                        files = bundle.add_app(
+                            args.context, args.namespace, result.name, result.aca_config
+                        )
+                    else:
+                        files = write_aca_config(
+                            args, result.name, result.aca_config, writer
+                        )
+                    if cache is not None:
+                        cache.miss(
+                            result.deployment, result.versions, result.aca_config, files
+                        )
+                except OSError as e:
+                    result.error = e
+
+            if result.error is not None:
+                report.failures[result.name] = str(result.error)
+                print(f"Failed to migrate deployment {result.name}: {result.error}")
+                if cache is not None:
+                    cache.discard(result.deployment)
+                continue
+            report.apps.append(result.name)
+            if not result.cached:
+                references[result.name] = result.aca_config.references
+            if args.output in TEMPLATE_OUTPUTS:
+                template_apps.append(result.aca_config)
+    except ApiException as e:
+        listed = False
+        report.error = f"deployment listing failed ({e.status} {e.reason})"
+        print(f"Failed to list the deployments of {args.namespace}: {report.error}")
+
+    if listed and args.output in TEMPLATE_OUTPUTS:
+        try:
+            write_namespace_template(args, template_apps, writer)
+        except OSError as e:
+            report.error = str(e)
+            print(f"Failed to write the {args.output} output of {args.namespace}: {e}")
+    if listed:
+        write_az_scripts_file(
+            args.outputpath,
+            references if args.output == "yaml" else {},
+            args.aca_resource_group,
+            args.aca_environment,
+            args.rollout_parallelism,
+            writer,
+        )
+    # A partial listing says nothing about the apps it did not select.
+    full_listing = listed and not (
+        args.deployment or args.selector or args.field_selector
+    )
+    if full_listing and args.output in APP_OUTPUT_FOLDERS:
+        # The outputs of deleted deployments; those of failed ones are kept.
+        folder = APP_OUTPUT_FOLDERS[args.output]
+        writer.prune(
+            args.namespace,
+            os.path.join(args.outputpath, folder),
+            folder,
+            keep=report.failures,
+        )
+    if report.failures:
+        print(f"{len(report.failures)} deployment(s) could not be migrated")
+    if cache is not None:
+        if full_listing:
+            cache.evict_unseen(args.namespace)
+        cache.save()
+        print(cache.summary())
+    if bundle is None:
+        print(writer.summary())
+    return report
+
+
+def build_kube_apis(args, kubeconfig_path, context, namespace_workers=1):
+    """
+    Create the Kubernetes API clients of a kubeconfig context.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        kubeconfig_path (str): The path to the kubeconfig file, or None for the default.
+        context (str): The kubeconfig context, or None for the current one.
+        namespace_workers (int, optional): The number of namespaces migrated at once
+            with these clients, to size the connection pool. Defaults to 1.
+
+    Returns:
+        KubeApis: The API clients.
+    """
+    return KubeApis(
+        kubeconfig_path=kubeconfig_path,
+        kubeconf_context=context,
+        pool_size=args.pool_size
+        or max(
+            DEFAULT_POOL_SIZE,
+            args.workers * READS_PER_DEPLOYMENT * namespace_workers,
+        ),
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        retries=args.retries,
+        qps=args.qps,
+        burst=args.burst,
+    )
+
+
+def migrate_selected_namespaces(
+    args, kube_apis, yaml_transformer, namespaces, bundle=None
+):
+    """
+    Migrate namespaces concurrently, each to its own folder of ``args.outputpath``,
+    and write the index of the run.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        kube_apis: Kubernetes API instances or a ManifestSource.
+        yaml_transformer (YamlTransformer): The transformer to use.
+        namespaces (list): The namespace names.
+        bundle (Bundle, optional): The single-file output of the run.
+
+    Returns:
+        list: The NamespaceReport of every namespace.
+    """
+    reports = []
+    for report in migrate_namespaces(
+        lambda namespace: migrate_namespace(
+            namespace_args(args, namespace),
+            kube_apis,
+            yaml_transformer,
+            bundle=bundle,
+        ),
+        namespaces,
+        args.namespace_workers,
+    ):
+        reports.append(report)
+        context = f"{args.context}/" if args.run_manifest else ""
+        print(
+            f"Namespace {context}{report.namespace}: {len(report.apps)} app(s), "
+            f"{len(report.failures)} failure(s) in {report.seconds:.1f}s"
+            + (f" ({report.error})" if report.error else "")
+        )
+    # The scripts of the namespaces are in the bundle, if any.
+    index = write_index(
+        args.outputpath, reports, scripts=args.output == "yaml" and bundle is None
+    )
+    print(f"Index of {len(reports)} namespace(s) written to {index}")
+    return reports
+
 
 def main():
     """
@@ -39,9 +509,59 @@ def main():
     parser.add_argument(
         "--namespace",
         type=str,
-        required=True,
+        required=False,
         help="Namespace name",
     )
+    parser.add_argument(
+        "--namespaces",
+        type=str,
+        required=False,
+        help="Comma-separated namespace names, each migrated to its own folder",
+    )
+    parser.add_argument(
+        "--all-namespaces",
+        action="store_true",
+        help="Migrate every namespace of the cluster, each to its own folder",
+    )
+    parser.add_argument(
+        "--namespace-selector",
+        type=str,
+        required=False,
+        help="Migrate the namespaces matching this label selector (e.g. team=payments), each to its own folder",
+    )
+    parser.add_argument(
+        "--selector",
+        "-l",
+        type=str,
+        required=False,
+        help="Only migrate the deployments matching this label selector (e.g. app=web,tier!=db)",
+    )
+    parser.add_argument(
+        "--field-selector",
+        type=str,
+        required=False,
+        help="Only migrate the deployments matching this field selector (e.g. metadata.name=web)",
+    )
+    parser.add_argument(
+        "--run-manifest",
+        type=str,
+        required=False,
+        help="YAML file mapping kubeconfig contexts to their namespaces, resource group and ACA environment, to migrate several clusters in one run",
+    )
+    parser.add_argument(
+        "--cluster-workers",
+        type=int,
+        required=False,
+        default=4,
+        help="Number of clusters of --run-manifest migrated concurrently",
+    )
+    parser.add_argument(
+        "--namespace-workers",
+        type=int,
+        required=False,
+        default=4,
+        help="Number of namespaces migrated concurrently",
+    )
     parser.add_argument(
         "--deployment", type=str, required=False, help="Deployment name"
     )
@@ -59,7 +579,8 @@ def main():
         type=str,
         required=False,
         default="yaml",
-        help="Output file for ACA configuration",
+        choices=["yaml", "json", "terraform", *TEMPLATE_OUTPUTS],
+        help="Output format. 'arm', 'bicep' and 'terraform-module' write one configuration per namespace",
     )
     parser.add_argument(
         "--outputpath",
@@ -68,57 +589,382 @@ def main():
         default=os.getcwd(),
         help="Output file for ACA configuration",
     )
-   
+    parser.add_argument(
+        "--yaml-backend",
+        type=str,
+        required=False,
+        default="auto",
+        choices=YAML_BACKENDS,
+        help="YAML serializer. 'auto' uses libyaml when available",
+    )
+    parser.add_argument(
+        "--json-backend",
+        type=str,
+        required=False,
+        default="json",
+        choices=JSON_BACKENDS,
+        help="JSON serializer. orjson and ujson must be installed separately",
+    )
+    parser.add_argument(
+        "--registry-credentials",
+        type=str,
+        required=False,
+        help="Docker config file (config.json format) with registry credentials",
+    )
+    parser.add_argument(
+        "--non-interactive",
+        action="store_true",
+        help="Never ask for registry credentials; registries without known credentials are anonymous",
+    )
+    parser.add_argument(
+        "--no-prefetch",
+        action="store_true",
+        help="Read services, ingresses, HPAs and secrets one by one instead of listing the namespace up front",
+    )
+    parser.add_argument(
+        "--bundle",
+        type=str,
+        required=False,
+        choices=BUNDLE_FORMATS,
+        help="Write the run to a single file, as each app finishes: a multi-document YAML stream, JSON Lines, or a tar.gz or zip archive of the output folder",
+    )
+    parser.add_argument(
+        "--bundle-path",
+        type=str,
+        required=False,
+        help="File of --bundle, '-' for stdout. Defaults to aca.<extension> in --outputpath",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only regenerate the apps whose Kubernetes objects changed since the last run into the output folder",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and regenerate the apps affected by each change in the namespace",
+    )
+    parser.add_argument(
+        "--manifests",
+        type=str,
+        nargs="+",
+        required=False,
+        help="Manifest files or folders (YAML, JSON, kubectl get -o yaml dumps) to migrate instead of a live cluster",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        required=False,
+        default=1,
+        help="Number of deployments transformed concurrently",
+    )
+    parser.add_argument(
+        "--rollout-parallelism",
+        type=int,
+        required=False,
+        default=DEFAULT_ROLLOUT_PARALLELISM,
+        help="Default number of container apps deployment.sh creates at once; the PARALLELISM environment variable overrides it",
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        required=False,
+        default="threads",
+        choices=["threads", "async"],
+        help="Execution engine. 'async' awaits all the reads of a deployment at once, with --workers deployments in flight",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        required=False,
+        default=DEFAULT_PAGE_SIZE,
+        help="Number of deployments listed, transformed and written at a time",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        required=False,
+        help=f"Maximum number of connections to the API server. Default: the larger of {DEFAULT_POOL_SIZE} and {READS_PER_DEPLOYMENT} per worker",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        required=False,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help="Connect timeout of the API calls, in seconds",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        required=False,
+        default=DEFAULT_READ_TIMEOUT,
+        help="Read timeout of the API calls, in seconds",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        required=False,
+        default=DEFAULT_RETRIES,
+        help="Retries of an API call on throttling (429), server errors (5xx) and connection errors, with exponential backoff",
+    )
+    parser.add_argument(
+        "--qps",
+        type=float,
+        required=False,
+        default=DEFAULT_QPS,
+        help="Maximum sustained rate of API calls per second (0 for no limit). The rate is lowered while the API server throttles or queues the calls",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        required=False,
+        default=DEFAULT_BURST,
+        help="Number of API calls that can be made at once above --qps",
+    )
+    parser.add_argument(
+        "--raw-json",
+        action="store_true",
+        help="Parse list responses as raw JSON instead of kubernetes client models (faster on large namespaces)",
+    )
+    parser.add_argument(
+        "--profile-api",
+        action="store_true",
+        help="Print the count, size, 404 rate and latency of the Kubernetes API calls at the end of the run",
+    )
+    parser.add_argument(
+        "--profile-api-json",
+        type=str,
+        required=False,
+        help="Write the Kubernetes API call report to this JSON file (implies --profile-api)",
+    )
+
     args = parser.parse_args()
+    try:
+        get_yaml_serializer(args.yaml_backend)
+        get_json_serializer(args.json_backend)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.page_size < 1:
+        parser.error("--page-size must be at least 1")
+    if args.output in TEMPLATE_OUTPUTS and (args.incremental or args.watch):
+        parser.error(f"--incremental and --watch cannot be combined with --output {args.output}")
+    if args.bundle_path and not args.bundle:
+        parser.error("--bundle-path needs --bundle")
+    if args.bundle and (
+        args.output in TEMPLATE_OUTPUTS or args.incremental or args.watch
+    ):
+        parser.error(
+            "--bundle cannot be combined with --incremental, --watch or "
+            f"--output {', '.join(TEMPLATE_OUTPUTS)}"
+        )
+    if args.rollout_parallelism < 1:
+        parser.error("--rollout-parallelism must be at least 1")
+    multi_namespace = bool(
+        args.namespaces or args.all_namespaces or args.namespace_selector
+    )
+    if args.run_manifest:
+        if multi_namespace or args.namespace or args.context or args.manifests:
+            parser.error(
+                "--run-manifest cannot be combined with --namespace(s), --all-namespaces, "
+                "--namespace-selector, --context or --manifests"
+            )
+        if args.deployment or args.watch:
+            parser.error("--deployment and --watch need a single --namespace")
+    elif multi_namespace == bool(args.namespace):
+        parser.error(
+            "Give either --namespace, or --namespaces, --all-namespaces or --namespace-selector"
+        )
+    if multi_namespace and (args.deployment or args.watch):
+        parser.error("--deployment and --watch need a single --namespace")
+    if args.manifests and args.namespace_selector:
+        parser.error("--namespace-selector cannot be combined with --manifests")
+    if args.watch and (args.manifests or args.deployment or args.engine == "async"):
+        parser.error("--watch cannot be combined with --manifests, --deployment or --engine async")
+    if (args.selector or args.field_selector) and (args.deployment or args.watch):
+        parser.error("--selector and --field-selector cannot be combined with --deployment or --watch")
+    try:
+        if args.selector:
+            parse_label_selector(args.selector)
+        if args.field_selector:
+            parse_field_selector(args.field_selector)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # The modules below are only needed by some runs, and the slowest to import
+    # (PyYAML, the kubernetes client): import them when a run needs them.
+    plans = None
+    if args.run_manifest:
+        import yaml
+
+        from src.clusters import load_run_manifest, migrate_clusters, write_report
+
+        try:
+            plans = load_run_manifest(args.run_manifest, args.outputpath)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            parser.error(str(e))
+
+    profiler = None
+    if args.profile_api or args.profile_api_json:
+        from src.api_profiler import ApiProfiler
 
-    kube_apis = KubeApis(kubeconfig_path=args.kubeconfig, kubeconf_context=args.context)
+        profiler = ApiProfiler()
+
+    # Every KubeApis created by the run, to report their throttling at the end.
+    clients = []
+
+    bundle = None
+    if args.bundle:
+        try:
+            bundle = open_bundle(
+                args.bundle,
+                args.bundle_path,
+                args.outputpath,
+                yaml_serializer=get_yaml_serializer(args.yaml_backend)
+                if args.bundle == "yaml-stream"
+                else None,
+                json_serializer=get_json_serializer(args.json_backend),
+            )
+        except OSError as e:
+            parser.error(str(e))
+        if args.bundle_path == "-":
+            # stdout carries the bundle: the progress messages go to stderr.
+            sys.stdout = sys.stderr
+
+    def connect(kubeconfig_path, context, namespace_workers=1):
+        kube_apis = build_kube_apis(args, kubeconfig_path, context, namespace_workers)
+        if profiler is not None:
+            profiler.instrument(kube_apis)
+        clients.append(kube_apis)
+        return kube_apis
 
     try:
 
-        yaml_transformer = YamlTransformer()
-         
-        deployments = []
-        if args.deployment:
-            deployments.append(
-                kube_apis.api_instance.read_namespaced_deployment(
-                    name=args.deployment, namespace=args.namespace
-                )
+        credential_providers = []
+        if args.registry_credentials:
+            credential_providers.append(
+                DockerConfigCredentials.from_file(args.registry_credentials)
             )
-        else:
-            deployments = get_deployments(kube_apis, args.namespace)
-
-        filename = os.path.join(args.outputpath, "yaml", "deployment.sh")
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "w", encoding="utf-8") as file:
-            file.write("#!/bin/bash\n")
-
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        for deployment in deployments:
-            aca_config = yaml_transformer.transform(kube_apis, deployment)
-            if args.output == "yaml":
-                write_to_yaml_file(
-                    args.outputpath, deployment.metadata.name, aca_config
+        credential_providers.append(EnvironmentCredentials())
+
+        transformer_class = YamlTransformer
+        if args.engine == "async":
+            from src.async_yaml_transformer import AsyncYamlTransformer
+
+            transformer_class = AsyncYamlTransformer
+        yaml_transformer = transformer_class(
+            credential_providers=credential_providers,
+            interactive=not args.non_interactive,
+        )
+
+        if plans is not None:
+
+            def migrate_cluster(plan, report):
+                kube_apis = connect(
+                    plan.kubeconfig or args.kubeconfig,
+                    plan.context,
+                    args.namespace_workers,
                 )
-                write_to_az_scripts_file(
-                    args.outputpath,
-                    deployment.metadata.name,
-                    args.aca_resource_group,
-                    args.aca_environment,
+                cluster_args = argparse.Namespace(
+                    **dict(
+                        vars(args),
+                        context=plan.context,
+                        aca_resource_group=plan.aca_resource_group,
+                        aca_environment=plan.aca_environment,
+                        outputpath=report.output_path,
+                    )
+                )
+                namespaces = select_namespaces(
+                    kube_apis,
+                    plan.namespaces,
+                    plan.all_namespaces,
+                    plan.namespace_selector,
+                )
+                report.namespaces = migrate_selected_namespaces(
+                    cluster_args, kube_apis, yaml_transformer, namespaces, bundle
                 )
 
-            if args.output == "terraform":
-                tf = transformer_tf.transform(deployment.metadata.name, aca_config)
-                write_to_terraform_file(args.outputpath, deployment.metadata.name, tf)
-            if args.output == "json":
-                write_to_json_file(
-                    args.outputpath, deployment.metadata.name, aca_config
+            start = time.perf_counter()
+            reports = list(migrate_clusters(migrate_cluster, plans, args.cluster_workers))
+            for report in reports:
+                print(
+                    f"Cluster {report.plan.context}: {report.apps} app(s), "
+                    f"{report.failures} failure(s) in {report.seconds:.1f}s"
+                    + (f" ({report.error})" if report.error else "")
                 )
+            merged = write_report(
+                args.outputpath, reports, time.perf_counter() - start
+            )
+            print(f"Report of {len(reports)} cluster(s) written to {merged}")
+            print(f"ACA configuration has been written to {args.output}")
+            return
 
+        if args.manifests:
+            from src.manifests import ManifestSource
+
+            kube_apis = ManifestSource(
+                args.manifests, default_namespace=args.namespace or "default"
+            )
+            if profiler is not None:
+                profiler.instrument(kube_apis)
+        else:
+            kube_apis = connect(
+                args.kubeconfig,
+                args.context,
+                args.namespace_workers if multi_namespace else 1,
+            )
+
+        watcher = None
+        if args.watch:
+            from src.watcher import AppWatcher
+
+            watcher = AppWatcher(
+                kube_apis,
+                args.namespace,
+                yaml_transformer,
+                on_update=lambda name, aca_config: update_aca_config(
+                    args, name, aca_config
+                ),
+                on_delete=lambda name: delete_aca_config(args, name),
+            )
+            watcher.list()
+
+        if multi_namespace:
+            namespaces = select_namespaces(
+                kube_apis,
+                args.namespaces.split(",") if args.namespaces else None,
+                args.all_namespaces,
+                args.namespace_selector,
+            )
+            migrate_selected_namespaces(
+                args, kube_apis, yaml_transformer, namespaces, bundle
+            )
+        else:
+            migrate_namespace(args, kube_apis, yaml_transformer, watcher, bundle)
         print(f"ACA configuration has been written to {args.output}")
 
+        if watcher is not None:
+            print(f"Watching namespace {args.namespace} for changes")
+            try:
+                watcher.run()
+            except KeyboardInterrupt:
+                pass
+
     except Exception as e:
         print(e)
-
+    finally:
+        if bundle is not None:
+            bundle.close()
+            print(bundle.summary())
+        for kube_apis in clients:
+            rate_limiter = kube_apis.rate_limiter
+            if rate_limiter is not None and (
+                rate_limiter.throttled or rate_limiter.queued
+            ):
+                print(rate_limiter.summary())
+        if profiler is not None:
+            print(profiler.summary())
+            if args.profile_api_json:
+                profiler.write_json(args.profile_api_json)
 
 if __name__ == "__main__":
     main()
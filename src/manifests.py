@@ -0,0 +1,138 @@
+"""
+This module loads Kubernetes objects from manifest files, such as a GitOps
+repository or ``kubectl get -o yaml`` dumps, and serves them through the
+same interface as ``KubeApis``, so migrations can run without cluster access.
+"""
+
+import base64
+import json
+import os
+
+import yaml
+
+from .resource_view import ResourceView
+from .snapshot import (
+    CONFIG_MAP,
+    DEPLOYMENT,
+    HORIZONTAL_POD_AUTOSCALER,
+    INGRESS,
+    SECRET,
+    SERVICE,
+    InMemoryApis,
+    ResourceIndex,
+)
+
+MANIFEST_EXTENSIONS = (".yaml", ".yml", ".json")
+
+INDEXED_KINDS = frozenset(
+    {CONFIG_MAP, DEPLOYMENT, HORIZONTAL_POD_AUTOSCALER, INGRESS, SECRET, SERVICE}
+)
+
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def find_manifest_files(path):
+    """
+    Find the manifest files under a path.
+
+    Args:
+        path (str): A manifest file or a directory of manifest files.
+
+    Returns:
+        list: The manifest file paths, in a stable order.
+    """
+    if not os.path.isdir(path):
+        return [path]
+
+    manifest_files = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.endswith(MANIFEST_EXTENSIONS):
+                manifest_files.append(os.path.join(root, file_name))
+    return manifest_files
+
+
+def load_documents(file_name):
+    """
+    Stream the Kubernetes objects of a manifest file.
+
+    Multi-document YAML files and ``List`` objects are flattened.
+
+    Args:
+        file_name (str): The path of the manifest file.
+
+    Yields:
+        dict: Each Kubernetes object in the file.
+    """
+    with open(file_name, "r", encoding="utf-8") as file:
+        if file_name.endswith(".json"):
+            documents = [json.load(file)]
+        else:
+            documents = yaml.load_all(file, Loader=YamlLoader)
+
+        for document in documents:
+            if not isinstance(document, dict):
+                continue
+            if document.get("kind", "").endswith("List") and "items" in document:
+                yield from document["items"] or []
+            else:
+                yield document
+
+
+def normalize_secret(document):
+    """
+    Fold a secret's ``stringData`` into base64 encoded ``data``, as the API server does.
+
+    Args:
+        document (dict): The raw secret object.
+    """
+    string_data = document.pop("stringData", None)
+    if string_data:
+        data = document.setdefault("data", {}) or {}
+        for key, value in string_data.items():
+            data[key] = base64.b64encode(str(value).encode("utf-8")).decode("ascii")
+        document["data"] = data
+
+
+class ManifestSource(InMemoryApis):
+    """
+    Serves Deployments, Services, Ingresses, HPAs, Secrets and ConfigMaps read
+    from manifest files.
+    """
+
+    def __init__(self, paths, default_namespace="default"):
+        """
+        Loads and indexes the manifests.
+
+        Args:
+            paths (list): Manifest files or directories of manifest files.
+            default_namespace (str, optional): The namespace of objects that do not set one.
+                Defaults to "default".
+        """
+        super().__init__(ResourceIndex())
+        for kind in INDEXED_KINDS:
+            self.index.cover(kind)
+
+        for path in paths:
+            for file_name in find_manifest_files(path):
+                for document in load_documents(file_name):
+                    self.add(document, default_namespace)
+
+    def add(self, document, default_namespace="default"):
+        """
+        Index a raw Kubernetes object, ignoring kinds the migration does not use.
+
+        Args:
+            document (dict): The raw Kubernetes object.
+            default_namespace (str, optional): The namespace to use if the object does not set one.
+        """
+        kind = document.get("kind")
+        if kind not in INDEXED_KINDS:
+            return
+
+        metadata = document.setdefault("metadata", {})
+        metadata.setdefault("namespace", default_namespace)
+        if kind == SECRET:
+            normalize_secret(document)
+        self.index.add(kind, ResourceView(document))
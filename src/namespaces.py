@@ -0,0 +1,151 @@
+"""
+This module migrates several namespaces in one run: it selects the
+namespaces, migrates them concurrently with shared API clients, and writes a
+top-level index of the per-namespace outputs.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .kubernetes_utils import list_namespaces
+from .output_writer import OutputWriter
+
+INDEX_FILE_NAME = "index.json"
+
+
+def select_namespaces(
+    kube_apis, namespaces=None, all_namespaces=False, label_selector=None
+):
+    """
+    Select the namespaces to migrate.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        namespaces (list, optional): Namespace names.
+        all_namespaces (bool, optional): Every namespace of the cluster. Defaults to False.
+        label_selector (str, optional): The namespaces matching this label selector.
+
+    Returns:
+        list: The namespace names, without duplicates, in the given order
+            followed by the listed namespaces in name order.
+    """
+    selected = list(dict.fromkeys(namespaces or []))
+    if all_namespaces or label_selector:
+        for namespace in list_namespaces(kube_apis, label_selector):
+            if namespace not in selected:
+                selected.append(namespace)
+    return selected
+
+
+class NamespaceReport:
+    """
+    The outcome of migrating a namespace.
+    """
+
+    def __init__(self, namespace, output_path):
+        """
+        Args:
+            namespace (str): The namespace.
+            output_path (str): The folder the namespace was migrated to.
+        """
+        self.namespace = namespace
+        self.output_path = output_path
+        self.apps = []
+        self.failures = {}
+        self.cached = 0
+        self.seconds = 0.0
+        self.error = None
+
+    def to_dict(self, timings=True):
+        """
+        Get the report as a dictionary.
+
+        Args:
+            timings (bool, optional): Include the duration of the migration, which
+                changes on every run. Defaults to True.
+
+        Returns:
+            dict: The report, JSON serializable.
+        """
+        document = {
+            "namespace": self.namespace,
+            "output_path": self.output_path,
+            "apps": self.apps,
+            "failures": self.failures,
+            "cached": self.cached,
+            "seconds": round(self.seconds, 3),
+            "error": self.error,
+        }
+        if not timings:
+            del document["seconds"]
+        return document
+
+
+def migrate_namespaces(migrate, namespaces, workers=1):
+    """
+    Migrate namespaces concurrently.
+
+    Args:
+        migrate: A function migrating a namespace and returning its NamespaceReport.
+        namespaces (list): The namespace names.
+        workers (int, optional): The number of namespaces migrated at once. Defaults to 1.
+
+    Yields:
+        NamespaceReport: One report per namespace, in the order of ``namespaces``.
+            A namespace whose migration raised has the error in its report.
+    """
+
+    def run(namespace):
+        start = time.perf_counter()
+        try:
+            report = migrate(namespace)
+        except Exception as e:
+            report = NamespaceReport(namespace, None)
+            report.error = str(e)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        yield from executor.map(run, namespaces)
+
+
+def write_index(output_path, reports, scripts=False, writer=None):
+    """
+    Write the index of a multi-namespace migration, and with ``scripts`` a
+    top-level ``deployment.sh`` running the script of every namespace.
+
+    The index leaves out the timings, so it only changes with the outputs.
+
+    Args:
+        output_path (str): The top-level output folder.
+        reports (list): The NamespaceReport of every namespace.
+        scripts (bool, optional): Write the top-level script. Defaults to False.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        str: The path of the index.
+    """
+    writer = writer or OutputWriter()
+    index = {
+        "namespaces": [report.to_dict(timings=False) for report in reports],
+        "apps": sum(len(report.apps) for report in reports),
+        "failures": sum(len(report.failures) for report in reports),
+    }
+    filename = writer.write(
+        os.path.join(output_path, INDEX_FILE_NAME), json.dumps(index, indent=2) + "\n"
+    )
+
+    if scripts:
+        lines = ["#!/bin/bash\n"]
+        for report in reports:
+            if report.output_path and report.apps:
+                folder = os.path.relpath(
+                    os.path.join(report.output_path, "yaml"), output_path
+                )
+                lines.append(f'(cd "{folder}" && bash deployment.sh)\n')
+        writer.write(
+            os.path.join(output_path, "deployment.sh"), "".join(lines), executable=True
+        )
+    return filename
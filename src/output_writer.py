@@ -0,0 +1,211 @@
+"""
+This module writes the output files of a run only when their content changed,
+so unchanged files keep their modification time and downstream jobs (GitOps
+pipelines, file watchers) see no change.
+
+Files are rendered to memory, compared with what is on disk, and replaced
+atomically, through a temporary file renamed over the old one, so a reader
+never sees a partly written file.
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+# The files a namespace wrote to an output folder, so that a run only prunes the
+# files of its own namespace, and not those of others sharing the folder.
+OUTPUTS_FILE_NAME = ".k8stoaca-{namespace}-outputs.json"
+
+
+def default_mode(executable=False):
+    """
+    Get the permissions of new files under the current umask.
+
+    Args:
+        executable (bool, optional): Whether the file is a script. Defaults to False.
+
+    Returns:
+        int: The permission bits.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return (0o777 if executable else 0o666) & ~umask
+
+
+class OutputWriter:
+    """
+    Writes the output files of a run, skipping the unchanged ones, and counts
+    the files written, unchanged and deleted.
+    """
+
+    def __init__(self):
+        self.directories = set()
+        # Every file written or found unchanged by this run.
+        self.outputs = set()
+        self.written = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.lock = threading.Lock()
+
+    def ensure_directory(self, directory):
+        """
+        Create a directory, once per run.
+
+        Args:
+            directory (str): The directory path.
+        """
+        if directory in self.directories:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            self.directories.add(directory)
+
+    @staticmethod
+    def is_current(filename, data):
+        """
+        Check whether a file already holds the given content.
+
+        Args:
+            filename (str): The file path.
+            data (bytes): The content.
+
+        Returns:
+            bool: True if the file exists with this content.
+        """
+        try:
+            if os.path.getsize(filename) != len(data):
+                return False
+            with open(filename, "rb") as file:
+                return file.read() == data
+        except OSError:
+            return False
+
+    def write(self, filename, content, executable=False):
+        """
+        Write a file if its content changed, atomically.
+
+        Args:
+            filename (str): The file path.
+            content (str): The content of the file.
+            executable (bool, optional): Make a new file executable. Defaults to False.
+
+        Returns:
+            str: The path of the file.
+        """
+        data = content.encode("utf-8")
+        directory = os.path.dirname(filename) or "."
+        self.ensure_directory(directory)
+        if self.is_current(filename, data):
+            with self.lock:
+                self.outputs.add(os.path.abspath(filename))
+                self.unchanged += 1
+            return filename
+
+        try:
+            mode = os.stat(filename).st_mode & 0o777
+        except OSError:
+            mode = default_mode(executable)
+        descriptor, temporary = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(filename)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.chmod(temporary, mode)
+            os.replace(temporary, filename)
+        except BaseException:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+        with self.lock:
+            self.outputs.add(os.path.abspath(filename))
+            self.written += 1
+        return filename
+
+    def keep(self, filename):
+        """
+        Record a file left as is without rendering it, e.g. served from the cache.
+
+        Args:
+            filename (str): The file path.
+        """
+        with self.lock:
+            self.outputs.add(os.path.abspath(filename))
+            self.unchanged += 1
+
+    def delete(self, filename):
+        """
+        Delete a file, if it exists.
+
+        Args:
+            filename (str): The file path.
+
+        Returns:
+            bool: True if the file was deleted.
+        """
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            return False
+        with self.lock:
+            self.outputs.discard(os.path.abspath(filename))
+            self.deleted += 1
+        return True
+
+    def prune(self, namespace, directory, extension, keep=()):
+        """
+        Delete the files of a namespace in a directory this run did not write,
+        e.g. the outputs of deployments that no longer exist, and record the files
+        it wrote for the next run. Only the files recorded by earlier runs of the
+        namespace are deleted.
+
+        Args:
+            namespace (str): The namespace the run listed in full.
+            directory (str): The directory.
+            extension (str): Only the files with this extension are deleted.
+            keep (iterable, optional): Names, without extension, of files to keep.
+        """
+        manifest = os.path.join(
+            directory, OUTPUTS_FILE_NAME.format(namespace=namespace)
+        )
+        try:
+            with open(manifest, "r", encoding="utf-8") as file:
+                recorded = json.load(file)["files"]
+        except (OSError, ValueError, KeyError, TypeError):
+            recorded = []
+
+        directory = os.path.abspath(directory)
+        keep = {f"{name}.{extension}" for name in keep}
+        files = set()
+        for name in recorded:
+            path = os.path.join(directory, name)
+            if os.path.basename(name) != name or not name.endswith(f".{extension}"):
+                continue
+            if name in keep and os.path.exists(path):
+                files.add(name)
+            elif path not in self.outputs:
+                self.delete(path)
+        for path in list(self.outputs):
+            name = os.path.basename(path)
+            if (
+                os.path.dirname(path) == directory
+                and name.endswith(f".{extension}")
+                and not name.startswith(".")
+            ):
+                files.add(name)
+        self.write(manifest, json.dumps({"files": sorted(files)}, indent=2) + "\n")
+
+    def summary(self):
+        """
+        Get a summary of the files of this run.
+
+        Returns:
+            str: The number of files written, unchanged and deleted.
+        """
+        return (
+            f"Output: {self.written} written, {self.unchanged} unchanged, "
+            f"{self.deleted} deleted"
+        )
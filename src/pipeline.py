@@ -0,0 +1,246 @@
+"""
+This module runs the deployment transformations, either one after another,
+concurrently on a thread pool or on an event loop, and hands the results back
+in deployment order.
+"""
+
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import dependency_versions
+
+# asyncio, slow to import, is only imported by the async engine.
+
+# Reads a deployment can have in flight at once: service, ingress, HPA and secrets.
+READS_PER_DEPLOYMENT = 4
+
+
+class TransformResult:
+    """
+    The outcome of transforming a single deployment.
+    """
+
+    def __init__(
+        self, deployment, aca_config=None, error=None, cached=False, versions=None
+    ):
+        """
+        Initializes the TransformResult.
+
+        Args:
+            deployment: The Kubernetes deployment object.
+            aca_config (ContainerApp, optional): The ACA configuration, when the transformation succeeded.
+            error (Exception, optional): The error raised, when the transformation failed.
+            cached (bool, optional): True if the outputs are up to date and the deployment was skipped.
+            versions (dict, optional): The versions of the objects the deployment was migrated from,
+                when a cache is used.
+        """
+        self.deployment = deployment
+        self.aca_config = aca_config
+        self.error = error
+        self.cached = cached
+        self.versions = versions
+
+    @property
+    def name(self):
+        return self.deployment.metadata.name
+
+
+def batches(deployments, batch_size=None):
+    """
+    Split deployments into lists of at most ``batch_size`` deployments.
+
+    Args:
+        deployments (iterable): The Kubernetes deployment objects.
+        batch_size (int, optional): The batch size. Defaults to None, for a single batch.
+
+    Yields:
+        list: The batches, in order.
+    """
+    if not batch_size:
+        batch = list(deployments)
+        if batch:
+            yield batch
+        return
+    iterator = iter(deployments)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def batch_credentials(pull_credentials, deployment):
+    """
+    Get the credentials of the imagePullSecrets of a deployment, resolved with
+    the other deployments of its batch.
+
+    Args:
+        pull_credentials (dict): The credentials, by (namespace, name), or None.
+        deployment: The Kubernetes deployment object.
+
+    Returns:
+        DockerConfigCredentials: The credentials, or None to read them.
+    """
+    if not pull_credentials:
+        return None
+    return pull_credentials.get(
+        (deployment.metadata.namespace, deployment.metadata.name)
+    )
+
+
+def transform_deployment(
+    kube_apis, yaml_transformer, deployment, cache=None, pull_credentials=None
+):
+    """
+    Transforms a deployment, capturing any error instead of raising it.
+
+    Args:
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
+        yaml_transformer (YamlTransformer): The transformer to use.
+        deployment: The Kubernetes deployment object.
+        cache (DeploymentCache, optional): Skips the deployment if its outputs are up to date.
+        pull_credentials (dict, optional): The credentials of the imagePullSecrets of
+            the deployments of the batch, from ``resolve_registries``.
+
+    Returns:
+        TransformResult: The result of the transformation.
+    """
+    try:
+        versions = None
+        if cache is not None:
+            versions = dependency_versions(kube_apis, deployment)
+            if cache.is_fresh(deployment, versions):
+                return TransformResult(deployment, cached=True, versions=versions)
+        return TransformResult(
+            deployment,
+            aca_config=yaml_transformer.transform(
+                kube_apis, deployment, batch_credentials(pull_credentials, deployment)
+            ),
+            versions=versions,
+        )
+    except Exception as e:
+        return TransformResult(deployment, error=e)
+
+
+def transform_deployments(
+    kube_apis, yaml_transformer, deployments, workers=1, cache=None, batch_size=None
+):
+    """
+    Transforms deployments, concurrently when more than one worker is requested.
+
+    Deployments are read from ``deployments`` one batch at a time, so a
+    generator of deployments is never held in memory at once. Registry
+    credentials are resolved for every deployment of a batch before its
+    transformations start, so prompts are asked in deployment order and never
+    interleave.
+
+    Args:
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
+        yaml_transformer (YamlTransformer): The transformer to use.
+        deployments (iterable): The Kubernetes deployment objects.
+        workers (int, optional): The number of worker threads. Defaults to 1.
+        cache (DeploymentCache, optional): Skips the deployments whose outputs are up to date.
+        batch_size (int, optional): The number of deployments read at once. Defaults to None,
+            for all of them.
+
+    Yields:
+        TransformResult: One result per deployment, in the order of ``deployments``.
+    """
+    if workers <= 1:
+        for batch in batches(deployments, batch_size):
+            credentials = yaml_transformer.resolve_registries(batch, kube_apis)
+            for deployment in batch:
+                yield transform_deployment(
+                    kube_apis, yaml_transformer, deployment, cache, credentials
+                )
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in batches(deployments, batch_size):
+            credentials = yaml_transformer.resolve_registries(batch, kube_apis)
+            yield from executor.map(
+                lambda deployment: transform_deployment(
+                    kube_apis, yaml_transformer, deployment, cache, credentials
+                ),
+                batch,
+            )
+
+
+async def _transform_deployments_async(
+    kube_apis, async_yaml_transformer, deployments, concurrency, cache, credentials
+):
+    import asyncio
+
+    from .async_extractor import fetch_deployment_objects
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        ThreadPoolExecutor(max_workers=concurrency * READS_PER_DEPLOYMENT)
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def transform(deployment):
+        async with semaphore:
+            try:
+                deployment_apis = kube_apis
+                versions = None
+                if cache is not None:
+                    deployment_apis = await fetch_deployment_objects(
+                        kube_apis, deployment
+                    )
+                    versions = dependency_versions(deployment_apis, deployment)
+                    if cache.is_fresh(deployment, versions):
+                        return TransformResult(
+                            deployment, cached=True, versions=versions
+                        )
+                aca_config = await async_yaml_transformer.transform(
+                    deployment_apis,
+                    deployment,
+                    batch_credentials(credentials, deployment),
+                )
+                return TransformResult(
+                    deployment, aca_config=aca_config, versions=versions
+                )
+            except Exception as e:
+                return TransformResult(deployment, error=e)
+
+    return await asyncio.gather(*(transform(deployment) for deployment in deployments))
+
+
+def transform_deployments_async(
+    kube_apis,
+    async_yaml_transformer,
+    deployments,
+    concurrency=1,
+    cache=None,
+    batch_size=None,
+):
+    """
+    Transforms deployments on an event loop, with up to ``concurrency`` deployments in flight.
+
+    Args:
+        kube_apis: Kubernetes API instances or a NamespaceSnapshot.
+        async_yaml_transformer (AsyncYamlTransformer): The transformer to use.
+        deployments (iterable): The Kubernetes deployment objects.
+        concurrency (int, optional): The number of deployments in flight. Defaults to 1.
+        cache (DeploymentCache, optional): Skips the deployments whose outputs are up to date.
+        batch_size (int, optional): The number of deployments read at once. Defaults to None,
+            for all of them.
+
+    Yields:
+        TransformResult: One result per deployment, in the order of ``deployments``.
+    """
+    import asyncio
+
+    for batch in batches(deployments, batch_size):
+        credentials = async_yaml_transformer.resolve_registries(batch, kube_apis)
+        yield from asyncio.run(
+            _transform_deployments_async(
+                kube_apis,
+                async_yaml_transformer,
+                batch,
+                max(concurrency, 1),
+                cache,
+                credentials,
+            )
+        )
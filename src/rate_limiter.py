@@ -0,0 +1,267 @@
+"""
+This module provides the client-side rate limiter of the Kubernetes API calls:
+a token bucket (QPS plus burst, like client-go) that slows down when the API
+server pushes back.
+
+The server pushes back by answering 429, with a ``Retry-After`` delay, when
+API Priority and Fairness (APF) rejects a request, and by answering slowly
+when APF queues it. The limiter pauses every call for the ``Retry-After``
+delay and halves its rate on a 429, lowers its rate when a response that went
+through APF (it carries the ``X-Kubernetes-PF-*`` headers) is much slower
+than the usual latency of its verb, e.g. "list secrets" or "get service", and
+recovers its configured rate gradually as calls succeed.
+"""
+
+import functools
+import threading
+import time
+from urllib.parse import urlsplit
+
+from urllib3.util.retry import Retry
+
+from .kube_init import DEFAULT_BURST, DEFAULT_QPS
+
+# A response from an APF-enabled server is taken as queued when it is
+# QUEUING_LATENCY_FACTOR times slower than the baseline latency of its verb, and
+# slower by QUEUING_MIN_DELAY_SECONDS at least, so fast calls are not flagged by noise.
+QUEUING_LATENCY_FACTOR = 3.0
+QUEUING_MIN_DELAY_SECONDS = 0.1
+# The responses of a verb that set its baseline before any is taken as queued.
+BASELINE_SAMPLES = 5
+# The weight of each response in the baseline, which follows lasting changes.
+BASELINE_WEIGHT = 0.1
+
+APF_HEADERS = (
+    "X-Kubernetes-PF-FlowSchema-UID",
+    "X-Kubernetes-PF-PriorityLevel-UID",
+)
+
+
+def retry_after_seconds(headers):
+    """
+    Read the ``Retry-After`` delay of a response.
+
+    Args:
+        headers: The response headers, or None.
+
+    Returns:
+        float or None: The delay in seconds, or None if absent or not a number.
+    """
+    value = headers.get("Retry-After") if headers else None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def request_verb(method, url, query_params=None):
+    """
+    Get the verb and resource of a Kubernetes API request, which its latency
+    depends on.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL.
+        query_params (list, optional): The (name, value) query parameters.
+
+    Returns:
+        str: E.g. "list secrets", "get services" or "watch deployments".
+    """
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    # /api/<version>/... or /apis/<group>/<version>/...
+    segments = segments[2:] if segments[:1] == ["api"] else segments[3:]
+    if segments[:1] == ["namespaces"] and len(segments) > 2:
+        segments = segments[2:]
+    resource = "/".join(segments[:1] + segments[2:])
+    verb = method.lower()
+    if verb == "get":
+        if any(name == "watch" and value for name, value in query_params or []):
+            verb = "watch"
+        elif len(segments) < 2:
+            verb = "list"
+    return f"{verb} {resource}"
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket whose rate adapts to the API server.
+    """
+
+    def __init__(self, qps=DEFAULT_QPS, burst=DEFAULT_BURST, min_qps=None):
+        """
+        Args:
+            qps (float, optional): The sustained rate, in calls per second. Defaults to DEFAULT_QPS.
+            burst (int, optional): The number of calls that can be made at once. Defaults to DEFAULT_BURST.
+            min_qps (float, optional): The lowest rate the limiter slows down to.
+                Defaults to a tenth of ``qps``.
+        """
+        self.max_qps = qps
+        self.qps = qps
+        self.min_qps = min_qps or qps / 10
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        # Whether the call in progress on this thread was retried.
+        self.local = threading.local()
+        self.throttled = 0
+        self.queued = 0
+        self.waited = 0.0
+        # Verb -> (number of responses, baseline latency in seconds).
+        self.baselines = {}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.qps)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Wait until a call can be made.
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.waited += waited
+                        return
+                    wait = (1 - self.tokens) / self.qps
+            time.sleep(wait)
+            waited += wait
+
+    def is_slow(self, verb, latency):
+        """
+        Check whether a response is much slower than the baseline of its verb.
+
+        Args:
+            verb (str): The verb of the request, from ``request_verb``.
+            latency (float): The response time, in seconds.
+
+        Returns:
+            bool: True once the baseline is set and the response exceeds it.
+        """
+        samples, baseline = self.baselines.get(verb, (0, 0.0))
+        return (
+            samples >= BASELINE_SAMPLES
+            and latency > baseline * QUEUING_LATENCY_FACTOR
+            and latency - baseline > QUEUING_MIN_DELAY_SECONDS
+        )
+
+    def _record_latency(self, verb, latency):
+        samples, baseline = self.baselines.get(verb, (0, 0.0))
+        # The mean of the first responses, then a moving average.
+        weight = max(1 / (samples + 1), BASELINE_WEIGHT)
+        self.baselines[verb] = (samples + 1, baseline + (latency - baseline) * weight)
+
+    def observe(self, status, headers=None, latency=None, verb=None):
+        """
+        Adapt the rate to a response.
+
+        Args:
+            status (int): The HTTP status of the response.
+            headers: The response headers.
+            latency (float, optional): The response time, in seconds.
+            verb (str, optional): The verb of the request, from ``request_verb``.
+        """
+        with self.lock:
+            if status == 429:
+                self.throttled += 1
+                self.qps = max(self.min_qps, self.qps / 2)
+                self.tokens = min(self.tokens, 0.0)
+                delay = retry_after_seconds(headers)
+                if delay:
+                    self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                return
+            if latency is None or status >= 400:
+                return
+            if (
+                headers is not None
+                and any(headers.get(header) for header in APF_HEADERS)
+                and self.is_slow(verb, latency)
+            ):
+                self.queued += 1
+                self.qps = max(self.min_qps, self.qps * 0.75)
+            elif self.qps < self.max_qps:
+                self.qps = min(self.max_qps, self.qps + self.max_qps / 20)
+            self._record_latency(verb, latency)
+
+    def summary(self):
+        """
+        Get a one-line summary of the throttling.
+
+        Returns:
+            str: The summary.
+        """
+        return (
+            f"Rate limiter: {self.throttled} throttled (429) and {self.queued} queued "
+            f"responses, {self.waited:.1f}s waited, {self.qps:.1f}/{self.max_qps} QPS"
+        )
+
+
+class RateLimitedRetry(Retry):
+    """
+    A urllib3 retry policy that reports the responses it retries to a rate
+    limiter, and waits for the limiter before each retry.
+    """
+
+    limiter = None
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.limiter = self.limiter
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, *args, **kwargs):
+        if self.limiter is not None and response is not None:
+            self.limiter.observe(response.status, response.headers)
+        return super().increment(method, url, response, error, *args, **kwargs)
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.limiter is not None:
+            self.limiter.local.retried = True
+            self.limiter.acquire()
+
+
+def rate_limit(api_client, limiter):
+    """
+    Make every call of an ApiClient wait for a rate limiter, and report its
+    responses to it.
+
+    Args:
+        api_client (ApiClient): The client.
+        limiter (RateLimiter): The rate limiter.
+    """
+    from kubernetes.client.rest import ApiException
+
+    rest_client = api_client.rest_client
+    request = rest_client.request
+    # A RateLimitedRetry policy already reports the 429s it sees, the last one included.
+    retried = isinstance(api_client.configuration.retries, RateLimitedRetry)
+
+    def observe(status, headers, start, verb):
+        # The time of a retried call includes the backoff, not only the server's.
+        latency = None if limiter.local.retried else time.monotonic() - start
+        if status != 429 or not retried:
+            limiter.observe(status, headers, latency, verb)
+
+    @functools.wraps(request)
+    def rate_limited_request(method, url, *args, **kwargs):
+        verb = request_verb(method, url, kwargs.get("query_params"))
+        limiter.acquire()
+        limiter.local.retried = False
+        start = time.monotonic()
+        try:
+            response = request(method, url, *args, **kwargs)
+        except ApiException as e:
+            observe(e.status, e.headers, start, verb)
+            raise
+        observe(response.status, response.getheaders(), start, verb)
+        return response
+
+    rest_client.request = rate_limited_request
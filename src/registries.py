@@ -1,7 +1,72 @@
 """
     Registries credentials
 """
-import re
+from functools import lru_cache
+
+from .utils import transform_string
+
+DOCKER_HUB = "docker.io"
+DOCKER_HUB_ALIASES = ("index.docker.io", "registry-1.docker.io", "registry.hub.docker.com")
+
+
+def normalize_server(server):
+    """
+    Normalize a registry server address, as found in image names or docker config files.
+
+    Parameters:
+        server (str): The server address, optionally with a scheme and a path.
+
+    Returns:
+        str: The bare server address (host and optional port), with Docker Hub aliases mapped to docker.io.
+    """
+    server = server.split("://", 1)[-1].split("/", 1)[0].lower()
+    if server in DOCKER_HUB_ALIASES:
+        return DOCKER_HUB
+    return server
+
+
+@lru_cache(maxsize=None)
+def parse_image_reference(image_name):
+    """
+    Parse a Docker image reference.
+
+    The first path component is the registry server only if it looks like a host:
+    it contains a "." or a ":" (port), or is "localhost". Other images come from
+    Docker Hub, with official images under the "library" namespace.
+
+    Parameters:
+        image_name (str): The Docker image name.
+
+    Returns:
+        dict: The server, namespace, repository, tag and digest of the image.
+    """
+    name, _, digest = image_name.partition("@")
+    tag = None
+    if ":" in name.rsplit("/", 1)[-1]:
+        name, tag = name.rsplit(":", 1)
+
+    components = name.split("/")
+    first = components[0]
+    if len(components) > 1 and ("." in first or ":" in first or first == "localhost"):
+        server = normalize_server(first)
+        path = components[1:]
+    else:
+        server = DOCKER_HUB
+        path = components
+    if server == DOCKER_HUB and len(path) == 1:
+        path = ["library"] + path
+
+    if tag is None and not digest:
+        tag = "latest"
+
+    return {
+        "server": server,
+        "namespace": "/".join(path[:-1]) or None,
+        "repository": path[-1],
+        "tag": tag,
+        "digest": digest or None,
+    }
+
 
 class Registries:
     def __init__(self):
@@ -29,32 +94,38 @@ class Registries:
             username (str): The username for the registry.
             password (str): The password for the registry.
         """
-        password_secret_ref = f"registry-{server.replace('.', '-')}-password"
+        password_secret_ref = f"registry-{transform_string(server)}-password"
         self.registries[server] = {"server": server, "username": username, "passwordSecretRef": password_secret_ref}
         self.registries_secrets[server] = { "name": password_secret_ref , "value": passoword }
 
-    def get_registries_array(self):
+    def get_registries_array(self, servers=None):
         """
         Get an array of registries with user credentials.
-        
+
+        Parameters:
+            servers (iterable, optional): Only include these servers. Defaults to every registry.
+
         Returns:
             list: An array containing dictionaries representing registries with user credentials.
         """        
         # Filter out empty registries
-        filtered_registries = {k: v for k, v in self.registries.items() if v}
+        filtered_registries = {k: v for k, v in self.registries.items() if v and (servers is None or k in servers)}
         # Construct array with desired content
         return [{"server": registry["server"], "username": registry["username"], "passwordSecretRef": registry["passwordSecretRef"]}
                 for registry in filtered_registries.values()]    
     
-    def get_registries_secrets_array(self):
+    def get_registries_secrets_array(self, servers=None):
         """
         Get an array of registry secrets.
-        
+
+        Parameters:
+            servers (iterable, optional): Only include the secrets of these servers. Defaults to every registry.
+
         Returns:
             list: An array containing dictionaries representing registry secrets.
         """        
         # Filter out empty registries secrets
-        filtered_registries_secrets = {k: v for k, v in self.registries_secrets.items() if v}
+        filtered_registries_secrets = {k: v for k, v in self.registries_secrets.items() if v and (servers is None or k in servers)}
         # Construct array with desired content
         return [{"name": registries_secret["name"], "value": registries_secret["value"]}
                 for registries_secret in filtered_registries_secrets.values()]
@@ -67,13 +138,7 @@ class Registries:
             image_name (str): The Docker image name.
 
         Returns:
-            dict or None: A dictionary containing the extracted elements (server, namespace, repository, tag),
-                          or None if no match is found.
+            dict: A dictionary containing the extracted elements (server, namespace, repository, tag, digest).
+                  Images without a registry host default to Docker Hub (docker.io).
         """
-        # Regex pattern to match the registry, namespace, repository, and tag
-        pattern = r'^(?:(?P<server>[^/]+)/)?(?:(?P<namespace>[^/]+)/)?(?P<repository>[^:]+)(?::(?P<tag>.+))?$'
-        match = re.match(pattern, image_name)
-        
-        if match:
-            return match.groupdict()
-        return None
\ No newline at end of file
+        return dict(parse_image_reference(image_name))
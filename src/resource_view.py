@@ -0,0 +1,88 @@
+"""
+This module provides lightweight attribute-access views over raw Kubernetes
+objects (parsed YAML or JSON), exposing them with the same snake_case
+attribute names as the kubernetes client models.
+"""
+
+from functools import lru_cache
+
+# Fields whose values are free-form maps in the Kubernetes API. The client
+# models expose them as plain dicts, so the views do the same.
+MAP_FIELDS = frozenset(
+    {
+        "annotations",
+        "data",
+        "labels",
+        "limits",
+        "match_labels",
+        "node_selector",
+        "requests",
+        "string_data",
+    }
+)
+
+
+@lru_cache(maxsize=None)
+def camel_case(name):
+    """
+    Convert a snake_case model attribute name to its camelCase API field name.
+
+    Args:
+        name (str): The attribute name, e.g. ``readiness_probe`` or ``_continue``.
+
+    Returns:
+        str: The API field name, e.g. ``readinessProbe`` or ``continue``.
+    """
+    first, *rest = name.lstrip("_").split("_")
+    return first + "".join(part[:1].upper() + part[1:] for part in rest)
+
+
+def wrap(value, name=None):
+    """
+    Wrap a raw value so nested objects can be read by attribute.
+
+    Args:
+        value: The raw value.
+        name (str, optional): The attribute name the value was read from.
+
+    Returns:
+        The value, with objects wrapped in ResourceView.
+    """
+    if isinstance(value, dict):
+        if name in MAP_FIELDS:
+            return value
+        return ResourceView(value)
+    if isinstance(value, list):
+        return [wrap(item) for item in value]
+    return value
+
+
+class ResourceView:
+    """
+    Read-only attribute access to a raw Kubernetes object.
+
+    Missing fields read as None, like unset fields on the client models.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        # Keep the wrapped field as an instance attribute: later reads are plain
+        # attribute lookups, and nested views and lists are only built once.
+        value = self.__dict__[name] = wrap(self._data.get(camel_case(name)), name)
+        return value
+
+    def __repr__(self):
+        return f"ResourceView({self._data!r})"
+
+    def to_dict(self):
+        """
+        Get the raw object.
+
+        Returns:
+            dict: The raw object the view reads from.
+        """
+        return self._data
@@ -0,0 +1,81 @@
+"""
+This module orders the creation of the container apps of a namespace: apps are
+grouped into dependency waves, so an app is only created once the apps whose
+services it references are, and the apps of a wave can be created in parallel.
+"""
+
+import re
+
+DEFAULT_ROLLOUT_PARALLELISM = 4
+
+# Host names in environment values: at the start of the value, after a URL
+# scheme or credentials, or after a separator of a list of hosts. Path segments
+# are left out.
+HOST_PATTERN = re.compile(r"(?:^|://|@|[\s,;=])([a-z0-9](?:[-a-z0-9.]*[a-z0-9])?)")
+
+
+def service_references(value, namespace):
+    """
+    Find the service names an environment value references, e.g. ``orders`` in
+    ``http://orders:8080/api`` or ``orders.shop.svc.cluster.local``.
+
+    Args:
+        value (str): The environment value.
+        namespace (str): The namespace of the app, for qualified service names.
+
+    Returns:
+        list: The referenced service names, without duplicates.
+    """
+    if not value:
+        return []
+    names = []
+    for host in HOST_PATTERN.findall(value.lower()):
+        labels = host.split(".")
+        if (
+            len(labels) == 1
+            or labels[1] == namespace
+            or host.endswith(".svc")
+            or host.endswith(".svc.cluster.local")
+        ):
+            names.append(labels[0])
+    return list(dict.fromkeys(names))
+
+
+def dependency_waves(references):
+    """
+    Group apps into waves, each app in the wave after the last of the apps it
+    references.
+
+    Args:
+        references (dict): The names of the services each app references, by app
+            name, in the order the apps should be listed. References to
+            services that are not apps, and to the app itself, are ignored.
+
+    Returns:
+        list: The waves, as lists of app names in the order of ``references``.
+            Apps in a reference cycle, and the apps referencing them, are all
+            placed in the last wave.
+    """
+    dependencies = {
+        name: {
+            reference
+            for reference in names
+            if reference in references and reference != name
+        }
+        for name, names in references.items()
+    }
+    waves = []
+    placed = set()
+    remaining = list(references)
+    while remaining:
+        wave = [name for name in remaining if dependencies[name] <= placed]
+        if not wave:
+            print(
+                f"Dependency cycle between {', '.join(remaining)}: "
+                "they are created together in the last wave"
+            )
+            wave = remaining
+        waves.append(wave)
+        placed.update(wave)
+        remaining = [name for name in remaining if name not in placed]
+    return waves
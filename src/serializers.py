@@ -0,0 +1,199 @@
+"""
+This module provides the YAML and JSON serializer backends used to write the
+ACA configurations.
+
+YAML uses libyaml's CSafeDumper when PyYAML was built with it, and the pure
+Python SafeDumper otherwise. JSON uses the standard library by default, with
+orjson and ujson as optional faster backends. The output of a given backend is
+byte-stable for a given configuration.
+"""
+
+import json
+from functools import lru_cache
+
+
+def to_serializable(obj):
+    """
+    Convert objects found in ACA configurations, such as Kubernetes client models
+    or resource views, to plain data.
+
+    Args:
+        obj: The object to convert.
+
+    Returns:
+        dict: The object as a dictionary.
+
+    Raises:
+        TypeError: If the object cannot be converted.
+    """
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def to_plain_data(content):
+    """
+    Convert content to plain data in place of the objects it holds, without
+    serializing it, for the backends that have no usable fallback hook.
+
+    Args:
+        content: The content to convert.
+
+    Returns:
+        The content, made of dictionaries, lists and scalars only.
+
+    Raises:
+        TypeError: If an object cannot be converted.
+    """
+    if isinstance(content, dict):
+        return {key: to_plain_data(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [to_plain_data(item) for item in content]
+    if content is None or isinstance(content, (str, int, float)):
+        return content
+    return to_plain_data(to_serializable(content))
+
+
+def _represent_object(dumper, data):
+    if hasattr(data, "to_dict"):
+        return dumper.represent_dict(data.to_dict())
+    return dumper.represent_undefined(data)
+
+
+class YamlSerializer:
+    """
+    Serializes ACA configurations to YAML with a given PyYAML dumper.
+    """
+
+    extension = "yaml"
+
+    def __init__(self, name, dumper):
+        import yaml
+
+        self.yaml = yaml
+        self.name = name
+        # Subclass the dumper so the representer does not leak into other PyYAML users.
+        self.dumper = type(f"Aca{dumper.__name__}", (dumper,), {})
+        self.dumper.add_multi_representer(object, _represent_object)
+
+    def dumps(self, content):
+        """
+        Serialize content to YAML.
+
+        Args:
+            content (dict): The content to serialize.
+
+        Returns:
+            str: The YAML document.
+        """
+        return self.yaml.dump(content, Dumper=self.dumper, sort_keys=False)
+
+
+class JsonSerializer:
+    """
+    Serializes ACA configurations to JSON with the standard library.
+    """
+
+    extension = "json"
+    name = "json"
+
+    def dumps(self, content):
+        """
+        Serialize content to JSON.
+
+        Args:
+            content (dict): The content to serialize.
+
+        Returns:
+            str: The JSON document.
+        """
+        return json.dumps(content, sort_keys=True, default=to_serializable)
+
+
+class OrjsonSerializer(JsonSerializer):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def dumps(self, content):
+        return self.orjson.dumps(
+            content, option=self.orjson.OPT_SORT_KEYS, default=to_serializable
+        ).decode("utf-8")
+
+
+class UjsonSerializer(JsonSerializer):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self.ujson = ujson
+
+    def dumps(self, content):
+        # ujson drops the result of its default hook when sorting keys, so the
+        # objects are converted first.
+        return self.ujson.dumps(
+            to_plain_data(content), sort_keys=True, ensure_ascii=False
+        )
+
+
+YAML_BACKENDS = ("auto", "libyaml", "python")
+JSON_BACKENDS = ("json", "orjson", "ujson")
+
+
+@lru_cache(maxsize=None)
+def get_yaml_serializer(backend="auto"):
+    """
+    Get a YAML serializer.
+
+    Args:
+        backend (str, optional): "libyaml", "python", or "auto" for libyaml when
+            available. Defaults to "auto".
+
+    Returns:
+        YamlSerializer: The serializer.
+
+    Raises:
+        ValueError: If the backend is unknown or not available.
+    """
+    import yaml
+
+    if backend == "auto":
+        backend = "libyaml" if hasattr(yaml, "CSafeDumper") else "python"
+    if backend == "libyaml":
+        if not hasattr(yaml, "CSafeDumper"):
+            raise ValueError("PyYAML was built without libyaml")
+        return YamlSerializer("libyaml", yaml.CSafeDumper)
+    if backend == "python":
+        return YamlSerializer("python", yaml.SafeDumper)
+    raise ValueError(f"Unknown YAML backend '{backend}'")
+
+
+@lru_cache(maxsize=None)
+def get_json_serializer(backend="json"):
+    """
+    Get a JSON serializer.
+
+    Args:
+        backend (str, optional): "json", "orjson" or "ujson". Defaults to "json".
+
+    Returns:
+        JsonSerializer: The serializer.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    backends = {
+        "json": JsonSerializer,
+        "orjson": OrjsonSerializer,
+        "ujson": UjsonSerializer,
+    }
+    if backend not in backends:
+        raise ValueError(f"Unknown JSON backend '{backend}'")
+    try:
+        return backends[backend]()
+    except ImportError as e:
+        raise ValueError(f"JSON backend '{backend}' is not installed") from e
@@ -0,0 +1,406 @@
+"""
+This module provides an in-memory view of the Kubernetes objects a namespace
+migration needs, so extractors can be answered without a round trip per lookup.
+
+The in-memory APIs expose the same ``api_v1``, ``api_instance``, ``api_network``
+and ``hpa_api_instance`` attributes and ``read_namespaced_*`` methods as
+``KubeApis``, so every extractor accepts either of them.
+"""
+
+import functools
+import threading
+
+from .kubernetes_utils import (
+    list_config_maps,
+    list_horizontal_pod_autoscalers,
+    list_ingresses,
+    list_secrets,
+    list_services,
+    selector_arguments,
+)
+from .label_selectors import matches_selectors
+from .resource_view import ResourceView
+
+DEPLOYMENT = "Deployment"
+SERVICE = "Service"
+INGRESS = "Ingress"
+HORIZONTAL_POD_AUTOSCALER = "HorizontalPodAutoscaler"
+SECRET = "Secret"
+CONFIG_MAP = "ConfigMap"
+
+
+class ListMeta:
+    """
+    Minimal stand-in for the ``V1ListMeta`` of list results.
+    """
+
+    def __init__(self, resource_version=None, _continue=None):
+        self.resource_version = resource_version
+        self._continue = _continue
+
+
+class ListResult:
+    """
+    Minimal stand-in for the ``V1*List`` objects returned by list calls.
+    """
+
+    def __init__(self, items, metadata=None):
+        self.items = items
+        self.metadata = metadata or ListMeta()
+
+
+class ResourceIndex:
+    """
+    Indexes Kubernetes objects by kind, namespace and name.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.covered = set()
+        # (kind, namespace) -> a callable listing every object, or None, for
+        # the kinds only the objects matching a selector were indexed of.
+        self.partial = {}
+        self.lock = threading.Lock()
+
+    def add(self, kind, obj):
+        """
+        Add an object to the index.
+
+        Args:
+            kind (str): The Kubernetes kind of the object.
+            obj: The Kubernetes object.
+        """
+        key = (obj.metadata.namespace, obj.metadata.name)
+        self.objects.setdefault(kind, {})[key] = obj
+
+    def remove(self, kind, name, namespace):
+        """
+        Remove an object from the index, if it is there.
+
+        Args:
+            kind (str): The Kubernetes kind of the object.
+            name (str): The object name.
+            namespace (str): The object namespace.
+        """
+        self.objects.get(kind, {}).pop((namespace, name), None)
+
+    def cover(self, kind, namespace=None, partial=False, list_all=None):
+        """
+        Mark a kind as indexed, for one namespace or for all of them.
+
+        Args:
+            kind (str): The Kubernetes kind.
+            namespace (str, optional): The namespace. Defaults to every namespace.
+            partial (bool, optional): Only the objects matching a selector were
+                indexed, so objects missing from the index may still exist.
+                Defaults to False.
+            list_all (callable, optional): Lists every object of a partial kind,
+                or returns None if it cannot, to complete the index.
+        """
+        self.covered.add((kind, namespace))
+        if partial:
+            self.partial[(kind, namespace)] = list_all
+
+    def is_partial(self, kind, namespace):
+        """
+        Check whether a kind was only partially indexed in a namespace.
+
+        Args:
+            kind (str): The Kubernetes kind.
+            namespace (str): The namespace.
+
+        Returns:
+            bool: True if objects missing from the index may still exist.
+        """
+        return (kind, namespace) in self.partial or (kind, None) in self.partial
+
+    def complete(self, kind, namespace):
+        """
+        Index every object of a partially indexed kind, with one list call.
+
+        Args:
+            kind (str): The Kubernetes kind.
+            namespace (str): The namespace.
+
+        Returns:
+            bool: True if the index now holds every object of the kind.
+        """
+        with self.lock:
+            if not self.is_partial(kind, namespace):
+                return True
+            list_all = self.partial.get((kind, namespace))
+            items = list_all() if list_all is not None else None
+            if items is None:
+                return False
+            for item in items:
+                self.add(kind, item)
+            del self.partial[(kind, namespace)]
+            return True
+
+    def covers(self, kind, namespace):
+        """
+        Check whether lookups for a kind and namespace can be answered from the index.
+
+        Args:
+            kind (str): The Kubernetes kind.
+            namespace (str): The namespace.
+
+        Returns:
+            bool: True if the index holds every object of that kind in the namespace.
+        """
+        return (kind, namespace) in self.covered or (kind, None) in self.covered
+
+    def get(self, kind, name, namespace):
+        """
+        Get an object from the index.
+
+        Args:
+            kind (str): The Kubernetes kind.
+            name (str): The object name.
+            namespace (str): The object namespace.
+
+        Returns:
+            object: The indexed object.
+
+        Raises:
+            ApiException: With status 404 if the object is not indexed.
+        """
+        obj = self.objects.get(kind, {}).get((namespace, name))
+        if obj is None:
+            from kubernetes.client.rest import ApiException
+
+            raise ApiException(status=404, reason="Not Found")
+        return obj
+
+    def namespaces(self):
+        """
+        List the namespaces of the indexed objects.
+
+        Returns:
+            list: The namespace names, sorted.
+        """
+        return sorted(
+            {namespace for objects in self.objects.values() for namespace, _ in objects}
+        )
+
+    def list(self, kind, namespace):
+        """
+        List the indexed objects of a kind in a namespace.
+
+        Args:
+            kind (str): The Kubernetes kind.
+            namespace (str): The namespace.
+
+        Returns:
+            list: The indexed objects, ordered by name.
+        """
+        return [
+            obj
+            for (obj_namespace, _), obj in sorted(self.objects.get(kind, {}).items())
+            if obj_namespace == namespace
+        ]
+
+
+class IndexedApi:
+    """
+    Base class for an API group answered from a ``ResourceIndex``.
+
+    Lookups for kinds or namespaces the index does not cover are delegated to
+    the fallback API group when there is one.
+    """
+
+    def __init__(self, index, fallback=None):
+        self.index = index
+        self.fallback = fallback
+
+    def _delegates(self, kind, namespace):
+        return self.fallback is not None and not self.index.covers(kind, namespace)
+
+    def _read(self, kind, method, name, namespace, **kwargs):
+        from kubernetes.client.rest import ApiException
+
+        if self._delegates(kind, namespace):
+            return getattr(self.fallback, method)(name, namespace, **kwargs)
+        try:
+            return self.index.get(kind, name, namespace)
+        except ApiException as e:
+            if e.status != 404 or self.fallback is None:
+                raise
+            if not self.index.is_partial(kind, namespace):
+                raise
+            # The first miss in a partial index lists the kind in full, rather
+            # than reading each missing object live.
+            if self.index.complete(kind, namespace):
+                return self.index.get(kind, name, namespace)
+            return getattr(self.fallback, method)(name, namespace, **kwargs)
+
+    def _list(self, kind, method, namespace, **kwargs):
+        if self._delegates(kind, namespace) or (
+            self.fallback is not None and self.index.is_partial(kind, namespace)
+        ):
+            return getattr(self.fallback, method)(namespace, **kwargs)
+        items = [
+            obj
+            for obj in self.index.list(kind, namespace)
+            if matches_selectors(
+                obj, kwargs.get("label_selector"), kwargs.get("field_selector")
+            )
+        ]
+        # Pages are ordered by name, and the continue token is the last name returned.
+        if kwargs.get("_continue"):
+            items = [obj for obj in items if obj.metadata.name > kwargs["_continue"]]
+        next_token = None
+        if kwargs.get("limit") and len(items) > kwargs["limit"]:
+            items = items[: kwargs["limit"]]
+            next_token = items[-1].metadata.name
+        return ListResult(items, ListMeta(_continue=next_token))
+
+
+class IndexedCoreV1Api(IndexedApi):
+    def read_namespaced_service(self, name, namespace, **kwargs):
+        return self._read(SERVICE, "read_namespaced_service", name, namespace, **kwargs)
+
+    def list_namespaced_service(self, namespace, **kwargs):
+        return self._list(SERVICE, "list_namespaced_service", namespace, **kwargs)
+
+    def read_namespaced_secret(self, name, namespace, **kwargs):
+        return self._read(SECRET, "read_namespaced_secret", name, namespace, **kwargs)
+
+    def list_namespaced_secret(self, namespace, **kwargs):
+        return self._list(SECRET, "list_namespaced_secret", namespace, **kwargs)
+
+    def read_namespaced_config_map(self, name, namespace, **kwargs):
+        return self._read(
+            CONFIG_MAP, "read_namespaced_config_map", name, namespace, **kwargs
+        )
+
+    def list_namespaced_config_map(self, namespace, **kwargs):
+        return self._list(CONFIG_MAP, "list_namespaced_config_map", namespace, **kwargs)
+
+    def list_namespace(self, **kwargs):
+        # The index has no Namespace objects: list the namespaces it holds objects of.
+        if self.fallback is not None:
+            return self.fallback.list_namespace(**kwargs)
+        return ListResult(
+            [
+                ResourceView({"metadata": {"name": namespace}})
+                for namespace in self.index.namespaces()
+            ]
+        )
+
+
+class IndexedAppsV1Api(IndexedApi):
+    def read_namespaced_deployment(self, name, namespace, **kwargs):
+        return self._read(
+            DEPLOYMENT, "read_namespaced_deployment", name, namespace, **kwargs
+        )
+
+    def list_namespaced_deployment(self, namespace, **kwargs):
+        return self._list(DEPLOYMENT, "list_namespaced_deployment", namespace, **kwargs)
+
+
+class IndexedNetworkingV1Api(IndexedApi):
+    def read_namespaced_ingress(self, name, namespace, **kwargs):
+        return self._read(INGRESS, "read_namespaced_ingress", name, namespace, **kwargs)
+
+    def list_namespaced_ingress(self, namespace, **kwargs):
+        return self._list(INGRESS, "list_namespaced_ingress", namespace, **kwargs)
+
+
+class IndexedAutoscalingV1Api(IndexedApi):
+    def read_namespaced_horizontal_pod_autoscaler(self, name, namespace, **kwargs):
+        return self._read(
+            HORIZONTAL_POD_AUTOSCALER,
+            "read_namespaced_horizontal_pod_autoscaler",
+            name,
+            namespace,
+            **kwargs,
+        )
+
+    def list_namespaced_horizontal_pod_autoscaler(self, namespace, **kwargs):
+        return self._list(
+            HORIZONTAL_POD_AUTOSCALER,
+            "list_namespaced_horizontal_pod_autoscaler",
+            namespace,
+            **kwargs,
+        )
+
+
+class InMemoryApis:
+    """
+    Provides the ``KubeApis`` interface on top of a ``ResourceIndex``.
+    """
+
+    def __init__(self, index, fallback=None):
+        """
+        Initializes the in-memory API groups.
+
+        Args:
+            index (ResourceIndex): The index answering the lookups.
+            fallback (optional): A ``KubeApis`` used for lookups the index does not cover.
+        """
+        self.index = index
+        self.api_v1 = IndexedCoreV1Api(index, getattr(fallback, "api_v1", None))
+        self.api_instance = IndexedAppsV1Api(
+            index, getattr(fallback, "api_instance", None)
+        )
+        self.api_network = IndexedNetworkingV1Api(
+            index, getattr(fallback, "api_network", None)
+        )
+        self.hpa_api_instance = IndexedAutoscalingV1Api(
+            index, getattr(fallback, "hpa_api_instance", None)
+        )
+
+
+class NamespaceSnapshot(InMemoryApis):
+    """
+    Prefetches the services, ingresses, HPAs, secrets and config maps of a
+    namespace with one list call per kind.
+
+    Deployments, and any kind whose list call failed, are still read through
+    the live ``KubeApis``. With selectors, services, ingresses and HPAs are
+    listed with them, and listed again in full on the first lookup the
+    filtered listing cannot answer.
+    """
+
+    def __init__(
+        self, kube_apis, namespace, raw=False, label_selector=None, field_selector=None
+    ):
+        """
+        Lists every prefetched kind in the namespace.
+
+        Args:
+            kube_apis: Kubernetes API instances.
+            namespace (str): The namespace to snapshot.
+            raw (bool, optional): Keep the listed objects as ResourceView objects
+                instead of kubernetes client models. Defaults to False.
+            label_selector (str, optional): The label selector of the services,
+                ingresses and HPAs to prefetch.
+            field_selector (str, optional): The field selector of the services,
+                ingresses and HPAs to prefetch.
+        """
+        super().__init__(ResourceIndex(), fallback=kube_apis)
+        self.namespace = namespace
+
+        selectors = selector_arguments(label_selector, field_selector)
+        # Secrets and config maps are referenced by name and rarely share the
+        # labels of the apps, so they are always listed in full.
+        listers = (
+            (SERVICE, list_services, selectors),
+            (INGRESS, list_ingresses, selectors),
+            (HORIZONTAL_POD_AUTOSCALER, list_horizontal_pod_autoscalers, selectors),
+            (SECRET, list_secrets, {}),
+            (CONFIG_MAP, list_config_maps, {}),
+        )
+        for kind, lister, kwargs in listers:
+            items = lister(kube_apis, namespace, raw, **kwargs)
+            if items is None:
+                continue
+            for item in items:
+                self.index.add(kind, item)
+            self.index.cover(
+                kind,
+                namespace,
+                partial=bool(kwargs),
+                list_all=functools.partial(lister, kube_apis, namespace, raw),
+            )
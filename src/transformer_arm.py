@@ -0,0 +1,458 @@
+"""
+    Transform the ACA configurations of a namespace to a single ARM template or
+    Bicep file, so the whole namespace is one deployment and Azure creates the
+    apps in parallel, in the order of their dependencies.
+"""
+import json
+import re
+
+from .rollout import dependency_waves
+
+API_VERSION = "2023-05-01"
+APP_RESOURCE_TYPE = "Microsoft.App/containerApps"
+ENVIRONMENT_RESOURCE_TYPE = "Microsoft.App/managedEnvironments"
+ARM_SCHEMA = "https://schema.management.azure.com/schemas/2019-04-01/deploymentTemplate.json#"
+ARM_PARAMETERS_SCHEMA = (
+    "https://schema.management.azure.com/schemas/2019-04-01/deploymentParameters.json#"
+)
+
+INDENT = "  "
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class Parameter:
+    """
+    A reference to a template parameter.
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Call:
+    """
+    A template function call, e.g. ``resourceGroup().location``.
+    """
+
+    __slots__ = ("function", "arguments", "property")
+
+    def __init__(self, function, *arguments, property=None):
+        self.function = function
+        self.arguments = arguments
+        self.property = property
+
+
+def symbol(name):
+    """
+    Get an identifier for a name in the template, e.g. ``my_api`` for ``my-api``.
+
+    Args:
+        name (str): The app or secret name.
+
+    Returns:
+        str: The identifier.
+    """
+    return re.sub(r"[^A-Za-z0-9_]", "_", name)
+
+
+def unique_symbol(name, symbols):
+    """
+    Get an identifier for a name that is not one of the given identifiers, e.g.
+    ``my_api_2`` for ``my-api`` when ``my_api`` is taken.
+
+    Args:
+        name (str): The app or secret name.
+        symbols (iterable): The identifiers already taken.
+
+    Returns:
+        str: The identifier.
+    """
+    base = identifier = symbol(name)
+    number = 1
+    while identifier in symbols:
+        number += 1
+        identifier = f"{base}_{number}"
+    return identifier
+
+
+def format_expression(value, arm):
+    """
+    Format a template expression.
+
+    Args:
+        value: A Parameter, a Call or a string literal.
+        arm (bool): Use the ARM syntax, otherwise the Bicep one.
+
+    Returns:
+        str: The expression, without the brackets of ARM expressions.
+    """
+    if isinstance(value, Parameter):
+        return f"parameters('{value.name}')" if arm else value.name
+    if isinstance(value, Call):
+        arguments = ", ".join(format_expression(argument, arm) for argument in value.arguments)
+        expression = f"{value.function}({arguments})"
+        return f"{expression}.{value.property}" if value.property else expression
+    if arm:
+        return "'" + str(value).replace("'", "''") + "'"
+    return format_bicep_string(str(value))
+
+
+def prune(value):
+    """
+    Drop the unset (None) properties, and the objects left empty, from a document.
+
+    Args:
+        value: The document.
+
+    Returns:
+        The pruned document.
+    """
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            item = prune(item)
+            if item is not None and item != {}:
+                pruned[key] = item
+        return pruned
+    if isinstance(value, list):
+        return [prune(item) for item in value]
+    return value
+
+
+def app_properties(app, secret_parameters):
+    """
+    Build the properties of the ``Microsoft.App/containerApps`` resource of an app.
+
+    Args:
+        app (ContainerApp): ACA configuration.
+        secret_parameters (dict): The parameter holding each secret of the app,
+            by secret name.
+
+    Returns:
+        dict: The resource properties.
+    """
+    document = app.to_dict()["properties"]
+    properties = {
+        "managedEnvironmentId": Call(
+            "resourceId",
+            Parameter("environmentResourceGroup"),
+            ENVIRONMENT_RESOURCE_TYPE,
+            Parameter("environmentName"),
+        ),
+        **document,
+    }
+    configuration = properties["configuration"]
+    configuration["secrets"] = [
+        {"name": secret["name"], "value": Parameter(secret_parameters[secret["name"]])}
+        for secret in configuration["secrets"]
+    ]
+    for container in properties["template"]["containers"]:
+        # Templates have no decimal numbers.
+        container["resources"]["cpu"] = Call("json", str(container["resources"]["cpu"]))
+        for probe in container["probes"]:
+            http_get = probe["httpGet"]
+            http_get["scheme"] = http_get.pop("schema")
+    return prune(properties)
+
+
+def build(apps, resource_group=None, environment=None):
+    """
+    Build the template of the container apps of a namespace.
+
+    The secrets are secure parameters without defaults, so the template holds no
+    secret; their known values are returned apart, for a parameters file. The
+    registry passwords are shared by the apps pulling from the same registry.
+    Each app depends on the apps of the template it references, as deployment.sh
+    orders them.
+
+    Args:
+        apps (list): The ContainerApp of every app.
+        resource_group (str, optional): The resource group of the ACA environment.
+            Defaults to the resource group deployed to.
+        environment (str, optional): The name of the ACA environment, otherwise
+            given when deploying.
+
+    Returns:
+        tuple: The parameters, as a dictionary of (type, secure, default) tuples by
+            name, the resources, as (app, dependencies, properties) tuples, and the
+            known values of the secure parameters, by name.
+    """
+    parameters = {
+        "location": ("string", False, Call("resourceGroup", property="location")),
+        "environmentName": ("string", False, environment),
+        "environmentResourceGroup": (
+            "string",
+            False,
+            resource_group or Call("resourceGroup", property="name"),
+        ),
+    }
+    registry_parameters = {}
+    # The parameter of each secret of each app, by app and secret name.
+    secret_parameters = {}
+    secret_values = {}
+    for app in apps:
+        values = {secret.name: secret.value for secret in app.secrets}
+        for registry in app.registries:
+            name = registry.password_secret_ref
+            if name not in registry_parameters:
+                parameter = unique_symbol(name, parameters)
+                registry_parameters[name] = parameter
+                parameters[parameter] = ("string", True, None)
+                if values.get(name) is not None:
+                    secret_values[parameter] = values[name]
+        registry_secrets = {registry.password_secret_ref for registry in app.registries}
+        secret_parameters[app.name] = {}
+        for secret in app.secrets:
+            if secret.name in registry_secrets:
+                name = registry_parameters[secret.name]
+            else:
+                name = unique_symbol(f"{app.name}-{secret.name}", parameters)
+                parameters[name] = ("string", True, None)
+                if secret.value is not None:
+                    secret_values[name] = secret.value
+            secret_parameters[app.name][secret.name] = name
+
+    # Only the references to earlier waves are kept, which breaks the cycles.
+    waves = {
+        name: number
+        for number, wave in enumerate(
+            dependency_waves({app.name: app.references for app in apps})
+        )
+        for name in wave
+    }
+    resources = [
+        (
+            app,
+            [
+                name
+                for name in app.references
+                if name in waves and waves[name] < waves[app.name]
+            ],
+            app_properties(app, secret_parameters[app.name]),
+        )
+        for app in apps
+    ]
+    return parameters, resources, secret_values
+
+
+def to_arm_value(value):
+    """
+    Convert a document to ARM JSON, with expressions in brackets.
+
+    Args:
+        value: The document.
+
+    Returns:
+        The ARM document.
+    """
+    if isinstance(value, (Parameter, Call)):
+        return f"[{format_expression(value, arm=True)}]"
+    if isinstance(value, str) and value.startswith("["):
+        # A literal starting with "[" would be read as an expression.
+        return "[" + value
+    if isinstance(value, dict):
+        return {key: to_arm_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_arm_value(item) for item in value]
+    return value
+
+
+def transform_arm(apps, resource_group=None, environment=None):
+    """
+    Transform the ACA configurations of a namespace to an ARM template.
+
+    Args:
+        apps (list): The ContainerApp of every app.
+        resource_group (str, optional): The resource group of the ACA environment.
+        environment (str, optional): The name of the ACA environment.
+
+    Returns:
+        dict: The ARM template.
+    """
+    parameters, resources, _ = build(apps, resource_group, environment)
+    template_parameters = {}
+    for name, (parameter_type, secure, default) in parameters.items():
+        parameter = {"type": "securestring" if secure else parameter_type}
+        if default is not None:
+            parameter["defaultValue"] = to_arm_value(default)
+        template_parameters[name] = parameter
+
+    template_resources = []
+    for app, dependencies, properties in resources:
+        resource = {
+            "type": APP_RESOURCE_TYPE,
+            "apiVersion": API_VERSION,
+            "name": app.name,
+            "location": to_arm_value(Parameter("location")),
+        }
+        if dependencies:
+            resource["dependsOn"] = [
+                to_arm_value(Call("resourceId", APP_RESOURCE_TYPE, name))
+                for name in dependencies
+            ]
+        resource["properties"] = to_arm_value(properties)
+        template_resources.append(resource)
+
+    return {
+        "$schema": ARM_SCHEMA,
+        "contentVersion": "1.0.0.0",
+        "parameters": template_parameters,
+        "resources": template_resources,
+    }
+
+
+def format_bicep_string(value):
+    """
+    Quote a string as a Bicep string literal.
+
+    Args:
+        value (str): The string.
+
+    Returns:
+        str: The Bicep string literal.
+    """
+    escaped = (
+        value.replace("\\", "\\\\")
+        .replace("'", "\\'")
+        .replace("${", "\\${")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\t", "\\t")
+    )
+    return f"'{escaped}'"
+
+
+def format_bicep_value(value, indent=0):
+    """
+    Format a value as a Bicep expression.
+
+    Args:
+        value: A string, number, boolean, None, list, dict, Parameter or Call.
+        indent (int, optional): The indentation level of the enclosing property.
+
+    Returns:
+        str: The Bicep expression.
+    """
+    if isinstance(value, (Parameter, Call)):
+        return format_expression(value, arm=False)
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return f"json('{value!r}')"
+    if isinstance(value, str):
+        return format_bicep_string(value)
+    inner = INDENT * (indent + 1)
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "[]"
+        lines = [f"{inner}{format_bicep_value(item, indent + 1)}" for item in value]
+        return "[\n" + "\n".join(lines) + "\n" + INDENT * indent + "]"
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        lines = [
+            f"{inner}{key if IDENTIFIER.match(key) else format_bicep_string(key)}: "
+            f"{format_bicep_value(item, indent + 1)}"
+            for key, item in value.items()
+        ]
+        return "{\n" + "\n".join(lines) + "\n" + INDENT * indent + "}"
+    return format_bicep_string(str(value))
+
+
+def write_bicep(apps, file, resource_group=None, environment=None):
+    """
+    Stream the Bicep file of the ACA configurations of a namespace to a file handle.
+
+    Args:
+        apps (list): The ContainerApp of every app.
+        file: A text file handle.
+        resource_group (str, optional): The resource group of the ACA environment.
+        environment (str, optional): The name of the ACA environment.
+    """
+    parameters, resources, _ = build(apps, resource_group, environment)
+    for name, (parameter_type, secure, default) in parameters.items():
+        if secure:
+            file.write("@secure()\n")
+        declaration = f"param {name} {parameter_type}"
+        if default is not None:
+            declaration += f" = {format_bicep_value(default)}"
+        file.write(declaration + "\n")
+
+    for app, dependencies, properties in resources:
+        body = {"name": app.name, "location": Parameter("location"), "properties": properties}
+        file.write(
+            f"\nresource app_{symbol(app.name)} '{APP_RESOURCE_TYPE}@{API_VERSION}' = "
+            f"{format_bicep_value(body)[:-1]}"
+        )
+        if dependencies:
+            file.write(f"{INDENT}dependsOn: [\n")
+            for name in dependencies:
+                file.write(f"{INDENT * 2}app_{symbol(name)}\n")
+            file.write(f"{INDENT}]\n")
+        file.write("}\n")
+
+
+def dumps_arm(apps, resource_group=None, environment=None):
+    """
+    Serialize the ARM template of the ACA configurations of a namespace.
+
+    Args:
+        apps (list): The ContainerApp of every app.
+        resource_group (str, optional): The resource group of the ACA environment.
+        environment (str, optional): The name of the ACA environment.
+
+    Returns:
+        str: The ARM template, as indented JSON.
+    """
+    return json.dumps(transform_arm(apps, resource_group, environment), indent=2) + "\n"
+
+
+def secret_values(apps):
+    """
+    Get the known values of the secure parameters of the template of a namespace.
+
+    Args:
+        apps (list): The ContainerApp of every app.
+
+    Returns:
+        dict: The values, by parameter name.
+    """
+    return build(apps)[2]
+
+
+def dumps_arm_parameters(values):
+    """
+    Serialize the ARM parameters file giving the secure parameters their values.
+
+    Args:
+        values (dict): The values, by parameter name, from ``secret_values``.
+
+    Returns:
+        str: The parameters file, as indented JSON.
+    """
+    document = {
+        "$schema": ARM_PARAMETERS_SCHEMA,
+        "contentVersion": "1.0.0.0",
+        "parameters": {name: {"value": value} for name, value in values.items()},
+    }
+    return json.dumps(document, indent=2) + "\n"
+
+
+def write_bicep_parameters(values, file, template_name):
+    """
+    Write the Bicep parameters file giving the secure parameters their values.
+
+    Args:
+        values (dict): The values, by parameter name, from ``secret_values``.
+        file: A text file handle.
+        template_name (str): The file name of the Bicep file, in the same folder.
+    """
+    file.write(f"using './{template_name}'\n\n")
+    for name, value in values.items():
+        file.write(f"param {name} = {format_bicep_string(value)}\n")
@@ -1,100 +1,521 @@
 """
     Transform a Kubernetes deployment to an Azure Container Apps (ACA) Terraform Script.
 """
+import io
 import json
 
-def transform(name, yaml_data):
+from . import hcl
+
+
+def build_probe(container_block, probe):
     """
-    Transform ACA configuration to Terraform configuration.
+    Add the readiness probe of a container.
+
+    Args:
+        container_block (hcl.Block): The container block.
+        probe (Probe): ACA readiness probe.
+    """
+    probe_block = container_block.block("readiness_probe")
+    probe_block.attribute("transport", (probe.scheme or "HTTP").upper())
+    probe_block.attribute("port", probe.port)
+    probe_block.attribute("path", probe.path)
+    probe_block.attribute("host", probe.host)
+    probe_block.attribute("interval_seconds", probe.period_seconds)
+    probe_block.attribute("failure_count_threshold", probe.failure_threshold)
+    for header in probe.http_headers or []:
+        probe_block.block("header").attribute("name", header.get("name")).attribute(
+            "value", header.get("value")
+        )
+
+
+def build_container(template_block, container):
+    """
+    Add a container to the template.
+
+    Args:
+        template_block (hcl.Block): The template block.
+        container (Container): ACA container.
+    """
+    container_block = template_block.block("container")
+    container_block.attribute("name", container.name)
+    container_block.attribute("image", container.image)
+    container_block.attribute("cpu", container.cpu)
+    container_block.attribute("memory", container.memory)
+    container_block.attribute("command", container.command)
+
+    for env in container.env:
+        env_block = container_block.block("env").attribute("name", env.name)
+        if env.secret_ref:
+            env_block.attribute("secret_name", env.secret_ref)
+        else:
+            env_block.attribute("value", env.value or "")
+
+    for probe in container.probes:
+        build_probe(container_block, probe)
+
+    for mount in container.volume_mounts:
+        container_block.block("volume_mounts").attribute(
+            "name", mount.volume_name
+        ).attribute("path", mount.mount_path)
+
+
+def build(name, app):
+    """
+    Build the Terraform ``azurerm_container_app`` resource of an ACA configuration.
 
     Args:
         name (str): Name of the ACA resource.
-        yaml_data (dict): ACA configuration in YAML format.
+        app (ContainerApp): ACA configuration.
 
     Returns:
-        str: Terraform configuration.
+        hcl.Block: The resource block.
     """
-    terraform_code = ""
-    # Map to Terraform Container App resource
-    terraform_code += f'resource "azurerm_container_app" "{name}" {{\n'
-    terraform_code += f'  name                         = "{name}"\n'
-    terraform_code += '  container_app_environment_id = ""\n'
-    terraform_code += '  resource_group_name          = ""\n'
-    terraform_code += '  revision_mode                = "Single"\n\n'
-    terraform_code += "  template {{\n\n"
-    template = yaml_data.get("properties").get("template")
-
-    terraform_code += (
-        f'    max_replicas      = "{template.get("scale").get("maxReplicas", 1)}"\n'
-    )
-    terraform_code += (
-        f'    min_replicas      = "{template.get("scale").get("mainReplicas", 0)}"\n'
-    )
-    terraform_code += "\n"
-
-    for container in template.get("containers"):
-        terraform_code += "    container {{\n"
-        terraform_code += f'        name      = "{container.get("name")}"\n'
-        terraform_code += f'        image     = "{container.get("image")}"\n'
-        terraform_code += (
-            f'        memory    = "{container.get("resources").get("memory")}"\n'
+    resource = hcl.Block("resource", "azurerm_container_app", name)
+    resource.attribute("name", name)
+    resource.attribute("container_app_environment_id", "")
+    resource.attribute("resource_group_name", "")
+    resource.attribute("revision_mode", "Single")
+
+    for registry in app.registries:
+        resource.block("registry").attribute("server", registry.server).attribute(
+            "username", registry.username
+        ).attribute("password_secret_name", registry.password_secret_ref)
+
+    for secret in app.secrets:
+        resource.block("secret").attribute("name", secret.name).attribute(
+            "value", secret.value
         )
-        terraform_code += (
-            f'        cpu       = "{container.get("resources").get("cpu")}"\n'
+
+    ingress = app.ingress
+    if ingress:
+        ingress_block = resource.block("ingress")
+        ingress_block.attribute("external_enabled", bool(ingress.external))
+        ingress_block.attribute(
+            "allow_insecure_connections", bool(ingress.allow_insecure)
         )
+        ingress_block.attribute("target_port", ingress.target_port)
+        for traffic in ingress.traffic:
+            ingress_block.block("traffic_weight").attribute(
+                "percentage", traffic.weight
+            ).attribute("latest_revision", bool(traffic.latest_revision))
 
-        if container.get("command"):
-            command_fmt = f'        command   = {container.get("command")}\n'
-            terraform_code += command_fmt.replace("'", '"')
+    template_block = resource.block("template")
+    template_block.attribute("min_replicas", app.scale.min_replicas)
+    template_block.attribute("max_replicas", app.scale.max_replicas)
 
-        terraform_code += "\n"
+    for container in app.containers:
+        build_container(template_block, container)
 
-        for env in container.get("env"):
-            terraform_code += "env {{\n"
-            for key, value in env.items():
-                terraform_code += f'    { key if key != "secretRef" else "secret_name" }       = "{value}"\n'
-            terraform_code += "}}\n"
+    for volume in app.volumes:
+        template_block.block("volume").attribute("name", volume.name).attribute(
+            "storage_type", volume.storage_type
+        )
 
-        readiness_probes = container.get("probes", [])
-        for readiness_probe in readiness_probes:
-            terraform_code += "\n"
-            terraform_code += "        readiness_probe {{\n"
-            terraform_code += (
-                f'            path   = "{readiness_probe.get("httpGet").get("path")}"\n'
-            )
-            terraform_code += (
-                f'            port   = "{readiness_probe.get("httpGet").get("port")}"\n'
-            )
-            terraform_code += (
-                f'            timeout   = "{readiness_probe.get("periodSeconds")}"\n'
-            )
-            terraform_code += f'            transport   = "{readiness_probe.get("httpGet").get("schema")}"\n'
-            terraform_code += f'            failure_count_threshold   = "{readiness_probe.get("failureThreshold")}"\n'
-            terraform_code += "         }\n"
-        terraform_code += "     }\n"
-    terraform_code += "   }\n\n"
+    return resource
 
-    if yaml_data.get("properties").get("template").get("secrets"):
 
-        for secret in yaml_data.get("properties").get("template").get("secrets"):
-            terraform_code += "   secret {\n"
-            terraform_code += f'    name    = "{secret.get("name")}"\n'
-            terraform_code += f'    value   = {json.dumps(secret.get("value"))}\n'
-            terraform_code += " }\n"
+def write(name, app, file):
+    """
+    Stream the Terraform configuration of an ACA configuration to a file handle.
 
-    ingress = yaml_data.get("properties").get("configuration").get("ingress")
-    if ingress:
-        terraform_code += f"  ingress {{\n"
-        terraform_code += f'    external_enabled = "{ingress.get("external")}"\n'
-        terraform_code += f'    target_port = "{ingress.get("targetPort")}"\n'
-        for traffic in ingress.get("traffic"):
-            terraform_code += f"    traffic_weight {{\n"
-            terraform_code += f'        percentage = "{traffic.get("weight")}"\n'
-            terraform_code += (
-                f'        latest_revision = "{traffic.get("latestRevision")}"\n'
+    Args:
+        name (str): Name of the ACA resource.
+        app (ContainerApp): ACA configuration.
+        file: A text file handle.
+    """
+    hcl.write(build(name, app), file)
+
+
+def transform(name, app):
+    """
+    Transform ACA configuration to Terraform configuration.
+
+    Args:
+        name (str): Name of the ACA resource.
+        app (ContainerApp): ACA configuration.
+
+    Returns:
+        str: Terraform configuration.
+    """
+    output = io.StringIO()
+    write(name, app, output)
+    return output.getvalue()
+
+
+# The type of an app of the container_app module, as written by module_app.
+APP_TYPE = """object({
+    min_replicas = optional(number)
+    max_replicas = optional(number)
+    registries = optional(list(object({
+      server               = string
+      username             = string
+      password_secret_name = string
+    })), [])
+    ingress = optional(object({
+      external_enabled           = bool
+      allow_insecure_connections = bool
+      target_port                = number
+      traffic_weights = list(object({
+        percentage      = number
+        latest_revision = bool
+      }))
+    }))
+    containers = list(object({
+      name    = string
+      image   = string
+      cpu     = number
+      memory  = string
+      command = optional(list(string))
+      env = optional(list(object({
+        name        = string
+        value       = optional(string)
+        secret_name = optional(string)
+      })), [])
+      readiness_probes = optional(list(object({
+        transport               = string
+        port                    = optional(number)
+        path                    = optional(string)
+        host                    = optional(string)
+        interval_seconds        = optional(number)
+        failure_count_threshold = optional(number)
+        headers = optional(list(object({
+          name  = string
+          value = string
+        })), [])
+      })), [])
+      volume_mounts = optional(list(object({
+        name = string
+        path = string
+      })), [])
+    }))
+    volumes = optional(list(object({
+      name         = string
+      storage_type = string
+    })), [])
+  })"""
+
+# The reusable module creating one container app.
+MODULE_SOURCE = """variable "name" {
+  type = string
+}
+
+variable "resource_group_name" {
+  type = string
+}
+
+variable "container_app_environment_id" {
+  type = string
+}
+
+variable "app" {
+  type = %(app_type)s
+}
+
+variable "secrets" {
+  type      = map(string)
+  default   = {}
+  sensitive = true
+}
+
+resource "azurerm_container_app" "this" {
+  name                         = var.name
+  container_app_environment_id = var.container_app_environment_id
+  resource_group_name          = var.resource_group_name
+  revision_mode                = "Single"
+
+  dynamic "registry" {
+    for_each = var.app.registries
+    content {
+      server               = registry.value.server
+      username             = registry.value.username
+      password_secret_name = registry.value.password_secret_name
+    }
+  }
+
+  dynamic "secret" {
+    for_each = nonsensitive(toset(keys(var.secrets)))
+    content {
+      name  = secret.value
+      value = var.secrets[secret.value]
+    }
+  }
+
+  dynamic "ingress" {
+    for_each = var.app.ingress == null ? [] : [var.app.ingress]
+    content {
+      external_enabled           = ingress.value.external_enabled
+      allow_insecure_connections = ingress.value.allow_insecure_connections
+      target_port                = ingress.value.target_port
+
+      dynamic "traffic_weight" {
+        for_each = ingress.value.traffic_weights
+        content {
+          percentage      = traffic_weight.value.percentage
+          latest_revision = traffic_weight.value.latest_revision
+        }
+      }
+    }
+  }
+
+  template {
+    min_replicas = var.app.min_replicas
+    max_replicas = var.app.max_replicas
+
+    dynamic "container" {
+      for_each = var.app.containers
+      content {
+        name    = container.value.name
+        image   = container.value.image
+        cpu     = container.value.cpu
+        memory  = container.value.memory
+        command = container.value.command
+
+        dynamic "env" {
+          for_each = container.value.env
+          content {
+            name        = env.value.name
+            value       = env.value.value
+            secret_name = env.value.secret_name
+          }
+        }
+
+        dynamic "readiness_probe" {
+          for_each = container.value.readiness_probes
+          content {
+            transport               = readiness_probe.value.transport
+            port                    = readiness_probe.value.port
+            path                    = readiness_probe.value.path
+            host                    = readiness_probe.value.host
+            interval_seconds        = readiness_probe.value.interval_seconds
+            failure_count_threshold = readiness_probe.value.failure_count_threshold
+
+            dynamic "header" {
+              for_each = readiness_probe.value.headers
+              content {
+                name  = header.value.name
+                value = header.value.value
+              }
+            }
+          }
+        }
+
+        dynamic "volume_mounts" {
+          for_each = container.value.volume_mounts
+          content {
+            name = volume_mounts.value.name
+            path = volume_mounts.value.path
+          }
+        }
+      }
+    }
+
+    dynamic "volume" {
+      for_each = var.app.volumes
+      content {
+        name         = volume.value.name
+        storage_type = volume.value.storage_type
+      }
+    }
+  }
+}
+
+output "id" {
+  value = azurerm_container_app.this.id
+}
+
+output "latest_revision_fqdn" {
+  value = azurerm_container_app.this.latest_revision_fqdn
+}
+"""
+
+# The root configuration, creating every app of apps.auto.tfvars.json.
+ROOT_SOURCE = """terraform {
+  required_version = ">= 1.3"
+  required_providers {
+    azurerm = {
+      source = "hashicorp/azurerm"
+    }
+  }
+}
+
+provider "azurerm" {
+  features {}
+}
+
+variable "resource_group_name" {
+  type = string
+}
+
+variable "container_app_environment_name" {
+  type = string
+}
+
+variable "apps" {
+  type = map(%(app_type)s)
+}
+
+variable "app_secrets" {
+  type      = map(map(string))
+  default   = {}
+  sensitive = true
+}
+
+data "azurerm_container_app_environment" "this" {
+  name                = var.container_app_environment_name
+  resource_group_name = var.resource_group_name
+}
+
+module "container_app" {
+  source   = "./modules/container_app"
+  for_each = var.apps
+
+  name                         = each.key
+  resource_group_name          = var.resource_group_name
+  container_app_environment_id = data.azurerm_container_app_environment.this.id
+  app                          = each.value
+  secrets                      = lookup(var.app_secrets, each.key, {})
+}
+
+output "apps" {
+  value = { for name, app in module.container_app : name => app.latest_revision_fqdn }
+}
+"""
+
+
+def module_app(app):
+    """
+    Get the variables of the container_app module for an ACA configuration.
+
+    Args:
+        app (ContainerApp): ACA configuration.
+
+    Returns:
+        dict: The app, in the shape of APP_TYPE. The secrets are left out.
+    """
+    ingress = app.ingress
+    return {
+        "min_replicas": app.scale.min_replicas,
+        "max_replicas": app.scale.max_replicas,
+        "registries": [
+            {
+                "server": registry.server,
+                "username": registry.username,
+                "password_secret_name": registry.password_secret_ref,
+            }
+            for registry in app.registries
+        ],
+        "ingress": {
+            "external_enabled": bool(ingress.external),
+            "allow_insecure_connections": bool(ingress.allow_insecure),
+            "target_port": ingress.target_port,
+            "traffic_weights": [
+                {
+                    "percentage": traffic.weight,
+                    "latest_revision": bool(traffic.latest_revision),
+                }
+                for traffic in ingress.traffic
+            ],
+        }
+        if ingress
+        else None,
+        "containers": [
+            {
+                "name": container.name,
+                "image": container.image,
+                "cpu": container.cpu,
+                "memory": container.memory,
+                "command": container.command,
+                "env": [
+                    {"name": env.name, "secret_name": env.secret_ref}
+                    if env.secret_ref
+                    else {"name": env.name, "value": env.value or ""}
+                    for env in container.env
+                ],
+                "readiness_probes": [
+                    {
+                        "transport": (probe.scheme or "HTTP").upper(),
+                        "port": probe.port,
+                        "path": probe.path,
+                        "host": probe.host,
+                        "interval_seconds": probe.period_seconds,
+                        "failure_count_threshold": probe.failure_threshold,
+                        "headers": [
+                            {"name": header.get("name"), "value": header.get("value")}
+                            for header in probe.http_headers or []
+                        ],
+                    }
+                    for probe in container.probes
+                ],
+                "volume_mounts": [
+                    {"name": mount.volume_name, "path": mount.mount_path}
+                    for mount in container.volume_mounts
+                ],
+            }
+            for container in app.containers
+        ],
+        "volumes": [
+            {"name": volume.name, "storage_type": volume.storage_type}
+            for volume in app.volumes
+        ],
+    }
+
+
+def module_variables(apps, resource_group=None, environment=None):
+    """
+    Build the ``apps.auto.tfvars.json`` variables of the ACA configurations of a namespace.
+
+    Args:
+        apps (list): The ContainerApp of every app.
+        resource_group (str, optional): The resource group of the apps and the ACA environment.
+        environment (str, optional): The name of the ACA environment.
+
+    Returns:
+        dict: The variables. Those not known are left for Terraform to ask. Apps
+            whose target port is not a number are left out.
+    """
+    variables = {}
+    if resource_group:
+        variables["resource_group_name"] = resource_group
+    if environment:
+        variables["container_app_environment_name"] = environment
+    # A named target port that could not be resolved to a number would fail the
+    # type conversion of the whole map, and the plan of every app with it.
+    module_apps = []
+    for app in apps:
+        if app.ingress and not isinstance(app.ingress.target_port, int):
+            print(
+                f"Skipped {app.name}: its target port {app.ingress.target_port} "
+                "is not a port number"
             )
-            terraform_code += "    }\n"
-        terraform_code += "   }\n"
+        else:
+            module_apps.append(app)
+    variables["apps"] = {app.name: module_app(app) for app in module_apps}
+    variables["app_secrets"] = {
+        app.name: {secret.name: secret.value for secret in app.secrets}
+        for app in module_apps
+        if app.secrets
+    }
+    return variables
+
+
+def transform_module(apps, resource_group=None, environment=None):
+    """
+    Transform the ACA configurations of a namespace to a Terraform configuration
+    creating every app with a ``for_each`` over one module.
+
+    Args:
+        apps (list): The ContainerApp of every app.
+        resource_group (str, optional): The resource group of the apps and the ACA environment.
+        environment (str, optional): The name of the ACA environment.
 
-    terraform_code += "}\n\n"
-    return terraform_code
+    Returns:
+        dict: The content of each file, by path relative to the configuration folder.
+    """
+    return {
+        "main.tf": ROOT_SOURCE % {"app_type": APP_TYPE},
+        "modules/container_app/main.tf": MODULE_SOURCE % {"app_type": APP_TYPE},
+        "apps.auto.tfvars.json": json.dumps(
+            module_variables(apps, resource_group, environment), indent=2
+        )
+        + "\n",
+    }
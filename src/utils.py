@@ -1,7 +1,9 @@
 import os
 import re
-import json
-import yaml
+
+from .output_writer import OutputWriter
+from .rollout import DEFAULT_ROLLOUT_PARALLELISM, dependency_waves
+from .serializers import get_json_serializer, get_yaml_serializer
 
 
 def transform_string(input_string):
@@ -21,27 +23,212 @@ def transform_string(input_string):
     return result
 
 
-def write_to_az_scripts_file(
-    file_path, deployment, resource_group, container_environment
+def az_create_command(deployment, resource_group, container_environment):
+    """
+    Build the Azure CLI command creating a container app from its YAML file.
+
+    Args:
+        deployment (str): The name of the deployment.
+        resource_group (str): The resource group name.
+        container_environment (str): The container environment name.
+
+    Returns:
+        str: The command line, including the trailing newline.
+    """
+    return f"az containerapp create -n {deployment} -g  {resource_group} --environment {container_environment} --yaml {deployment}.yaml\n"
+
+
+# The header of deployment.sh. Apps are created in the background, at most
+# PARALLELISM at a time; "wave" waits for the apps of the previous waves, and
+# "report" prints the exit status of every app.
+AZ_SCRIPT_HEADER = """#!/bin/bash
+# Creates the container apps in dependency waves: an app is only created once
+# the apps it references, in earlier waves, are. Up to PARALLELISM apps are
+# created at a time. The output of each app is written to logs/<app>.log, and
+# the script exits with status 1 if any app failed.
+PARALLELISM="${{PARALLELISM:-{parallelism}}}"
+cd "$(dirname "$0")" || exit 1
+mkdir -p logs
+APPS=()
+
+create() {{
+  local name="$1"
+  shift
+  APPS+=("$name")
+  rm -f "logs/$name.status"
+  while [ "$(jobs -pr | wc -l)" -ge "$PARALLELISM" ]; do
+    wait -n 2>/dev/null || sleep 1
+  done
+  echo "Creating $name"
+  ( "$@" >"logs/$name.log" 2>&1; echo $? >"logs/$name.status" ) &
+}}
+
+wave() {{
+  wait
+  echo "Wave $1"
+}}
+
+report() {{
+  wait
+  local failed=0 name status
+  for name in "${{APPS[@]}}"; do
+    status=$(cat "logs/$name.status" 2>/dev/null || echo unknown)
+    if [ "$status" = 0 ]; then
+      echo "ok      $name"
+    else
+      echo "FAILED  $name (exit status $status, see logs/$name.log)"
+      failed=$((failed + 1))
+    fi
+  done
+  echo "${{#APPS[@]}} app(s), $failed failed"
+  [ "$failed" -eq 0 ]
+}}
+
+"""
+
+AZ_SCRIPT_FOOTER = "report\n"
+
+
+# Appended to the line of an app referencing other apps, so a single app can
+# be updated later and the waves recomputed from the references of every app.
+AZ_SCRIPT_REFERENCES = " # references: "
+
+
+def az_script_line(deployment, resource_group, container_environment, references=()):
+    """
+    Build the line of deployment.sh creating a container app.
+
+    Args:
+        deployment (str): The name of the deployment.
+        resource_group (str): The resource group name.
+        container_environment (str): The container environment name.
+        references (iterable, optional): The service names the app references.
+
+    Returns:
+        str: The line, including the trailing newline.
+    """
+    command = az_create_command(deployment, resource_group, container_environment)
+    references = [name for name in references if name != deployment]
+    if references:
+        command = command[:-1] + AZ_SCRIPT_REFERENCES + " ".join(references) + "\n"
+    return f"create {deployment} {command}"
+
+
+def az_script_lines(references, resource_group, container_environment):
+    """
+    Build the waves of deployment.sh.
+
+    Args:
+        references (dict): The service names each app references, by app name,
+            in the order the apps are listed.
+        resource_group (str): The resource group name.
+        container_environment (str): The container environment name.
+
+    Returns:
+        list: The lines of the waves.
+    """
+    lines = []
+    for number, wave in enumerate(dependency_waves(references), 1):
+        lines.append(f"wave {number}\n")
+        lines += [
+            az_script_line(
+                deployment,
+                resource_group,
+                container_environment,
+                references[deployment],
+            )
+            for deployment in wave
+        ]
+    return lines
+
+
+def write_az_scripts_file(
+    file_path,
+    references,
+    resource_group,
+    container_environment,
+    parallelism=DEFAULT_ROLLOUT_PARALLELISM,
+    writer=None,
 ):
     """
-    Write an Azure CLI script to a shell (.sh) file for creating a container app.
+    Write the Azure CLI script creating the container apps of a namespace in
+    dependency waves, with bounded parallelism.
 
     Args:
         file_path (str): The directory path to save the file.
+        references (dict): The service names each app references, by app name,
+            in the order the apps are listed.
+        resource_group (str): The resource group name.
+        container_environment (str): The container environment name.
+        parallelism (int, optional): The default number of apps created at once.
+            Defaults to DEFAULT_ROLLOUT_PARALLELISM.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        str: The path of the script.
+    """
+    filename = os.path.join(file_path, "yaml", "deployment.sh")
+    lines = [AZ_SCRIPT_HEADER.format(parallelism=parallelism)]
+    lines += az_script_lines(references, resource_group, container_environment)
+    lines.append(AZ_SCRIPT_FOOTER)
+    return (writer or OutputWriter()).write(filename, "".join(lines), executable=True)
+
+
+def update_az_scripts_file(
+    file_path,
+    deployment,
+    resource_group,
+    container_environment,
+    remove=False,
+    references=(),
+    writer=None,
+):
+    """
+    Replace, add or remove the line of a single container app in the Azure CLI
+    script, and recompute the waves from the references of every app.
+
+    Args:
+        file_path (str): The directory path of the script.
         deployment (str): The name of the deployment.
         resource_group (str): The resource group name.
         container_environment (str): The container environment name.
+        remove (bool, optional): Remove the line instead of writing it. Defaults to False.
+        references (iterable, optional): The service names the app references.
+        writer (OutputWriter, optional): The writer of the run's files.
     """
     filename = os.path.join(file_path, "yaml", "deployment.sh")
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, "a", encoding="utf-8") as file:
-        file.write(
-            f"az containerapp create -n {deployment} -g  {resource_group} --environment {container_environment} --yaml {deployment}.yaml\n"
-        )
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        lines = [
+            AZ_SCRIPT_HEADER.format(parallelism=DEFAULT_ROLLOUT_PARALLELISM),
+            AZ_SCRIPT_FOOTER,
+        ]
+
+    # The references of every app of the script, in the order of its lines.
+    header, apps, footer = [], {}, []
+    for line in lines:
+        if line == AZ_SCRIPT_FOOTER or footer:
+            footer.append(line)
+        elif line.startswith("create "):
+            name = line.split(" ", 2)[1]
+            _, marker, names = line.rstrip("\n").partition(AZ_SCRIPT_REFERENCES)
+            apps[name] = names.split() if marker else []
+        elif not line.startswith("wave ") and not apps:
+            header.append(line)
+
+    if remove:
+        apps.pop(deployment, None)
+    else:
+        apps[deployment] = list(references)
+
+    lines = header + az_script_lines(apps, resource_group, container_environment)
+    lines += footer
+    (writer or OutputWriter()).write(filename, "".join(lines), executable=True)
 
 
-def write_to_yaml_file(file_path, file_name, content):
+def write_to_yaml_file(file_path, file_name, content, serializer=None, writer=None):
     """
     Write content to a YAML file.
 
@@ -49,14 +236,19 @@ def write_to_yaml_file(file_path, file_name, content):
         file_path (str): The directory path to save the file.
         file_name (str): The name of the YAML file.
         content (dict): The content to write to the YAML file.
+        serializer (YamlSerializer, optional): The YAML backend. Defaults to libyaml when available.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        str: The path of the file.
     """
     filename = os.path.join(file_path, "yaml", f"{file_name}.yaml")
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, "w", encoding="utf-8") as file:
-        yaml.dump(content, file, sort_keys=False)
+    return (writer or OutputWriter()).write(
+        filename, (serializer or get_yaml_serializer()).dumps(content)
+    )
 
 
-def write_to_json_file(file_path, file_name, content):
+def write_to_json_file(file_path, file_name, content, serializer=None, writer=None):
     """
     Write content to a JSON file.
 
@@ -64,14 +256,19 @@ def write_to_json_file(file_path, file_name, content):
         file_path (str): The directory path to save the file.
         file_name (str): The name of the JSON file.
         content (dict): The content to write to the JSON file.
+        serializer (JsonSerializer, optional): The JSON backend. Defaults to the standard library.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        str: The path of the file.
     """
     filename = os.path.join(file_path, "json", f"{file_name}.json")
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, "w", encoding="utf-8") as file:
-        json.dump(content, file, sort_keys=True)
+    return (writer or OutputWriter()).write(
+        filename, (serializer or get_json_serializer()).dumps(content)
+    )
 
 
-def write_to_terraform_file(file_path, file_name, content):
+def write_to_terraform_file(file_path, file_name, content, writer=None):
     """
     Write content to a Terraform (.tf) file.
 
@@ -79,11 +276,75 @@ def write_to_terraform_file(file_path, file_name, content):
         file_path (str): The directory path to save the file.
         file_name (str): The name of the Terraform file.
         content (str): The content to write to the Terraform file.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        str: The path of the file.
     """
     filename = os.path.join(file_path, "tf", f"{file_name}.tf")
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, "w", encoding="utf-8") as file:
-        file.write(content)
+    return (writer or OutputWriter()).write(filename, content)
+
+
+def write_to_template_file(file_path, folder, file_name, content, writer=None):
+    """
+    Write the ARM template or Bicep file of a namespace.
+
+    Args:
+        file_path (str): The directory path to save the file.
+        folder (str): The subfolder, and the file extension ("arm" files are JSON).
+        file_name (str): The name of the file, without extension.
+        content (str): The content to write to the file.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        str: The path of the file.
+    """
+    extension = "json" if folder == "arm" else folder
+    filename = os.path.join(file_path, folder, f"{file_name}.{extension}")
+    return (writer or OutputWriter()).write(filename, content)
+
+
+def write_to_parameters_file(file_path, folder, file_name, content, writer=None):
+    """
+    Write the parameters file giving the secure parameters of the ARM template or
+    Bicep file of a namespace their values.
+
+    Args:
+        file_path (str): The directory path to save the file.
+        folder (str): The subfolder of the template, "arm" or "bicep".
+        file_name (str): The name of the template, without extension.
+        content (str): The content to write to the file.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        str: The path of the file.
+    """
+    if folder == "arm":
+        filename = os.path.join(file_path, folder, f"{file_name}.parameters.json")
+    else:
+        filename = os.path.join(file_path, folder, f"{file_name}.bicepparam")
+    return (writer or OutputWriter()).write(filename, content)
+
+
+def write_to_terraform_module(file_path, sources, writer=None):
+    """
+    Write the files of a Terraform module configuration to the ``terraform`` folder.
+
+    Args:
+        file_path (str): The directory path to save the files.
+        sources (dict): The content of each file, by path relative to the folder.
+        writer (OutputWriter, optional): The writer of the run's files.
+
+    Returns:
+        list: The paths of the files.
+    """
+    writer = writer or OutputWriter()
+    return [
+        writer.write(
+            os.path.join(file_path, "terraform", *relative_path.split("/")), content
+        )
+        for relative_path, content in sources.items()
+    ]
 
 
 def parse_memory_string(memory_str):
@@ -0,0 +1,298 @@
+"""
+This module keeps the ACA configurations of a namespace up to date by watching
+its deployments, services, ingresses, HPAs and secrets, and regenerating only
+the apps affected by each change.
+"""
+
+import queue
+import threading
+import time
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from .extractor import referenced_secret_names
+from .pipeline import transform_deployment
+from .snapshot import (
+    DEPLOYMENT,
+    HORIZONTAL_POD_AUTOSCALER,
+    INGRESS,
+    SECRET,
+    SERVICE,
+    InMemoryApis,
+    ResourceIndex,
+)
+
+# Kind -> (KubeApis attribute, list method) of every watched kind.
+WATCHED_KINDS = {
+    DEPLOYMENT: ("api_instance", "list_namespaced_deployment"),
+    SERVICE: ("api_v1", "list_namespaced_service"),
+    INGRESS: ("api_network", "list_namespaced_ingress"),
+    HORIZONTAL_POD_AUTOSCALER: (
+        "hpa_api_instance",
+        "list_namespaced_horizontal_pod_autoscaler",
+    ),
+    SECRET: ("api_v1", "list_namespaced_secret"),
+}
+
+# Event type used to replace every object of a kind after a watch expired.
+RELISTED = "RELISTED"
+
+WATCH_RETRY_SECONDS = 5
+# Watches are closed by the server after WATCH_TIMEOUT_SECONDS and resumed from
+# the last resourceVersion, so a dead connection never hangs the watcher.
+WATCH_TIMEOUT_SECONDS = 300
+WATCH_TIMEOUT_MARGIN_SECONDS = 30
+
+
+def list_function(kube_apis, kind):
+    """
+    Get the list method of a watched kind.
+
+    Args:
+        kube_apis: Kubernetes API instances.
+        kind (str): The Kubernetes kind.
+
+    Returns:
+        callable: The ``list_namespaced_*`` method of the kind.
+    """
+    api_attribute, method = WATCHED_KINDS[kind]
+    return getattr(getattr(kube_apis, api_attribute), method)
+
+
+class AppWatcher:
+    """
+    Watches a namespace and regenerates the ACA configuration of the deployments
+    affected by each event.
+
+    The watched objects are kept in memory, so regenerating an app does not
+    read anything from the API server.
+    """
+
+    def __init__(self, kube_apis, namespace, yaml_transformer, on_update, on_delete):
+        """
+        Initializes the AppWatcher.
+
+        Args:
+            kube_apis: Kubernetes API instances.
+            namespace (str): The namespace to watch.
+            yaml_transformer (YamlTransformer): The transformer to use.
+            on_update (callable): Called with the deployment name and its new ACA configuration.
+            on_delete (callable): Called with the name of a deleted deployment.
+        """
+        self.kube_apis = kube_apis
+        self.namespace = namespace
+        self.yaml_transformer = yaml_transformer
+        self.on_update = on_update
+        self.on_delete = on_delete
+        self.index = ResourceIndex()
+        self.apis = InMemoryApis(self.index)
+        self.resource_versions = {}
+        self.migrated = set()
+
+    @property
+    def deployments(self):
+        return self.index.list(DEPLOYMENT, self.namespace)
+
+    def list(self):
+        """
+        List every watched kind once, recording where the watches start from.
+        """
+        for kind in WATCHED_KINDS:
+            response = list_function(self.kube_apis, kind)(namespace=self.namespace)
+            for item in response.items:
+                self.index.add(kind, item)
+            self.index.cover(kind, self.namespace)
+            self.resource_versions[kind] = response.metadata.resource_version
+        self.migrated = {deployment.metadata.name for deployment in self.deployments}
+
+    def affected_deployments(self, kind, name):
+        """
+        Find the deployments whose ACA configuration depends on an object.
+
+        Args:
+            kind (str): The Kubernetes kind of the object.
+            name (str): The object name.
+
+        Returns:
+            list: The names of the affected deployments.
+        """
+        if kind == SECRET:
+            return [
+                deployment.metadata.name
+                for deployment in self.deployments
+                if name in referenced_secret_names(deployment)
+            ]
+        # Services, ingresses and HPAs are matched to the deployment of the same name.
+        return [name]
+
+    def apply_event(self, kind, event):
+        """
+        Apply a watch event to the in-memory objects.
+
+        Args:
+            kind (str): The Kubernetes kind of the event object.
+            event (dict): The watch event, with its "type" and "object".
+
+        Returns:
+            list: The names of the deployments affected by the event.
+        """
+        event_type = event["type"]
+        if event_type == RELISTED:
+            return self.apply_relist(kind, event["objects"])
+        if event_type not in ("ADDED", "MODIFIED", "DELETED"):
+            return []
+
+        obj = event["object"]
+        name = obj.metadata.name
+        affected = set(self.affected_deployments(kind, name))
+        try:
+            previous = self.index.get(kind, name, self.namespace)
+        except ApiException:
+            previous = None
+
+        if event_type == "DELETED":
+            self.index.remove(kind, name, self.namespace)
+        else:
+            if (
+                previous is not None
+                and previous.metadata.generation is not None
+                and previous.metadata.generation == obj.metadata.generation
+            ):
+                # Only the status changed, which the ACA configuration does not use.
+                self.index.add(kind, obj)
+                return []
+            self.index.add(kind, obj)
+
+        # A deployment that stops or starts using a secret is affected either way.
+        affected.update(self.affected_deployments(kind, name))
+        return sorted(affected)
+
+    def apply_relist(self, kind, objects):
+        """
+        Replace every object of a kind with a fresh listing.
+
+        Args:
+            kind (str): The Kubernetes kind.
+            objects (list): The listed objects.
+
+        Returns:
+            list: The names of the deployments affected by the objects that changed.
+        """
+        previous = {obj.metadata.name: obj for obj in self.index.list(kind, self.namespace)}
+        current = {obj.metadata.name: obj for obj in objects}
+
+        changed = [
+            name
+            for name in previous.keys() | current.keys()
+            if name not in previous
+            or name not in current
+            or previous[name].metadata.resource_version
+            != current[name].metadata.resource_version
+        ]
+
+        affected = set()
+        for name in changed:
+            affected.update(self.affected_deployments(kind, name))
+        for name in previous:
+            self.index.remove(kind, name, self.namespace)
+        for obj in objects:
+            self.index.add(kind, obj)
+        for name in changed:
+            affected.update(self.affected_deployments(kind, name))
+        return sorted(affected)
+
+    def refresh(self, name):
+        """
+        Regenerate the ACA configuration of a deployment, or report it deleted.
+
+        Args:
+            name (str): The name of the deployment.
+        """
+        try:
+            deployment = self.index.get(DEPLOYMENT, name, self.namespace)
+        except ApiException:
+            if name in self.migrated:
+                self.migrated.discard(name)
+                self.on_delete(name)
+            return
+
+        result = transform_deployment(self.apis, self.yaml_transformer, deployment)
+        if result.error is not None:
+            print(f"Failed to migrate deployment {name}: {result.error}")
+            return
+        self.migrated.add(name)
+        self.on_update(name, result.aca_config)
+
+    def handle_event(self, kind, event):
+        """
+        Apply a watch event and regenerate the affected deployments.
+
+        Args:
+            kind (str): The Kubernetes kind of the event object.
+            event (dict): The watch event.
+        """
+        for name in self.apply_event(kind, event):
+            self.refresh(name)
+
+    def run(self, events=None):
+        """
+        Process watch events until the event stream ends.
+
+        Args:
+            events (iterable, optional): (kind, event) pairs. Defaults to the live
+                watches started by ``watch_events``.
+        """
+        if events is None:
+            events = self.watch_events()
+        for kind, event in events:
+            self.handle_event(kind, event)
+
+    def watch_events(self):
+        """
+        Watch every kind of the namespace, starting from the last listing.
+
+        Yields:
+            tuple: (kind, event) pairs, as they arrive.
+        """
+        events = queue.Queue()
+        for kind in WATCHED_KINDS:
+            threading.Thread(
+                target=self._watch_kind, args=(kind, events), daemon=True
+            ).start()
+        while True:
+            yield events.get()
+
+    def _watch_kind(self, kind, events):
+        resource_version = self.resource_versions.get(kind)
+        list_call = list_function(self.kube_apis, kind)
+        relist = False
+        while True:
+            try:
+                if relist:
+                    # The watch expired: list again and resume from the new listing.
+                    # A failed listing is retried like a failed watch.
+                    response = list_call(namespace=self.namespace)
+                    resource_version = response.metadata.resource_version
+                    relist = False
+                    events.put((kind, {"type": RELISTED, "objects": response.items}))
+                for event in watch.Watch().stream(
+                    list_call,
+                    namespace=self.namespace,
+                    resource_version=resource_version,
+                    timeout_seconds=WATCH_TIMEOUT_SECONDS,
+                    _request_timeout=WATCH_TIMEOUT_SECONDS + WATCH_TIMEOUT_MARGIN_SECONDS,
+                ):
+                    obj = event.get("object")
+                    if hasattr(obj, "metadata") and obj.metadata:
+                        resource_version = obj.metadata.resource_version
+                    events.put((kind, event))
+            except ApiException as e:
+                if e.status == 410:
+                    relist = True
+                    continue
+                print(f"Error watching {kind}: {e}")
+                time.sleep(WATCH_RETRY_SECONDS)
+            except Exception as e:
+                print(f"Error watching {kind}: {e}")
+                time.sleep(WATCH_RETRY_SECONDS)
@@ -1,6 +1,10 @@
 """
     Transform a Kubernetes deployment to an Azure Container Apps (ACA) deployment.
 """
+import threading
+
+from src.aca_model import Container, ContainerApp, Registry, Secret
+from src.credentials import EnvironmentCredentials, image_pull_secret_credentials
 from src.registries import Registries
 from .extractor import (
     extract_mounts,
@@ -10,78 +14,218 @@ from .extractor import (
     extract_secrets_ref_from_env_from,
     extract_volumes,
     extract_ingress,
+    extract_references,
     extract_envs,
     extract_env_from,
     normalize_secrets,
 )
 
 class YamlTransformer:
-    def __init__(self):
+    def __init__(self, credential_providers=None, interactive=True):
+        """
+        Initializes the YamlTransformer.
+
+        Args:
+            credential_providers (list, optional): Registry credential providers, looked up after the
+                deployment's imagePullSecrets. Defaults to environment variables.
+            interactive (bool, optional): Ask for the credentials of registries no provider knows.
+                Defaults to True. Otherwise such registries are treated as anonymous.
+        """
         self.registries = Registries()
+        self.registries_lock = threading.Lock()
+        if credential_providers is None:
+            credential_providers = [EnvironmentCredentials()]
+        self.credential_providers = list(credential_providers)
+        self.interactive = interactive
+
+    def image_servers(self, deployment):
+        """
+        Get the registry servers of the container images of a deployment.
+
+        Args:
+            deployment: Kubernetes deployment object.
+
+        Returns:
+            list: The registry servers, without duplicates.
+        """
+        return list(dict.fromkeys(
+            self.registries.extract_docker_image_elements(container.image).get('server')
+            for container in deployment.spec.template.spec.containers
+        ))
+
+    def pull_secret_credentials(self, kube_apis, deployment):
+        """
+        Load the credentials of the imagePullSecrets of a deployment.
+
+        Args:
+            kube_apis: KubeApis or NamespaceSnapshot used to read the secrets, or None.
+            deployment: Kubernetes deployment object.
+
+        Returns:
+            DockerConfigCredentials: The credentials, or None if the deployment has no pull secrets.
+        """
+        if kube_apis is None or not deployment.spec.template.spec.image_pull_secrets:
+            return None
+        return image_pull_secret_credentials(kube_apis, deployment)
+
+    def resolve_registry(self, server):
+        """
+        Find the credentials of a registry server with the credential providers, or by asking
+        for them, unless it is already known. The result is shared by every deployment of the run.
+
+        Args:
+            server (str): The registry server.
+        """
+        with self.registries_lock:
+            if server in self.registries.registries:
+                return
+
+            for provider in self.credential_providers:
+                credentials = provider.get(server)
+                if credentials:
+                    self.registries.add_user_credentials(server, *credentials)
+                    return
+
+            if not self.interactive:
+                self.registries.add_anonymous(server)
+                return
+
+            has_registry_credentials = input(f"This registry  {server} reqquired credentials [Y/N]: ") or "N"
+
+            if has_registry_credentials.upper() == "Y":
+                registry_username = input(f"Registry username for {server}: ")
+                registry_passoword = input(f"Registry password for {server}: ")
+
+                self.registries.add_user_credentials(server,registry_username, registry_passoword)
+            else:
+                self.registries.add_anonymous(server)
+
+    def resolve_registries(self, deployments, kube_apis=None):
+        """
+        Resolve, in one pass, the registries of every container image of the given deployments
+        that their imagePullSecrets do not cover.
+
+        Args:
+            deployments (list): Kubernetes deployment objects.
+            kube_apis (optional): KubeApis or NamespaceSnapshot used to read the deployments' imagePullSecrets.
+
+        Returns:
+            dict: The credentials of the imagePullSecrets of the deployments that have some, by
+                (namespace, name), to pass to ``transform`` so they are not read again.
+        """
+        pull_credentials = {}
+        for deployment in deployments:
+            try:
+                credentials = self.pull_secret_credentials(kube_apis, deployment)
+            except LookupError:
+                # A pull secret is missing: the transformation fails on it.
+                continue
+            if credentials is not None:
+                key = (deployment.metadata.namespace, deployment.metadata.name)
+                pull_credentials[key] = credentials
+            for server in self.image_servers(deployment):
+                if server in self.registries.registries:
+                    continue
+                if credentials is None or not credentials.get(server):
+                    self.resolve_registry(server)
+        return pull_credentials
 
-    def transform(self, kube_apis, deployment):
+    def deployment_registries(self, kube_apis, deployment, pull_credentials=None):
+        """
+        Get the registry credentials of a deployment.
+
+        The deployment's own imagePullSecrets come first, so they are never shared with another
+        deployment or namespace, and a rotated secret is picked up. Other registries are resolved
+        once per run.
+
+        Args:
+            kube_apis: KubeApis or NamespaceSnapshot used to read the deployment's imagePullSecrets.
+            deployment: Kubernetes deployment object.
+            pull_credentials (DockerConfigCredentials, optional): The credentials of the
+                deployment's imagePullSecrets, from ``resolve_registries``. Read if not given.
+
+        Returns:
+            Registries: The registries of the deployment's images.
+        """
+        registries = Registries()
+        if pull_credentials is None:
+            pull_credentials = self.pull_secret_credentials(kube_apis, deployment)
+        for server in self.image_servers(deployment):
+            credentials = pull_credentials.get(server) if pull_credentials else None
+            if credentials:
+                registries.add_user_credentials(server, *credentials)
+                continue
+            self.resolve_registry(server)
+            with self.registries_lock:
+                registries.registries[server] = self.registries.registries[server]
+                registries.registries_secrets[server] = self.registries.registries_secrets[server]
+        return registries
+
+    def transform(self, kube_apis, deployment, pull_credentials=None):
         """
         Transform a Kubernetes deployment to an Azure Container Apps (ACA) deployment.
 
         Args:
             kube_apis: KubeApis object for interacting with the Kubernetes API.
             deployment: Kubernetes deployment object.
+            pull_credentials (DockerConfigCredentials, optional): The credentials of the
+                deployment's imagePullSecrets, from ``resolve_registries``. Read if not given.
 
         Returns:
-            dict: ACA configuration based on the Kubernetes deployment.
+            ContainerApp: ACA configuration based on the Kubernetes deployment.
+
+        Raises:
+            ValueError: If the resulting configuration is inconsistent.
         """
 
         deployment_namespace = deployment.metadata.namespace
-        volumes = extract_volumes(kube_apis, deployment)
+        registries = self.deployment_registries(kube_apis, deployment, pull_credentials)
+        volumes, volume_secrets = extract_volumes(kube_apis, deployment)
 
         containers = []
-        secrets = []
+        env_secrets = []
 
         for container in deployment.spec.template.spec.containers:
 
             secrets = extract_env_from(kube_apis, container, deployment_namespace)
+            env_secrets += secrets
+
+            resources = extract_resources(container)
+            containers.append(
+                Container(
+                    name=container.name,
+                    image=container.image,
+                    cpu=resources["cpu"],
+                    memory=resources["memory"],
+                    command=container.command,
+                    probes=extract_readiness_probes(container),
+                    env=extract_envs(container) + extract_secrets_ref_from_env_from(secrets),
+                    volume_mounts=extract_mounts(container),
+                )
+            )
+
+        registry_secrets = [
+            Secret(secret["name"], secret["value"])
+            for secret in registries.get_registries_secrets_array()
+        ]
+        # A secret read by several containers or volumes is declared once.
+        secrets = {}
+        for secret in registry_secrets + normalize_secrets(env_secrets) + volume_secrets:
+            secrets.setdefault(secret.name, secret)
 
-            aca_container = {
-                "image": container.image,
-                "name": container.name,
-                "resources": extract_resources(container),
-                "command": container.command,
-                "probes": extract_readiness_probes(container),
-                "env": extract_envs(container) + extract_secrets_ref_from_env_from(secrets),
-                "volumeMounts": extract_mounts(container)
-            }
-            registry= self.registries.extract_docker_image_elements(container.image)
-            
-            registry_exists = False
-            if  registry.get('server') in self.registries.registries:
-              registry_exists = True
-            
-            if not registry_exists:
-                has_registry_credentials = input(f"This registry  {registry.get('server')} reqquired credentials [Y/N]: ") or "N"
-
-                if has_registry_credentials.upper() == "Y":
-                    registry_username = input(f"Registry username for {registry.get('server')}: ")
-                    registry_passoword = input(f"Registry password for {registry.get('server')}: ")
-                    
-                    self.registries.add_user_credentials(registry.get('server'),registry_username, registry_passoword)
-                else:
-                    self.registries.add_anonymous(registry.get('server'))
-            containers.append(aca_container)
-    
-
-        aca_config = {
-            "properties": {
-                "configuration": {
-                    "registries": self.registries.get_registries_array(),
-                    "ingress": extract_ingress(kube_apis, deployment),
-                    "secrets": self.registries.get_registries_secrets_array()  + normalize_secrets(secrets) + volumes["secrets"]
-                },
-                "template": {
-                    "containers": containers,
-                    "scale": extract_scale(kube_apis, deployment),
-                    "volumes": volumes["volumes"],
-                },
-            }
-        }
-
-        return aca_config
\ No newline at end of file
+        ingress = extract_ingress(kube_apis, deployment)
+        app = ContainerApp(
+            name=deployment.metadata.name,
+            containers=containers,
+            registries=[
+                Registry(registry["server"], registry["username"], registry["passwordSecretRef"])
+                for registry in registries.get_registries_array()
+            ],
+            secrets=list(secrets.values()),
+            ingress=ingress,
+            scale=extract_scale(kube_apis, deployment),
+            volumes=volumes,
+            references=extract_references(deployment, ingress),
+        )
+        app.validate()
+        return app
@@ -0,0 +1,75 @@
+"""
+Shared fixtures: the ACA configurations of the manifests in ``tests/fixtures``,
+and the shop manifests served as a live cluster that counts its calls.
+"""
+
+import collections
+import os
+
+import pytest
+
+from src.api_profiler import API_ATTRIBUTES
+from src.manifests import ManifestSource
+from src.snapshot import DEPLOYMENT
+from src.yaml_transformer import YamlTransformer
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(TESTS_DIR, "fixtures")
+GOLDEN_DIR = os.path.join(TESTS_DIR, "golden")
+
+
+def transform_manifests(file_name, namespace):
+    """
+    Transform the deployments of a fixture manifest file.
+
+    Args:
+        file_name (str): The file name, in ``tests/fixtures``.
+        namespace (str): The namespace of the deployments.
+
+    Returns:
+        dict: The ContainerApp of every deployment, by name, in manifest order.
+    """
+    source = ManifestSource([os.path.join(FIXTURES_DIR, file_name)])
+    # No prompt, and no registry credentials from the environment of the test run.
+    transformer = YamlTransformer(credential_providers=[], interactive=False)
+    return {
+        deployment.metadata.name: transformer.transform(source, deployment)
+        for deployment in source.index.list(DEPLOYMENT, namespace)
+    }
+
+
+class CountingApi:
+    """
+    Proxies an API group, counting the calls of each method.
+    """
+
+    def __init__(self, api, calls):
+        self.api = api
+        self.calls = calls
+
+    def __getattr__(self, name):
+        method = getattr(self.api, name)
+
+        def call(*args, **kwargs):
+            self.calls[name] += 1
+            return method(*args, **kwargs)
+
+        return call
+
+
+class Cluster:
+    """
+    Serves the fixture objects through the KubeApis attributes.
+    """
+
+    def __init__(self, manifests=os.path.join(FIXTURES_DIR, "shop.yaml")):
+        self.source = ManifestSource([manifests])
+        self.calls = collections.Counter()
+        for attribute in API_ATTRIBUTES:
+            api = CountingApi(getattr(self.source, attribute), self.calls)
+            setattr(self, attribute, api)
+
+
+@pytest.fixture(scope="session")
+def shop_apps():
+    return transform_manifests("shop.yaml", "shop")
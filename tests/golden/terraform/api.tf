@@ -0,0 +1,75 @@
+resource "azurerm_container_app" "api" {
+  name                         = "api"
+  container_app_environment_id = ""
+  resource_group_name          = ""
+  revision_mode                = "Single"
+
+  registry {
+    server               = "myacr.azurecr.io"
+    username             = "puller"
+    password_secret_name = "registry-myacr-azurecr-io-password"
+  }
+
+  secret {
+    name  = "registry-myacr-azurecr-io-password"
+    value = "s3cr3t"
+  }
+
+  secret {
+    name  = "api-token"
+    value = "t0k3n"
+  }
+
+  secret {
+    name  = "tls-crt"
+    value = "CERTIFICATE"
+  }
+
+  secret {
+    name  = "tls-key"
+    value = "KEY"
+  }
+
+  ingress {
+    external_enabled           = false
+    allow_insecure_connections = false
+    target_port                = 9000
+
+    traffic_weight {
+      percentage      = 100
+      latest_revision = true
+    }
+  }
+
+  template {
+    min_replicas = 3
+    max_replicas = 3
+
+    container {
+      name   = "api"
+      image  = "myacr.azurecr.io/shop/api:2.1"
+      cpu    = 0.25
+      memory = "0.5Gi"
+
+      env {
+        name  = "DATABASE_HOST"
+        value = "db.shop.svc.cluster.local"
+      }
+
+      env {
+        name        = "API_TOKEN"
+        secret_name = "api-token"
+      }
+
+      volume_mounts {
+        name = "tls"
+        path = "/etc/tls"
+      }
+    }
+
+    volume {
+      name         = "tls"
+      storage_type = "Secret"
+    }
+  }
+}
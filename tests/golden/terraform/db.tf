@@ -0,0 +1,18 @@
+resource "azurerm_container_app" "db" {
+  name                         = "db"
+  container_app_environment_id = ""
+  resource_group_name          = ""
+  revision_mode                = "Single"
+
+  template {
+    min_replicas = 1
+    max_replicas = 1
+
+    container {
+      name   = "db"
+      image  = "postgres:16"
+      cpu    = 0.25
+      memory = "0.5Gi"
+    }
+  }
+}
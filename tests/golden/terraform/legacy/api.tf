@@ -0,0 +1,38 @@
+resource "azurerm_container_app" "api" {
+  name                         = "api"
+  container_app_environment_id = ""
+  resource_group_name          = ""
+  revision_mode                = "Single"
+
+  template {{
+
+    max_replicas      = "3"
+    min_replicas      = "0"
+
+    container {{
+        name      = "api"
+        image     = "myacr.azurecr.io/shop/api:2.1"
+        memory    = "0.5Gi"
+        cpu       = "0.25"
+
+env {{
+    name       = "DATABASE_HOST"
+    value       = "db.shop.svc.cluster.local"
+}}
+env {{
+    name       = "API_TOKEN"
+    secret_name       = "api-token"
+}}
+     }
+   }
+
+  ingress {
+    external_enabled = "False"
+    target_port = "9000"
+    traffic_weight {
+        percentage = "100"
+        latest_revision = "True"
+    }
+   }
+}
+
@@ -0,0 +1,22 @@
+resource "azurerm_container_app" "db" {
+  name                         = "db"
+  container_app_environment_id = ""
+  resource_group_name          = ""
+  revision_mode                = "Single"
+
+  template {{
+
+    max_replicas      = "1"
+    min_replicas      = "0"
+
+    container {{
+        name      = "db"
+        image     = "postgres:16"
+        memory    = "0.5Gi"
+        cpu       = "0.25"
+
+     }
+   }
+
+}
+
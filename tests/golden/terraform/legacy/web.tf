@@ -0,0 +1,51 @@
+resource "azurerm_container_app" "web" {
+  name                         = "web"
+  container_app_environment_id = ""
+  resource_group_name          = ""
+  revision_mode                = "Single"
+
+  template {{
+
+    max_replicas      = "5"
+    min_replicas      = "0"
+
+    container {{
+        name      = "web"
+        image     = "nginx:1.25"
+        memory    = "1.0Gi"
+        cpu       = "0.5"
+        command   = ["nginx", "-g", "daemon off;"]
+
+env {{
+    name       = "API_URL"
+    value       = "http://api:80/v1"
+}}
+env {{
+    name       = "GREETING"
+    value       = "Say "hi" to ${USER}"
+}}
+env {{
+    name       = "EMPTY"
+    value       = ""
+}}
+
+        readiness_probe {{
+            path   = "/healthz"
+            port   = "8080"
+            timeout   = "10"
+            transport   = "HTTP"
+            failure_count_threshold   = "3"
+         }
+     }
+   }
+
+  ingress {
+    external_enabled = "True"
+    target_port = "8080"
+    traffic_weight {
+        percentage = "100"
+        latest_revision = "True"
+    }
+   }
+}
+
@@ -0,0 +1,58 @@
+resource "azurerm_container_app" "web" {
+  name                         = "web"
+  container_app_environment_id = ""
+  resource_group_name          = ""
+  revision_mode                = "Single"
+
+  ingress {
+    external_enabled           = true
+    allow_insecure_connections = false
+    target_port                = 8080
+
+    traffic_weight {
+      percentage      = 100
+      latest_revision = true
+    }
+  }
+
+  template {
+    min_replicas = 2
+    max_replicas = 5
+
+    container {
+      name    = "web"
+      image   = "nginx:1.25"
+      cpu     = 0.5
+      memory  = "1.0Gi"
+      command = ["nginx", "-g", "daemon off;"]
+
+      env {
+        name  = "API_URL"
+        value = "http://api:80/v1"
+      }
+
+      env {
+        name  = "GREETING"
+        value = "Say \"hi\" to $${USER}"
+      }
+
+      env {
+        name  = "EMPTY"
+        value = ""
+      }
+
+      readiness_probe {
+        transport               = "HTTP"
+        port                    = 8080
+        path                    = "/healthz"
+        interval_seconds        = 10
+        failure_count_threshold = 3
+
+        header {
+          name  = "X-Probe"
+          value = "ready"
+        }
+      }
+    }
+  }
+}
@@ -0,0 +1,105 @@
+"""
+Tests of the API profiler, against REST client responses built in memory.
+"""
+
+import io
+
+import urllib3
+from kubernetes.client.rest import RESTResponse
+
+from src.api_profiler import ApiProfiler
+
+BODY = b'{"type": "ADDED", "object": {"kind": "Deployment"}}\n'
+
+
+class RestClient:
+    """
+    Answers every request with a fresh response holding BODY, as the REST client
+    of the installed kubernetes package does.
+    """
+
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+    def request(self, method, url, _preload_content=True, **kwargs):
+        response = urllib3.HTTPResponse(
+            body=io.BytesIO(BODY),
+            headers=self.headers,
+            status=200,
+            preload_content=False,
+        )
+        # Older clients only wrap, and read, the responses they preload.
+        if _preload_content or hasattr(RESTResponse, "read"):
+            return RESTResponse(response)
+        return response
+
+
+def stream(response):
+    """
+    Get the urllib3 response of a ``_preload_content=False`` call.
+    """
+    return getattr(response, "response", response)
+
+
+class Api:
+    """
+    An API instance whose list calls go through its REST client, reading the
+    body unless ``_preload_content=False``, as the generated clients do.
+    """
+
+    def __init__(self, rest_client):
+        self.api_client = type("ApiClient", (), {"rest_client": rest_client})()
+
+    def list_namespaced_deployment(self, namespace, _preload_content=True, **kwargs):
+        response = self.api_client.rest_client.request(
+            "GET", namespace, _preload_content=_preload_content
+        )
+        if not _preload_content:
+            return response
+        if hasattr(response, "read"):
+            response.read()
+        return response.data
+
+
+class KubeApis:
+    def __init__(self, headers=None):
+        self.api_instance = Api(RestClient(headers))
+
+
+def stats(profiler, verb):
+    (call,) = [call for call in profiler.report()["calls"] if call["verb"] == verb]
+    return call
+
+
+def test_streamed_responses_are_not_read():
+    profiler = ApiProfiler()
+    kube_apis = profiler.instrument(KubeApis())
+
+    response = kube_apis.api_instance.list_namespaced_deployment(
+        "shop", watch=True, _preload_content=False
+    )
+
+    assert stream(response).read() == BODY
+    assert stats(profiler, "watch")["bytes"] == 0
+    assert stats(profiler, "watch")["unsized_calls"] == 1
+
+
+def test_streamed_responses_are_sized_from_their_content_length():
+    profiler = ApiProfiler()
+    kube_apis = profiler.instrument(KubeApis({"Content-Length": str(len(BODY))}))
+
+    response = kube_apis.api_instance.list_namespaced_deployment(
+        "shop", _preload_content=False
+    )
+
+    assert stream(response).read() == BODY
+    assert stats(profiler, "list")["bytes"] == len(BODY)
+
+
+def test_read_responses_are_sized_from_their_body():
+    profiler = ApiProfiler()
+    kube_apis = profiler.instrument(KubeApis())
+
+    assert kube_apis.api_instance.list_namespaced_deployment("shop") == BODY
+    assert stats(profiler, "list")["bytes"] == len(BODY)
+    assert stats(profiler, "list")["unsized_calls"] == 0
@@ -0,0 +1,56 @@
+"""
+Tests of the secrets the extractors read, against an API with no secrets.
+"""
+
+import pytest
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+from src.extractor import extract_env_from, extract_volumes
+
+
+class NoSecrets:
+    """
+    Answers every secret read with a 404, like an API server without the secret.
+    """
+
+    def __init__(self):
+        self.api_v1 = self
+
+    def read_namespaced_secret(self, name, namespace):
+        raise ApiException(status=404, reason="Not Found")
+
+
+def container(optional=None):
+    env_from = client.V1EnvFromSource(
+        secret_ref=client.V1SecretEnvSource(name="api-env", optional=optional)
+    )
+    return client.V1Container(name="api", env_from=[env_from])
+
+
+def deployment(optional=None):
+    volume = client.V1Volume(
+        name="tls",
+        secret=client.V1SecretVolumeSource(secret_name="api-tls", optional=optional),
+    )
+    return client.V1Deployment(
+        metadata=client.V1ObjectMeta(name="api", namespace="shop"),
+        spec=client.V1DeploymentSpec(
+            selector=client.V1LabelSelector(),
+            template=client.V1PodTemplateSpec(
+                spec=client.V1PodSpec(containers=[container()], volumes=[volume])
+            ),
+        ),
+    )
+
+
+def test_a_missing_secret_is_an_error():
+    with pytest.raises(LookupError, match="Secret shop/api-env not found"):
+        extract_env_from(NoSecrets(), container(), "shop")
+    with pytest.raises(LookupError, match="Secret shop/api-tls not found"):
+        extract_volumes(NoSecrets(), deployment())
+
+
+def test_a_missing_optional_secret_is_skipped():
+    assert extract_env_from(NoSecrets(), container(optional=True), "shop") == []
+    extract_volumes(NoSecrets(), deployment(optional=True))
@@ -0,0 +1,115 @@
+"""
+Tests of the migration of a namespace, run through the command line over
+``tests/fixtures/shop.yaml``.
+"""
+
+import json
+import os
+import sys
+
+import yaml
+from kubernetes.client.rest import ApiException
+
+import src.main
+from src.cache import CACHE_FILE_NAME
+
+from .conftest import FIXTURES_DIR
+
+SHOP = os.path.join(FIXTURES_DIR, "shop.yaml")
+APPS = ["api", "db", "web"]
+
+
+def migrate(monkeypatch, output, *arguments, manifests=SHOP, namespace="shop"):
+    """
+    Run the command line over manifests.
+
+    Args:
+        monkeypatch: The pytest fixture.
+        output (pathlib.Path): The output folder.
+        *arguments (str): More command line arguments.
+        manifests (str, optional): The manifest file. Defaults to the shop fixture.
+        namespace (str, optional): The namespace. Defaults to "shop".
+    """
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "k8stoaca",
+            "--manifests",
+            str(manifests),
+            "--namespace",
+            namespace,
+            "--outputpath",
+            str(output),
+            "--non-interactive",
+            *arguments,
+        ],
+    )
+    src.main.main()
+
+
+def outputs(output):
+    names = os.listdir(output / "yaml")
+    return sorted(name[: -len(".yaml")] for name in names if name.endswith(".yaml"))
+
+
+def fail_listing(monkeypatch):
+    """
+    Make the listing of the deployments fail after the first one.
+
+    Args:
+        monkeypatch: The pytest fixture.
+    """
+    iter_deployments = src.main.iter_deployments
+
+    def listing(*args, **kwargs):
+        yield next(iter_deployments(*args, **kwargs))
+        raise ApiException(status=500, reason="Internal Server Error")
+
+    monkeypatch.setattr(src.main, "iter_deployments", listing)
+
+
+def test_failed_listing_keeps_the_outputs_of_the_namespace(
+    monkeypatch, tmp_path, capsys
+):
+    migrate(monkeypatch, tmp_path, "--incremental")
+    script = (tmp_path / "yaml" / "deployment.sh").read_text()
+    assert outputs(tmp_path) == APPS
+
+    fail_listing(monkeypatch)
+    migrate(monkeypatch, tmp_path, "--incremental")
+
+    assert "Failed to list the deployments of shop" in capsys.readouterr().out
+    assert outputs(tmp_path) == APPS
+    assert (tmp_path / "yaml" / "deployment.sh").read_text() == script
+    with open(tmp_path / CACHE_FILE_NAME, encoding="utf-8") as file:
+        assert len(json.load(file)["entries"]) == len(APPS)
+
+
+def test_prune_only_deletes_the_outputs_of_the_namespace(monkeypatch, tmp_path):
+    with open(SHOP, encoding="utf-8") as file:
+        documents = list(yaml.safe_load_all(file))
+    for document in documents:
+        document["metadata"]["namespace"] = "other"
+        if document["kind"] != "Secret":
+            document["metadata"]["name"] = "other-" + document["metadata"]["name"]
+    other = tmp_path / "other.yaml"
+    other.write_text(yaml.safe_dump_all(documents))
+    without_db = tmp_path / "shop.yaml"
+    with open(SHOP, encoding="utf-8") as file:
+        without_db.write_text(
+            yaml.safe_dump_all(
+                document
+                for document in yaml.safe_load_all(file)
+                if document["metadata"]["name"] != "db"
+            )
+        )
+    output = tmp_path / "out"
+
+    migrate(monkeypatch, output)
+    migrate(monkeypatch, output, manifests=other, namespace="other")
+    other_apps = ["other-" + name for name in APPS]
+    assert outputs(output) == sorted(APPS + other_apps)
+
+    migrate(monkeypatch, output, manifests=without_db)
+    assert outputs(output) == sorted(["api", "web"] + other_apps)
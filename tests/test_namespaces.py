@@ -0,0 +1,28 @@
+"""
+Tests of the index of a multi-namespace migration.
+"""
+
+import json
+
+from src.namespaces import INDEX_FILE_NAME, NamespaceReport, write_index
+from src.output_writer import OutputWriter
+
+
+def report(seconds):
+    namespace = NamespaceReport("shop", "shop")
+    namespace.apps = ["api", "web"]
+    namespace.seconds = seconds
+    return namespace
+
+
+def test_unchanged_runs_leave_the_index_untouched(tmp_path):
+    write_index(str(tmp_path), [report(1.5)], scripts=True)
+
+    writer = OutputWriter()
+    write_index(str(tmp_path), [report(2.5)], scripts=True, writer=writer)
+
+    assert (writer.written, writer.unchanged) == (0, 2)
+    with open(tmp_path / INDEX_FILE_NAME, encoding="utf-8") as file:
+        index = json.load(file)
+    assert "seconds" not in index["namespaces"][0]
+    assert index["apps"] == 2
@@ -0,0 +1,62 @@
+"""
+Tests of the transformation pipeline, against the shop fixture served as a live
+cluster that counts its calls.
+"""
+
+import os
+
+import pytest
+import yaml
+
+from src.async_yaml_transformer import AsyncYamlTransformer
+from src.pipeline import transform_deployments, transform_deployments_async
+from src.snapshot import DEPLOYMENT
+from src.yaml_transformer import YamlTransformer
+
+from .conftest import FIXTURES_DIR, Cluster
+
+ENGINES = [("sync", 1), ("sync", 4), ("async", 4)]
+
+
+def run(engine, cluster, workers):
+    deployments = cluster.source.index.list(DEPLOYMENT, "shop")
+    if engine == "async":
+        transformer = AsyncYamlTransformer(credential_providers=[], interactive=False)
+        return list(
+            transform_deployments_async(
+                cluster, transformer, deployments, concurrency=workers
+            )
+        )
+    transformer = YamlTransformer(credential_providers=[], interactive=False)
+    return list(transform_deployments(cluster, transformer, deployments, workers))
+
+
+@pytest.mark.parametrize("engine, workers", ENGINES)
+def test_pull_secrets_are_read_once_per_deployment(engine, workers):
+    cluster = Cluster()
+
+    results = {result.name: result for result in run(engine, cluster, workers)}
+
+    assert all(result.error is None for result in results.values())
+    (registry,) = results["api"].aca_config.registries
+    assert (registry.server, registry.username) == ("myacr.azurecr.io", "puller")
+    # api reads its envFrom secret, its secret volume and its pull secret once each.
+    assert cluster.calls["read_namespaced_secret"] == 3
+
+
+@pytest.mark.parametrize("secret", ["api-env", "api-tls", "acr"])
+@pytest.mark.parametrize("engine, workers", ENGINES)
+def test_a_missing_secret_fails_the_deployment(tmp_path, engine, workers, secret):
+    with open(os.path.join(FIXTURES_DIR, "shop.yaml"), encoding="utf-8") as file:
+        documents = [
+            document
+            for document in yaml.safe_load_all(file)
+            if (document["kind"], document["metadata"]["name"]) != ("Secret", secret)
+        ]
+    manifests = tmp_path / "shop.yaml"
+    manifests.write_text(yaml.safe_dump_all(documents))
+
+    results = {result.name: result for result in run(engine, Cluster(str(manifests)), workers)}
+
+    assert str(results.pop("api").error) == f"Secret shop/{secret} not found"
+    assert all(result.error is None for result in results.values())
@@ -0,0 +1,67 @@
+"""
+Tests of the adaptive rate limiter.
+"""
+
+import pytest
+
+from src.rate_limiter import BASELINE_SAMPLES, RateLimiter, request_verb
+
+APF = {"X-Kubernetes-PF-FlowSchema-UID": "flow-schema"}
+
+
+@pytest.mark.parametrize(
+    "method, url, query_params, verb",
+    [
+        ("GET", "https://k8s/api/v1/namespaces/shop/secrets", None, "list secrets"),
+        ("GET", "https://k8s/api/v1/namespaces/shop/secrets/tls", None, "get secrets"),
+        (
+            "GET",
+            "https://k8s/apis/apps/v1/namespaces/shop/deployments?limit=500",
+            [("watch", True)],
+            "watch deployments",
+        ),
+        ("GET", "https://k8s/api/v1/namespaces", None, "list namespaces"),
+        ("GET", "https://k8s/apis/apps/v1/deployments", None, "list deployments"),
+    ],
+)
+def test_request_verb(method, url, query_params, verb):
+    assert request_verb(method, url, query_params) == verb
+
+
+def test_slow_verbs_are_not_taken_as_queued():
+    limiter = RateLimiter(qps=100, burst=10)
+    # Listing a large namespace is slow from the first call.
+    for _ in range(20):
+        limiter.observe(200, APF, latency=2.0, verb="list secrets")
+    assert limiter.queued == 0
+    assert limiter.qps == 100
+
+
+def test_responses_slower_than_their_baseline_are_queued():
+    limiter = RateLimiter(qps=100, burst=10)
+    for _ in range(BASELINE_SAMPLES):
+        limiter.observe(200, APF, latency=0.02, verb="get services")
+        limiter.observe(200, APF, latency=2.0, verb="list secrets")
+
+    limiter.observe(200, APF, latency=0.5, verb="get services")
+    limiter.observe(200, APF, latency=2.5, verb="list secrets")
+
+    assert limiter.queued == 1
+    assert limiter.qps < 100
+
+
+def test_slow_responses_without_apf_headers_are_not_queued():
+    limiter = RateLimiter(qps=100, burst=10)
+    for _ in range(BASELINE_SAMPLES):
+        limiter.observe(200, {}, latency=0.02, verb="get services")
+    limiter.observe(200, {}, latency=1.0, verb="get services")
+    assert limiter.queued == 0
+
+
+def test_throttling_halves_the_rate_and_success_recovers_it():
+    limiter = RateLimiter(qps=100, burst=10)
+    limiter.observe(429, {"Retry-After": "0"})
+    assert (limiter.throttled, limiter.qps) == (1, 50)
+    for _ in range(10):
+        limiter.observe(200, {}, latency=0.01, verb="get services")
+    assert limiter.qps == 100
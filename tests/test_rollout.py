@@ -0,0 +1,141 @@
+"""
+Tests of the dependency waves of ``deployment.sh``, run against a stub ``az``.
+"""
+
+import os
+import shutil
+import stat
+import subprocess
+
+import pytest
+
+from src.rollout import dependency_waves
+from src.utils import update_az_scripts_file, write_az_scripts_file
+
+# Logs the start and end of each app, and fails for the app named "broken".
+STUB_AZ = """#!/bin/bash
+while [ "$#" -gt 0 ]; do
+  if [ "$1" = "-n" ]; then name="$2"; fi
+  shift
+done
+echo "start $name $(date +%s.%N)" >>"$AZ_LOG"
+sleep 0.3
+echo "end $name $(date +%s.%N)" >>"$AZ_LOG"
+[ "$name" != broken ]
+"""
+
+REFERENCES = {
+    "web": ["api"],
+    "api": ["db", "cache"],
+    "db": [],
+    "cache": [],
+    "broken": [],
+    "worker": ["db"],
+}
+
+
+def script_waves(file_path):
+    """
+    Read the waves of deployment.sh.
+
+    Args:
+        file_path (str): The output folder.
+
+    Returns:
+        list: The waves, as lists of app names.
+    """
+    waves = []
+    filename = os.path.join(file_path, "yaml", "deployment.sh")
+    with open(filename, encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("wave "):
+                waves.append([])
+            elif line.startswith("create "):
+                waves[-1].append(line.split()[1])
+    return waves
+
+
+@pytest.fixture
+def stub_az(tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    az = bin_dir / "az"
+    az.write_text(STUB_AZ)
+    az.chmod(az.stat().st_mode | stat.S_IXUSR)
+    return bin_dir
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="requires bash")
+def test_apps_are_created_in_waves_with_bounded_parallelism(tmp_path, stub_az):
+    output = tmp_path / "out"
+    script = write_az_scripts_file(str(output), REFERENCES, "rg", "env", parallelism=2)
+    for name in REFERENCES:
+        (output / "yaml" / f"{name}.yaml").write_text("")
+    log = tmp_path / "az.log"
+
+    result = subprocess.run(
+        ["bash", script],
+        env={
+            **os.environ,
+            "PATH": f"{stub_az}{os.pathsep}{os.environ['PATH']}",
+            "AZ_LOG": str(log),
+        },
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    events = sorted(
+        (float(time), kind, name)
+        for kind, name, time in map(str.split, log.read_text().splitlines())
+    )
+    started = {name: time for time, kind, name in events if kind == "start"}
+    ended = {name: time for time, kind, name in events if kind == "end"}
+    assert sorted(started) == sorted(ended) == sorted(REFERENCES)
+    for name, names in REFERENCES.items():
+        for reference in names:
+            assert ended[reference] <= started[name]
+    running = peak = 0
+    for _, kind, _ in events:
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    assert peak == 2
+
+    assert result.returncode == 1
+    assert "FAILED  broken (exit status 1, see logs/broken.log)" in result.stdout
+    assert "ok      web" in result.stdout
+    assert "6 app(s), 1 failed" in result.stdout
+
+
+def test_updating_an_app_recomputes_the_waves(tmp_path):
+    write_az_scripts_file(str(tmp_path), REFERENCES, "rg", "env")
+    assert script_waves(str(tmp_path)) == dependency_waves(REFERENCES)
+
+    # db now depends on a new app: db, and every app after it, move back.
+    update_az_scripts_file(str(tmp_path), "db", "rg", "env", references=["config"])
+    update_az_scripts_file(str(tmp_path), "config", "rg", "env")
+    assert script_waves(str(tmp_path)) == [
+        ["cache", "broken", "config"],
+        ["db"],
+        ["api", "worker"],
+        ["web"],
+    ]
+
+    # Dropping a reference moves the app forward; apps keep the order of the script.
+    update_az_scripts_file(str(tmp_path), "api", "rg", "env", references=["cache"])
+    update_az_scripts_file(str(tmp_path), "broken", "rg", "env", remove=True)
+    assert script_waves(str(tmp_path)) == [
+        ["cache", "config"],
+        ["db", "api"],
+        ["worker", "web"],
+    ]
+
+
+def test_updates_keep_the_parallelism_of_the_script(tmp_path):
+    write_az_scripts_file(str(tmp_path), {"db": []}, "rg", "env", parallelism=7)
+    update_az_scripts_file(str(tmp_path), "web", "rg", "env", references=["db"])
+
+    with open(os.path.join(str(tmp_path), "yaml", "deployment.sh")) as file:
+        script = file.read()
+    assert 'PARALLELISM="${PARALLELISM:-7}"' in script
+    assert script.endswith("report\n")
+    assert "--yaml web.yaml # references: db\n" in script
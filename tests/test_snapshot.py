@@ -0,0 +1,50 @@
+"""
+Tests of the namespace snapshot, against the objects of
+``tests/fixtures/shop.yaml`` served as a live cluster that counts its calls.
+"""
+
+import collections
+
+import pytest
+
+from src.kubernetes_utils import (
+    read_horizontal_pod_autoscaler_for_deployment,
+    read_secret,
+    read_service,
+)
+from src.snapshot import NamespaceSnapshot
+
+from .conftest import Cluster
+
+
+@pytest.fixture
+def cluster():
+    return Cluster()
+
+
+def test_answers_from_one_list_call_per_kind(cluster):
+    snapshot = NamespaceSnapshot(cluster, "shop")
+    listed = dict(cluster.calls)
+
+    assert read_service(snapshot, "web", "shop").spec.ports[0].target_port == 8080
+    assert read_service(snapshot, "db", "shop") is None
+    assert read_secret(snapshot, "api-env", "shop") is not None
+    assert cluster.calls == listed
+    assert all(name.startswith("list_") for name in cluster.calls)
+
+
+def test_misses_of_a_filtered_listing_list_the_kind_once(cluster):
+    # The fixture objects have no labels: the filtered listings are empty.
+    snapshot = NamespaceSnapshot(cluster, "shop", label_selector="tier=front")
+    listed = dict(cluster.calls)
+
+    for name in ("web", "api", "db"):
+        read_service(snapshot, name, "shop")
+        read_horizontal_pod_autoscaler_for_deployment(snapshot, name, "shop")
+
+    assert read_service(snapshot, "api", "shop").spec.ports[0].target_port == 9000
+    assert read_horizontal_pod_autoscaler_for_deployment(snapshot, "db", "shop") is None
+    assert cluster.calls - collections.Counter(listed) == {
+        "list_namespaced_service": 1,
+        "list_namespaced_horizontal_pod_autoscaler": 1,
+    }
@@ -0,0 +1,50 @@
+"""
+Tests of the ARM and Bicep outputs, against ``tests/fixtures/shop.yaml``.
+"""
+
+import io
+import json
+
+from src.transformer_arm import (
+    dumps_arm_parameters,
+    secret_values,
+    transform_arm,
+    write_bicep,
+    write_bicep_parameters,
+)
+
+SECRET_VALUES = ("s3cr3t", "t0k3n")
+
+
+def test_arm_secrets_are_secure_parameters_without_defaults(shop_apps):
+    template = transform_arm(list(shop_apps.values()), environment="env")
+
+    parameters = template["parameters"]
+    resources = {resource["name"]: resource for resource in template["resources"]}
+    secrets = resources["api"]["properties"]["configuration"]["secrets"]
+    for secret in secrets:
+        name = secret["value"][len("[parameters('") : -len("')]")]
+        assert parameters[name] == {"type": "securestring"}
+    assert not any(value in json.dumps(template) for value in SECRET_VALUES)
+
+
+def test_bicep_secrets_are_secure_parameters_without_defaults(shop_apps):
+    file = io.StringIO()
+    write_bicep(list(shop_apps.values()), file, environment="env")
+
+    assert "@secure()\nparam api_api_token string\n" in file.getvalue()
+    assert not any(value in file.getvalue() for value in SECRET_VALUES)
+
+
+def test_secret_values_are_written_to_parameters_files(shop_apps):
+    values = secret_values(list(shop_apps.values()))
+    assert values["api_api_token"] == "t0k3n"
+    assert values["registry_myacr_azurecr_io_password"] == "s3cr3t"
+
+    parameters = json.loads(dumps_arm_parameters(values))["parameters"]
+    assert parameters["api_api_token"] == {"value": "t0k3n"}
+
+    file = io.StringIO()
+    write_bicep_parameters(values, file, "shop.bicep")
+    assert file.getvalue().startswith("using './shop.bicep'\n")
+    assert "param api_api_token = 't0k3n'\n" in file.getvalue()
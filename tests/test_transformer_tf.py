@@ -0,0 +1,92 @@
+"""
+Golden-file tests of the Terraform output.
+
+``tests/golden/terraform/<app>.tf`` holds the expected output of each app of
+``tests/fixtures/shop.yaml``; regenerate them after an intended change with::
+
+    python -m src.main --manifests tests/fixtures/shop.yaml --namespace shop \
+        --non-interactive --output terraform --outputpath /tmp/shop
+    cp /tmp/shop/tf/*.tf tests/golden/terraform/
+
+``tests/golden/terraform/legacy`` holds the output of the string-concatenating
+writer that the HCL writer replaced, for the same apps.
+"""
+
+import collections
+import io
+import os
+import re
+
+import pytest
+
+from src import transformer_tf
+
+from .conftest import GOLDEN_DIR
+
+TERRAFORM_DIR = os.path.join(GOLDEN_DIR, "terraform")
+APPS = ("web", "api", "db")
+
+ATTRIBUTE = re.compile(r"^\s*(\w+)\s*=\s*(.*?)\s*$")
+# Attributes the legacy writer got wrong: min_replicas was read from a
+# "mainReplicas" key and the probe period was written as a timeout.
+LEGACY_BUGS = frozenset({"min_replicas", "timeout"})
+
+
+def read_golden(*path):
+    with open(os.path.join(TERRAFORM_DIR, *path), "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def normalize(value):
+    """
+    Normalize an attribute value: unquote strings and lower-case booleans, so
+    "8080" and 8080, or "True" and true, compare equal.
+    """
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+        value = value.replace("$${", "${").replace('\\"', '"').replace("\\\\", "\\")
+    if value in ("True", "False"):
+        value = value.lower()
+    return value
+
+
+def attribute_values(source):
+    """
+    Count the ``name = value`` attributes of a Terraform configuration.
+    """
+    values = collections.Counter()
+    for line in source.splitlines():
+        match = ATTRIBUTE.match(line)
+        if match:
+            name, value = match.groups()
+            values[(name, normalize(value))] += 1
+    return values
+
+
+@pytest.mark.parametrize("name", APPS)
+def test_matches_golden_file(shop_apps, name):
+    assert transformer_tf.transform(name, shop_apps[name]) == read_golden(f"{name}.tf")
+
+
+@pytest.mark.parametrize("name", APPS)
+def test_keeps_every_legacy_attribute(shop_apps, name):
+    output = attribute_values(transformer_tf.transform(name, shop_apps[name]))
+    legacy = attribute_values(read_golden("legacy", f"{name}.tf"))
+    missing = {
+        attribute: count
+        for attribute, count in legacy.items()
+        if attribute[0] not in LEGACY_BUGS and output[attribute] < count
+    }
+    assert missing == {}
+
+
+def test_escapes_quotes_and_interpolations(shop_apps):
+    output = transformer_tf.transform("web", shop_apps["web"])
+    assert 'value = "Say \\"hi\\" to $${USER}"' in output
+
+
+def test_streams_the_same_output(shop_apps):
+    # write() streams to a file handle what transform() returns.
+    output = io.StringIO()
+    transformer_tf.write("api", shop_apps["api"], output)
+    assert output.getvalue() == read_golden("api.tf")
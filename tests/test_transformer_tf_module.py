@@ -0,0 +1,25 @@
+"""
+Tests of the terraform-module output, against ``tests/fixtures/named-ports.yaml``.
+"""
+
+from src.transformer_tf import module_variables
+
+from .conftest import transform_manifests
+
+
+def test_named_target_ports_are_resolved_to_container_ports(capsys):
+    apps = transform_manifests("named-ports.yaml", "ports")
+
+    assert apps["front"].ingress.target_port == 8080
+    assert apps["metrics"].ingress.target_port == "web"
+    assert "Target port web of the service of metrics" in capsys.readouterr().out
+
+
+def test_apps_without_a_port_number_are_left_out_of_the_module(capsys):
+    apps = transform_manifests("named-ports.yaml", "ports")
+
+    variables = module_variables(list(apps.values()))
+
+    assert list(variables["apps"]) == ["front"]
+    assert variables["apps"]["front"]["ingress"]["target_port"] == 8080
+    assert "Skipped metrics" in capsys.readouterr().out
@@ -0,0 +1,257 @@
+"""
+Tests of the watcher against a fake event stream, over the objects of
+``tests/fixtures/shop.yaml``.
+"""
+
+import base64
+import copy
+import json
+import os
+import queue
+import threading
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+import src.watcher
+from src.manifests import ManifestSource, normalize_secret
+from src.resource_view import ResourceView
+from src.snapshot import DEPLOYMENT, HORIZONTAL_POD_AUTOSCALER, SECRET, SERVICE
+from src.watcher import RELISTED, AppWatcher
+from src.yaml_transformer import YamlTransformer
+
+from .conftest import FIXTURES_DIR
+
+
+class Recorder:
+    """
+    Records the callbacks of a watcher.
+    """
+
+    def __init__(self):
+        self.updates = []
+        self.deletes = []
+
+    def on_update(self, name, aca_config):
+        self.updates.append((name, aca_config))
+
+    def on_delete(self, name):
+        self.deletes.append(name)
+
+    @property
+    def updated(self):
+        return [name for name, _ in self.updates]
+
+
+@pytest.fixture
+def source():
+    return ManifestSource([os.path.join(FIXTURES_DIR, "shop.yaml")])
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+def watcher(source, recorder):
+    watcher = AppWatcher(
+        source,
+        "shop",
+        YamlTransformer(credential_providers=[], interactive=False),
+        recorder.on_update,
+        recorder.on_delete,
+    )
+    watcher.list()
+    return watcher
+
+
+def changed(source, kind, name, change):
+    """
+    Get a modified copy of a fixture object.
+
+    Args:
+        source (ManifestSource): The fixture objects.
+        kind (str): The Kubernetes kind.
+        name (str): The object name.
+        change (callable): Modifies the raw copy in place.
+
+    Returns:
+        ResourceView: The modified object.
+    """
+    document = copy.deepcopy(source.index.get(kind, name, "shop").to_dict())
+    change(document)
+    return ResourceView(document)
+
+
+def modified(obj):
+    return {"type": "MODIFIED", "object": obj}
+
+
+def secret_values(aca_config):
+    return {secret.name: secret.value for secret in aca_config.secrets}
+
+
+def test_lists_every_deployment(watcher):
+    assert sorted(watcher.migrated) == ["api", "db", "web"]
+
+
+def test_secret_change_regenerates_the_apps_reading_it(source, watcher, recorder):
+    def rotate(document):
+        document["stringData"] = {"API_TOKEN": "n3w"}
+        normalize_secret(document)
+
+    watcher.run([(SECRET, modified(changed(source, SECRET, "api-env", rotate)))])
+
+    assert recorder.updated == ["api"]
+    assert secret_values(recorder.updates[0][1])["api-token"] == "n3w"
+
+
+def test_pull_secret_rotation_is_picked_up(source, watcher, recorder):
+    def rotate(document):
+        auth = {"username": "puller", "password": "r0tated"}
+        docker_config = json.dumps({"auths": {"myacr.azurecr.io": auth}})
+        document["data"] = {
+            ".dockerconfigjson": base64.b64encode(docker_config.encode()).decode()
+        }
+
+    watcher.run([(SECRET, modified(changed(source, SECRET, "acr", rotate)))])
+
+    assert recorder.updated == ["api"]
+    secrets = secret_values(recorder.updates[0][1])
+    assert secrets["registry-myacr-azurecr-io-password"] == "r0tated"
+
+
+def test_status_only_change_is_ignored(source, watcher, recorder):
+    def set_generation(document):
+        document["metadata"]["generation"] = 4
+
+    def report_status(document):
+        set_generation(document)
+        document["status"] = {"readyReplicas": 3}
+
+    watcher.run(
+        [
+            (DEPLOYMENT, modified(changed(source, DEPLOYMENT, "api", set_generation))),
+            (DEPLOYMENT, modified(changed(source, DEPLOYMENT, "api", report_status))),
+        ]
+    )
+
+    assert recorder.updated == ["api"]
+
+
+def test_service_events_regenerate_the_deployment_of_the_same_name(
+    source, watcher, recorder
+):
+    def change_port(document):
+        document["spec"]["ports"][0]["targetPort"] = 9443
+
+    watcher.run(
+        [
+            (SERVICE, modified(changed(source, SERVICE, "api", change_port))),
+            (
+                SERVICE,
+                {"type": "DELETED", "object": source.index.get(SERVICE, "web", "shop")},
+            ),
+        ]
+    )
+
+    assert recorder.updated == ["api", "web"]
+    api, web = (aca_config for _, aca_config in recorder.updates)
+    assert api.ingress.target_port == 9443
+    assert web.ingress is None
+
+
+def test_deleted_deployment_is_reported_once(source, watcher, recorder):
+    deployment = source.index.get(DEPLOYMENT, "db", "shop")
+    event = {"type": "DELETED", "object": deployment}
+
+    watcher.run([(DEPLOYMENT, event), (DEPLOYMENT, event)])
+
+    assert recorder.deletes == ["db"]
+    assert recorder.updates == []
+
+
+def test_relist_regenerates_only_the_changed_objects(source, watcher, recorder):
+    def scale_up(document):
+        document["metadata"]["resourceVersion"] = "2"
+        document["spec"]["maxReplicas"] = 10
+
+    objects = [changed(source, HORIZONTAL_POD_AUTOSCALER, "web", scale_up)]
+
+    watcher.run(
+        [(HORIZONTAL_POD_AUTOSCALER, {"type": RELISTED, "objects": objects})]
+    )
+
+    assert recorder.updated == ["web"]
+    assert recorder.updates[0][1].scale.max_replicas == 10
+
+
+def test_unknown_event_types_are_ignored(source, watcher, recorder):
+    deployment = source.index.get(DEPLOYMENT, "web", "shop")
+
+    watcher.run([(DEPLOYMENT, {"type": "BOOKMARK", "object": deployment})])
+
+    assert recorder.updates == [] and recorder.deletes == []
+
+
+class Closed(BaseException):
+    """
+    Ends a watch thread, past the retries of the watcher.
+    """
+
+
+class ExpiringWatch:
+    """
+    A watch whose first stream expires with a 410; later streams stay open
+    without events until the test ends, then end the thread watching.
+    """
+
+    expired = False
+    closed = threading.Event()
+
+    def stream(self, list_call, **kwargs):
+        if not ExpiringWatch.expired:
+            ExpiringWatch.expired = True
+            raise ApiException(status=410, reason="Gone")
+        ExpiringWatch.closed.wait(5)
+        raise Closed
+
+
+def test_failed_relist_is_retried(source, watcher, monkeypatch):
+    listings = []
+
+    def list_secrets(namespace, **kwargs):
+        listings.append(namespace)
+        if len(listings) == 1:
+            raise ApiException(status=503, reason="Service Unavailable")
+        return source.api_v1.list_namespaced_secret(namespace, **kwargs)
+
+    monkeypatch.setattr(src.watcher, "WATCH_RETRY_SECONDS", 0)
+    monkeypatch.setattr(src.watcher, "list_function", lambda apis, kind: list_secrets)
+    monkeypatch.setattr(src.watcher.watch, "Watch", ExpiringWatch)
+    monkeypatch.setattr(ExpiringWatch, "expired", False)
+    monkeypatch.setattr(ExpiringWatch, "closed", threading.Event())
+    events = queue.Queue()
+
+    def watch_secrets():
+        try:
+            watcher._watch_kind(SECRET, events)
+        except Closed:
+            pass
+
+    thread = threading.Thread(target=watch_secrets, daemon=True)
+    thread.start()
+    try:
+        kind, event = events.get(timeout=5)
+    finally:
+        ExpiringWatch.closed.set()
+        thread.join(5)
+
+    assert listings == ["shop", "shop"]
+    assert (kind, event["type"]) == (SECRET, RELISTED)
+    assert sorted(secret.metadata.name for secret in event["objects"]) == [
+        "acr",
+        "api-env",
+        "api-tls",
+    ]